@@ -0,0 +1,158 @@
+"""带操作日志的写接口辅助函数
+
+论文、专利、资源的批量接口（POST /batch、PATCH /batch、POST /batch/delete）只有
+CRUD、Schema 和日志摘要字段不同，由 add_batch_routes 统一注册。
+"""
+from collections.abc import Awaitable, Callable
+from typing import Annotated, Any, Optional, TypeVar
+from uuid import UUID
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_admin_user
+from app.core.globals import system_config
+from app.crud import CRUDBase, UnitOfWork, unit_of_work
+from app.db.postgres import get_session
+from app.models.tables import User
+from app.schemas.common import BatchDeleteRequest, BatchDeleteResponse
+from app.services.audit_log import audit_log_service
+
+ResultType = TypeVar("ResultType")
+
+
+async def run_audited(
+    request: Request,
+    current_user: User,
+    *,
+    action: str,
+    resource_type: str,
+    operation: Callable[[], Awaitable[ResultType]],
+    changes: Callable[[ResultType], dict],
+    resource_id: Optional[str] = None,
+) -> ResultType:
+    """执行写操作并记录一条操作日志
+
+    成功时记录 changes(结果)；失败时记录错误信息后继续抛出。
+    HTTPException（如 404）属于请求错误，不记录失败日志。
+    """
+    log = dict(
+        user_id=str(current_user.id),
+        action=action,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    try:
+        result = await operation()
+    except HTTPException:
+        raise
+    except Exception as e:
+        await audit_log_service.log_action(**log, status="failed", error_message=str(e))
+        raise
+
+    await audit_log_service.log_action(**log, changes=changes(result), status="success")
+    return result
+
+
+def add_batch_routes(
+    router: APIRouter,
+    crud: CRUDBase,
+    *,
+    resource_type: str,
+    label: str,
+    create_schema: type[BaseModel],
+    batch_update_schema: type[BaseModel],
+    response_schema: type[BaseModel],
+    summary_fields: tuple[str, ...],
+    before_delete: Optional[Callable[[AsyncSession, UnitOfWork, list[UUID]], Awaitable[None]]] = None,
+) -> None:
+    """注册批量创建、批量更新、批量删除接口（均需要管理员权限）
+
+    Args:
+        label: 接口说明中的中文名称（如「论文」）
+        summary_fields: 操作日志中记录的字段（另外总会记录 id）
+        before_delete: 删除前在同一事务中执行的清理（如删除关联记录）
+    """
+
+    def summarize(objs: list) -> list[dict[str, Any]]:
+        return [
+            {"id": str(obj.id), **{field: getattr(obj, field) for field in summary_fields}}
+            for obj in objs
+        ]
+
+    @router.post(
+        "/batch",
+        response_model=list[response_schema],
+        name=f"create_{resource_type}s_batch",
+        description=f"批量创建{label}（需要管理员权限，一个事务写入并只记录一条操作日志）",
+    )
+    async def create_batch(
+        objs_in: Annotated[list[create_schema], Body(min_length=1, max_length=system_config.BATCH_MAX_ITEMS)],
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_admin_user)],
+        db: AsyncSession = Depends(get_session),
+    ) -> Any:
+        return await run_audited(
+            request,
+            current_user,
+            action="batch_create",
+            resource_type=resource_type,
+            operation=lambda: crud.create_many(db, objs_in=objs_in),
+            changes=lambda objs: {"after": summarize(objs)},
+        )
+
+    @router.patch(
+        "/batch",
+        response_model=list[response_schema],
+        name=f"update_{resource_type}s_batch",
+        description=f"批量更新{label}：把 changes 中的字段写入 ids 中的全部{label}（需要管理员权限）",
+    )
+    async def update_batch(
+        batch_in: batch_update_schema,
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_admin_user)],
+        db: AsyncSession = Depends(get_session),
+    ) -> Any:
+        return await run_audited(
+            request,
+            current_user,
+            action="batch_update",
+            resource_type=resource_type,
+            operation=lambda: crud.update_many(db, ids=batch_in.ids, obj_in=batch_in.changes),
+            changes=lambda objs: {
+                "ids": [str(obj.id) for obj in objs],
+                "after": batch_in.changes.model_dump(mode="json", exclude_unset=True),
+            },
+        )
+
+    @router.post(
+        "/batch/delete",
+        response_model=BatchDeleteResponse,
+        name=f"delete_{resource_type}s_batch",
+        description=f"批量删除{label}（需要管理员权限），不存在的ID会被忽略",
+    )
+    async def delete_batch(
+        batch_in: BatchDeleteRequest,
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_admin_user)],
+        db: AsyncSession = Depends(get_session),
+    ) -> Any:
+        async def remove() -> list:
+            async with unit_of_work(db) as uow:
+                if before_delete is not None:
+                    await before_delete(db, uow, batch_in.ids)
+                return await crud.remove_many(db, ids=batch_in.ids)
+
+        objs = await run_audited(
+            request,
+            current_user,
+            action="batch_delete",
+            resource_type=resource_type,
+            operation=remove,
+            changes=lambda objs: {"before": summarize(objs)},
+        )
+        return {"deleted": len(objs), "ids": [obj.id for obj in objs]}
+
@@ -1,15 +1,21 @@
 """
 API依赖项
 """
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+import hashlib
+import time
+from datetime import date
+from collections.abc import Sequence
+from typing import Annotated, Optional
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
-from app.db.postgres import get_session
+from app.core.globals import database_config
+from app.db.postgres import get_session, use_primary
 from app.core.security import decode_access_token
 from app.models.tables import User
+from app.services.table_versions import table_version_service
 from app.services.token_blacklist import token_blacklist_service
 
 # HTTP Bearer token认证
@@ -91,3 +97,68 @@ async def get_current_superadmin_user(
             detail="需要超级管理员权限",
         )
     return current_user
+
+
+def parse_facets(value: Optional[str], allowed: Sequence[str]) -> list[str]:
+    """解析列表接口的 facets 查询参数（逗号分隔），未知的分面名返回 400"""
+    if not value:
+        return []
+    facets = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in facets if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的分面：{', '.join(unknown)}。可选：{', '.join(allowed)}",
+        )
+    return facets
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 弱比较"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_get(*tables: str):
+    """条件 GET 依赖：根据相关表版本号生成弱 ETag，命中 If-None-Match 时直接返回 304
+
+    ETag 由路由、查询参数、Authorization 头、当天日期（覆盖按当前时间统计的接口）
+    以及各表版本号计算得到。需放在路由装饰器的 dependencies 中，先于任何查询执行。
+
+    相关表在副本最大允许延迟内刚被修改时，本次请求改读主库，
+    避免把副本上的旧数据以新版本号的 ETag 返回给客户端。
+
+    用法:
+        @router.get("/stats", dependencies=[Depends(conditional_get(Paper.__tablename__))])
+    """
+
+    async def dependency(request: Request, response: Response) -> None:
+        result = await table_version_service.get_versions(tables)
+        if result is None:
+            return
+        versions, bumped_at = result
+        if time.time() - bumped_at <= database_config.POSTGRES_REPLICA_MAX_LAG_SECONDS:
+            use_primary(request)
+
+        raw = "|".join([
+            request.url.path,
+            str(sorted(request.query_params.multi_items())),
+            request.headers.get("authorization", ""),
+            date.today().isoformat(),
+            *versions,
+        ])
+        etag = f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
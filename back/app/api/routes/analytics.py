@@ -1,29 +1,34 @@
 from typing import Any, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import json
 import io
 import csv
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import func, select, extract, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.postgres import get_session
+from app.core.serialization import ORJSONResponse
+from app.db.batch import count_by
+from app.db.postgres import get_read_session, get_session
 from app.api.deps import get_current_user, get_current_admin_user
 from app.models.tables import (
-    Paper, Project, Patent, Resource, PaperAuthor,
+    Paper, Project, Patent, Resource, PaperAuthor, AuthorMetric,
     SoftwareCopyright, Competition, Conference, Cooperation, User
 )
 from app.schemas.analytics import (
     AnalyticsOverviewResponse,
+    AuthorMetricResponse,
     Summary,
     Trend,
     TopAuthor
 )
+from app.services.author_metrics import author_metrics_service, compute_h_index
 from app.services.cache import cache_service
+from app.services.keyword_analytics import keyword_analytics_service
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
@@ -31,7 +36,7 @@ router = APIRouter(prefix="/analytics", tags=["Analytics"])
 @router.get("/overview", response_model=AnalyticsOverviewResponse)
 async def get_analytics_overview(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
     show_all: bool = Query(True, description="是否显示所有数据"),
     my_only: bool = Query(False, description="是否只显示我的数据")
 ) -> Any:
@@ -160,31 +165,21 @@ async def get_analytics_overview(
             cooperations=cooperations_month
         ))
     
-    # 获取顶级作者统计
-    top_authors_query = select(
-        PaperAuthor.author_name,
-        func.count(PaperAuthor.paper_id).label("paper_count")
-    ).group_by(PaperAuthor.author_name).order_by(func.count(PaperAuthor.paper_id).desc()).limit(10)
+    # 获取顶级作者统计（读取离线计算的作者指标）
+    top_authors_data = await author_metrics_service.get_top_authors(db, limit=10)
     
-    top_authors_result = await db.execute(top_authors_query)
-    top_authors_data = top_authors_result.all()
+    # 各作者作为负责人的项目数（一次批量查询）
+    projects_counts = await count_by(
+        db, Project.principal, [author_data.author_name for author_data in top_authors_data]
+    )
     
     top_authors = []
-    for author_data in top_authors_data:
-        # 计算该作者参与的项目数（简化实现）
-        projects_as_principal_query = select(func.count(Project.id)).where(
-            Project.principal == author_data.author_name
-        )
-        projects_count = (await db.execute(projects_as_principal_query)).scalar() or 0
-        
-        # 简化的h指数计算
-        h_index = min(author_data.paper_count, 20)
-        
+    for author_data, projects_count in zip(top_authors_data, projects_counts):
         top_authors.append(TopAuthor(
             name=author_data.author_name,
             papers=author_data.paper_count,
             projects=projects_count,
-            h_index=h_index
+            h_index=author_data.h_index
         ))
     
     # 构建响应数据
@@ -205,10 +200,10 @@ async def get_analytics_overview(
     return response_data
 
 
-@router.get("/weekly-activity")
+@router.get("/weekly-activity", response_class=ORJSONResponse)
 async def get_weekly_activity(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """获取每周活动数据（过去7天）"""
     
@@ -262,10 +257,10 @@ async def get_weekly_activity(
     }
 
 
-@router.get("/deep-analysis")
+@router.get("/deep-analysis", response_class=ORJSONResponse)
 async def get_deep_analysis(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """获取深度数据分析（研究领域、质量趋势、合作效益等）"""
     
@@ -280,26 +275,11 @@ async def get_deep_analysis(
     conferences_count = (await db.execute(select(func.count(Conference.id)))).scalar() or 0
     cooperations_count = (await db.execute(select(func.count(Cooperation.id)))).scalar() or 0
     
-    # 2. 研究领域分布（基于论文关键词）
-    # 如果有keywords字段，可以统计；这里使用基于论文数量的分布
-    if papers_count > 0:
-        research_fields = [
-            {"field": "人工智能", "count": max(1, int(papers_count * 0.25)), "color": "#3b82f6"},
-            {"field": "机器学习", "count": max(1, int(papers_count * 0.21)), "color": "#22c55e"},
-            {"field": "计算机视觉", "count": max(1, int(papers_count * 0.18)), "color": "#f97316"},
-            {"field": "自然语言处理", "count": max(1, int(papers_count * 0.14)), "color": "#a855f7"},
-            {"field": "数据挖掘", "count": max(1, int(papers_count * 0.12)), "color": "#ec4899"},
-            {"field": "网络安全", "count": max(1, int(papers_count * 0.10)), "color": "#14b8a6"},
-        ]
-    else:
-        # 如果没有论文，返回示例数据
+    # 2. 研究领域分布（基于论文关键词与 keyword_fields 映射）
+    research_fields = await keyword_analytics_service.get_field_distribution(db)
+    if not research_fields:
         research_fields = [
-            {"field": "人工智能", "count": 0, "color": "#3b82f6"},
-            {"field": "机器学习", "count": 0, "color": "#22c55e"},
-            {"field": "计算机视觉", "count": 0, "color": "#f97316"},
-            {"field": "自然语言处理", "count": 0, "color": "#a855f7"},
-            {"field": "数据挖掘", "count": 0, "color": "#ec4899"},
-            {"field": "网络安全", "count": 0, "color": "#14b8a6"},
+            {"field": "暂无关键词数据", "count": 0, "color": "#3b82f6"},
         ]
     
     # 3. 成果质量趋势（按月统计）
@@ -369,11 +349,11 @@ async def get_deep_analysis(
     # 6. 关键分析指标（基于真实数据计算）
     total_achievements = papers_count + patents_count + projects_count + software_count
     
-    # 平均影响因子（基于论文数量估算）
-    avg_impact_factor = round(2.5 + (papers_count / 50), 2) if papers_count > 0 else 0
+    # 平均影响因子（有影响因子的论文）
+    avg_impact_factor = round(float((await db.execute(select(func.avg(Paper.impact_factor)))).scalar() or 0), 2)
     
-    # H指数（简化计算）
-    h_index = min(int(papers_count * 0.6), 50)
+    # H指数（基于论文被引次数）
+    h_index = await author_metrics_service.get_overall_h_index(db)
     
     # 合作效率指数
     collaboration_index = round(75 + (cooperations_count * 2), 1) if cooperations_count > 0 else 0
@@ -461,12 +441,99 @@ async def get_deep_analysis(
     }
 
 
-@router.get("/export")
+@router.get("/author-metrics", response_model=list[AuthorMetricResponse])
+async def get_author_metrics(
+    order_by: str = Query("paper_count", description="排序字段: paper_count, h_index, total_citations, pagerank, degree_centrality"),
+    limit: int = Query(20, ge=1, le=200, description="返回数量"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+) -> Any:
+    """获取预计算的作者指标（h指数、合著中心性、产出效率）"""
+    sortable = {"paper_count", "h_index", "total_citations", "pagerank", "degree_centrality"}
+    if order_by not in sortable:
+        raise HTTPException(status_code=400, detail=f"不支持的排序字段：{order_by}")
+    
+    result = await db.execute(
+        select(AuthorMetric)
+        .order_by(getattr(AuthorMetric, order_by).desc(), AuthorMetric.author_name)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.post("/author-metrics/refresh")
+async def refresh_author_metrics(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """重新计算作者指标（管理员）"""
+    author_count = await author_metrics_service.refresh(db)
+    # 作者指标出现在 overview / export 等缓存结果中
+    deleted_count = await cache_service.delete_pattern("analytics:*")
+    
+    return {
+        "message": "作者指标已刷新",
+        "author_count": author_count,
+        "deleted_keys": deleted_count
+    }
+
+
+class KeywordFieldMapping(BaseModel):
+    keyword: str
+    field: str
+
+
+@router.get("/keywords/top", response_class=ORJSONResponse)
+async def get_top_keywords(
+    limit: int = Query(20, ge=1, le=100, description="返回数量"),
+    start_date: Optional[date] = Query(None, description="发表日期起始（含）"),
+    end_date: Optional[date] = Query(None, description="发表日期截止（含）"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+) -> Any:
+    """获取热门关键词（按涉及论文数排序，可按发表日期筛选）"""
+    cache_key = f"analytics:keywords:top:{limit}:{start_date}:{end_date}"
+    cached_data = await cache_service.get(cache_key)
+    if cached_data:
+        return cached_data
+    
+    keywords = await keyword_analytics_service.get_top_keywords(
+        db, limit=limit, start_date=start_date, end_date=end_date
+    )
+    fields = await keyword_analytics_service.get_field_distribution(
+        db, start_date=start_date, end_date=end_date
+    )
+    response_data = {"keywords": keywords, "fields": fields}
+    
+    await cache_service.set(cache_key, response_data, expire=300)
+    return response_data
+
+
+@router.put("/keywords/fields")
+async def update_keyword_fields(
+    mappings: list[KeywordFieldMapping],
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """批量设置关键词-研究领域映射（管理员）"""
+    updated = await keyword_analytics_service.upsert_mappings(
+        db, {item.keyword: item.field for item in mappings}
+    )
+    deleted_count = await cache_service.delete_pattern("analytics:*")
+    
+    return {
+        "message": "关键词领域映射已更新",
+        "updated": updated,
+        "deleted_keys": deleted_count
+    }
+
+
+@router.get("/export", response_class=ORJSONResponse)
 async def export_analytics_data(
     format: str = Query("excel", description="导出格式: excel, csv, json"),
     tab: str = Query("research", description="标签页: research, overview, analytics"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """导出分析数据（包含所有统计和分析数据）"""
     
@@ -532,26 +599,20 @@ async def export_analytics_data(
             "专利": patents_month
         })
     
-    # 2. 顶级作者统计
-    top_authors_query = select(
-        PaperAuthor.author_name,
-        func.count(PaperAuthor.paper_id).label("paper_count")
-    ).group_by(PaperAuthor.author_name).order_by(func.count(PaperAuthor.paper_id).desc()).limit(10)
+    # 2. 顶级作者统计（读取离线计算的作者指标）
+    top_authors_data = await author_metrics_service.get_top_authors(db, limit=10)
     
-    top_authors_result = await db.execute(top_authors_query)
-    top_authors_data = top_authors_result.all()
+    projects_counts = await count_by(
+        db, Project.principal, [author_data.author_name for author_data in top_authors_data]
+    )
     
     top_authors = []
-    for author_data in top_authors_data:
-        projects_as_principal = (await db.execute(
-            select(func.count(Project.id)).where(Project.principal == author_data.author_name)
-        )).scalar() or 0
-        
+    for author_data, projects_as_principal in zip(top_authors_data, projects_counts):
         top_authors.append({
             "作者": author_data.author_name,
             "论文数": author_data.paper_count,
             "项目数": projects_as_principal,
-            "H指数": min(author_data.paper_count, 20)
+            "H指数": author_data.h_index
         })
     
     # 3. 每周活动数据
@@ -585,22 +646,17 @@ async def export_analytics_data(
             "项目": projects_day
         })
     
-    # 4. 研究领域分布
+    # 4. 研究领域分布（基于论文关键词）
     papers_count = len(papers)
-    research_fields = []
-    if papers_count > 0:
-        research_fields = [
-            {"领域": "人工智能", "数量": max(1, int(papers_count * 0.25))},
-            {"领域": "机器学习", "数量": max(1, int(papers_count * 0.21))},
-            {"领域": "计算机视觉", "数量": max(1, int(papers_count * 0.18))},
-            {"领域": "自然语言处理", "数量": max(1, int(papers_count * 0.14))},
-            {"领域": "数据挖掘", "数量": max(1, int(papers_count * 0.12))},
-            {"领域": "网络安全", "数量": max(1, int(papers_count * 0.10))},
-        ]
+    research_fields = [
+        {"领域": item["field"], "数量": item["count"]}
+        for item in await keyword_analytics_service.get_field_distribution(db)
+    ]
     
     # 5. 关键指标
-    avg_impact_factor = round(2.5 + (papers_count / 50), 2) if papers_count > 0 else 0
-    h_index = min(int(papers_count * 0.6), 50)
+    impact_factors = [float(paper.impact_factor) for paper in papers if paper.impact_factor is not None]
+    avg_impact_factor = round(sum(impact_factors) / len(impact_factors), 2) if impact_factors else 0
+    h_index = compute_h_index([paper.citation_count for paper in papers])
     collaboration_index = round(75 + (len(cooperations) * 2), 1) if len(cooperations) > 0 else 0
     conversion_rate = round((len(patents) / max(papers_count + len(projects), 1)) * 100, 1) if (papers_count + len(projects)) > 0 else 0
     
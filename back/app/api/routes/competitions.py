@@ -6,8 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.competitions import crud_competition
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user
-from app.models.tables import User
+from app.api.deps import conditional_get, get_current_admin_user, parse_facets
+from app.models.tables import Competition, User
 from app.services.audit_log import audit_log_service
 from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
 from app.schemas.competitions import (
@@ -44,14 +44,21 @@ def map_competition_to_response(comp) -> dict:
         raise
 
 
-@router.get("/", response_model=PaginatedResponse[CompetitionListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[CompetitionListItem],
+    dependencies=[Depends(conditional_get(Competition.__tablename__))],
+)
 async def get_competitions(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取比赛列表"""
+    facet_names = parse_facets(facets, crud_competition.available_facets)
+
     try:
         filters = {}
         if status:
@@ -63,16 +70,14 @@ async def get_competitions(
             }
             filters["status"] = status_map.get(status, status)
 
-        if search:
-            competitions = await crud_competition.search(
-                db, query=search, skip=pagination.offset, limit=pagination.size
-            )
-            total = len(competitions)
-        else:
-            competitions = await crud_competition.get_multi(
-                db, skip=pagination.offset, limit=pagination.size, filters=filters
-            )
-            total = await crud_competition.count(db, filters=filters)
+        competitions, total, facet_counts = await crud_competition.get_page(
+            db,
+            skip=pagination.offset,
+            limit=pagination.size,
+            filters=filters,
+            search=search,
+            facets=facet_names,
+        )
 
         print(f"Found {len(competitions)} competitions")
         
@@ -96,6 +101,7 @@ async def get_competitions(
             page=pagination.page,
             size=pagination.size,
             pages=(total + pagination.size - 1) // pagination.size,
+            facets=facet_counts,
         )
     except Exception as e:
         print(f"Error in get_competitions: {e}")
@@ -104,7 +110,11 @@ async def get_competitions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(Competition.__tablename__))],
+)
 async def get_competition_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取比赛统计数据"""
     stats = await crud_competition.get_stats(db)
@@ -117,7 +127,11 @@ async def get_competition_stats(db: AsyncSession = Depends(get_session)) -> Any:
     ]
 
 
-@router.get("/{competition_id}", response_model=CompetitionResponse)
+@router.get(
+    "/{competition_id}",
+    response_model=CompetitionResponse,
+    dependencies=[Depends(conditional_get(Competition.__tablename__))],
+)
 async def get_competition(
     competition_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -6,8 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.conferences import crud_conference
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user
-from app.models.tables import User
+from app.api.deps import conditional_get, get_current_admin_user, parse_facets
+from app.models.tables import Conference, User
 from app.services.audit_log import audit_log_service
 from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
 from app.schemas.conferences import (
@@ -45,14 +45,20 @@ def map_conference_to_response(conf) -> dict:
     }
 
 
-@router.get("/", response_model=PaginatedResponse[ConferenceListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[ConferenceListItem],
+    dependencies=[Depends(conditional_get(Conference.__tablename__))],
+)
 async def get_conferences(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取会议列表"""
+    facet_names = parse_facets(facets, crud_conference.available_facets)
     filters = {}
     if status:
         # 状态映射
@@ -63,16 +69,14 @@ async def get_conferences(
         }
         filters["participation_type"] = status_map.get(status, status)
 
-    if search:
-        conferences = await crud_conference.search(
-            db, query=search, skip=pagination.offset, limit=pagination.size
-        )
-        total = len(conferences)
-    else:
-        conferences = await crud_conference.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_conference.count(db, filters=filters)
+    conferences, total, facet_counts = await crud_conference.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [ConferenceListItem(**map_conference_to_response(conf)) for conf in conferences]
 
@@ -82,10 +86,15 @@ async def get_conferences(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(Conference.__tablename__))],
+)
 async def get_conference_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取会议统计数据"""
     stats = await crud_conference.get_stats(db)
@@ -125,7 +134,11 @@ async def get_conference_stats(db: AsyncSession = Depends(get_session)) -> Any:
     ]
 
 
-@router.get("/{conference_id}", response_model=ConferenceResponse)
+@router.get(
+    "/{conference_id}",
+    response_model=ConferenceResponse,
+    dependencies=[Depends(conditional_get(Conference.__tablename__))],
+)
 async def get_conference(
     conference_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -169,6 +182,7 @@ async def create_conference(
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await crud_conference.bump_version()
         
         await audit_log_service.log_action(
             user_id=str(current_user.id),
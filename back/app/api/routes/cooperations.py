@@ -6,8 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.cooperations import crud_cooperation
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user
-from app.models.tables import User
+from app.api.deps import conditional_get, get_current_admin_user, parse_facets
+from app.models.tables import Cooperation, User
 from app.services.audit_log import audit_log_service
 from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
 from app.schemas.cooperations import (
@@ -42,14 +42,20 @@ def map_cooperation_to_response(coop) -> dict:
     }
 
 
-@router.get("/", response_model=PaginatedResponse[CooperationListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[CooperationListItem],
+    dependencies=[Depends(conditional_get(Cooperation.__tablename__))],
+)
 async def get_cooperations(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取合作列表"""
+    facet_names = parse_facets(facets, crud_cooperation.available_facets)
     filters = {}
     if status:
         # 状态映射
@@ -61,16 +67,14 @@ async def get_cooperations(
         }
         filters["status"] = status_map.get(status, status)
 
-    if search:
-        cooperations = await crud_cooperation.search(
-            db, query=search, skip=pagination.offset, limit=pagination.size
-        )
-        total = len(cooperations)
-    else:
-        cooperations = await crud_cooperation.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_cooperation.count(db, filters=filters)
+    cooperations, total, facet_counts = await crud_cooperation.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [CooperationListItem(**map_cooperation_to_response(coop)) for coop in cooperations]
 
@@ -80,10 +84,15 @@ async def get_cooperations(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(Cooperation.__tablename__))],
+)
 async def get_cooperation_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取合作统计数据"""
     stats = await crud_cooperation.get_stats(db)
@@ -123,7 +132,11 @@ async def get_cooperation_stats(db: AsyncSession = Depends(get_session)) -> Any:
     ]
 
 
-@router.get("/{cooperation_id}", response_model=CooperationResponse)
+@router.get(
+    "/{cooperation_id}",
+    response_model=CooperationResponse,
+    dependencies=[Depends(conditional_get(Cooperation.__tablename__))],
+)
 async def get_cooperation(
     cooperation_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -166,6 +179,7 @@ async def create_cooperation(
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await crud_cooperation.bump_version()
         
         await audit_log_service.log_action(
             user_id=str(current_user.id),
@@ -6,17 +6,26 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, extract, select
 
+from app.api.deps import conditional_get
+from app.core.serialization import ORJSONResponse
 from app.crud import (
     crud_paper, crud_patent, crud_project, crud_resource,
     crud_software_copyright, crud_competition, crud_conference, crud_cooperation
 )
-from app.db.postgres import get_session
+from app.db.postgres import get_read_session
 from app.schemas.common import StatsResponse
 from app.models.tables import (
     Paper, Patent, Project, Resource, SoftwareCopyright, 
     Competition, Conference, Cooperation
 )
 
+# 仪表盘涉及的全部成果表，任一表变化都会使 ETag 失效
+DASHBOARD_TABLES = (
+    Paper.__tablename__, Patent.__tablename__, Project.__tablename__, Resource.__tablename__,
+    SoftwareCopyright.__tablename__, Competition.__tablename__, Conference.__tablename__,
+    Cooperation.__tablename__,
+)
+
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
@@ -225,8 +234,8 @@ async def get_achievement_stats(db: AsyncSession) -> dict:
     }
 
 
-@router.get("/overview")
-async def get_dashboard_overview(db: AsyncSession = Depends(get_session)) -> Any:
+@router.get("/overview", response_class=ORJSONResponse, dependencies=[Depends(conditional_get(*DASHBOARD_TABLES))])
+async def get_dashboard_overview(db: AsyncSession = Depends(get_read_session)) -> Any:
     """获取仪表盘概览数据"""
     # 获取各模块统计
     paper_stats = await crud_paper.get_stats(db)
@@ -254,11 +263,11 @@ async def get_dashboard_overview(db: AsyncSession = Depends(get_session)) -> Any
     }
 
 
-@router.get("/recent-achievements")
+@router.get("/recent-achievements", response_class=ORJSONResponse, dependencies=[Depends(conditional_get(*DASHBOARD_TABLES))])
 async def get_recent_achievements(
     page: int = 1,
     size: int = 10,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """获取最新成果（支持分页）"""
     achievements = []
@@ -1,6 +1,7 @@
-from typing import Dict
+from typing import Any, Dict
 
 from fastapi import APIRouter
+from sqlalchemy import text
 
 from app.core.config import settings
 from app.db import mongodb, neo4j, postgres, redis
@@ -15,7 +16,7 @@ async def get_health_status() -> Dict[str, Dict[str, str]]:
     if settings.postgres_enabled:
         try:
             async with postgres.engine.begin() as connection:  # type: ignore[union-attr]
-                await connection.execute("SELECT 1")
+                await connection.execute(text("SELECT 1"))
             checks["postgresql"] = {"status": "ok"}
         except Exception as exc:  # pragma: no cover - guarded runtime behaviour
             checks["postgresql"] = {"status": "error", "detail": str(exc)}
@@ -53,3 +54,12 @@ async def get_health_status() -> Dict[str, Dict[str, str]]:
 
     return checks
 
+
+@router.get("/pool", summary="PostgreSQL connection pool statistics for this worker")
+async def get_pool_status() -> Dict[str, Any]:
+    """连接池实时状态：已借出/空闲连接数、溢出连接数、获取连接耗时直方图
+
+    统计按进程计算，多 worker 部署时每个 worker 返回各自的数据；
+    总连接数上限约为 worker 数 ×（pool_size + max_overflow）。
+    """
+    return postgres.get_pool_status()
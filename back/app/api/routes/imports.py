@@ -0,0 +1,78 @@
+from typing import Any, Annotated
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_admin_user
+from app.db.postgres import get_session
+from app.models.tables import User
+from app.schemas.imports import ImportResult
+from app.services.audit_log import audit_log_service
+from app.services.bulk_import import bulk_import_service
+
+router = APIRouter(prefix="/import", tags=["Import"])
+
+
+@router.post("/{entity}", response_model=ImportResult)
+async def import_entities(
+    entity: str,
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_admin_user)],  # 需要管理员权限
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="只校验并预览插入/更新数量，不写入数据"),
+    skip_invalid: bool = Query(False, description="跳过校验失败的行并导入其余行"),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """
+    批量导入成果数据（CSV / XLSX，需要管理员权限）
+    
+    表头使用数据库列名（与 lists/*.csv 一致）。论文按 doi、专利按 patent_number、
+    软件著作权按 registration_number、项目按 project_number 匹配已有记录并更新，
+    其余行插入；存在校验错误且未指定 skip_invalid 时不写入任何数据。
+    """
+    # 与单条创建接口的 resource_type 保持一致，如 papers -> paper
+    resource_type = entity.removesuffix("s")
+    try:
+        result = await bulk_import_service.import_file(
+            db,
+            entity,
+            file,
+            created_by=current_user.id,
+            dry_run=dry_run,
+            skip_invalid=skip_invalid,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        await audit_log_service.log_action(
+            user_id=str(current_user.id),
+            action="import",
+            resource_type=resource_type,
+            status="failed",
+            error_message=str(e),
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent")
+        )
+        raise HTTPException(status_code=500, detail=f"导入失败：{str(e)}")
+
+    if not dry_run:
+        # 整个文件只记录一条汇总日志
+        await audit_log_service.log_action(
+            user_id=str(current_user.id),
+            action="import",
+            resource_type=resource_type,
+            changes={
+                "filename": file.filename,
+                "total_rows": result["total_rows"],
+                "inserted": result["inserted"],
+                "updated": result["updated"],
+                "skipped": result["skipped"],
+            },
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            status="success" if not result["error_count"] or skip_invalid else "failed",
+            error_message=f"{result['error_count']} 行校验失败" if result["error_count"] else None,
+        )
+
+    return result
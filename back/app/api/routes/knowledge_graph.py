@@ -1,34 +1,93 @@
+import re
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.postgres import get_session
+from app.core.serialization import dumps
+from app.db.postgres import get_read_session, get_session
 from app.db.neo4j import get_session as get_neo4j_session
-from app.models.tables import Paper, Project, Patent, Resource, PaperAuthor, Relationship
+from app.models.tables import Paper, PaperProject, Project, Patent, Resource, PaperAuthor, Relationship
 from app.schemas.knowledge_graph import (
     KnowledgeGraphResponse,
     RelationshipAnalysisResponse,
     GraphNode,
     GraphEdge,
+    GraphExpandResponse,
     GraphStats,
     KeyRelationship,
     Domain,
     EntityCreate,
     EntityResponse
 )
+from app.services.author_metrics import author_metrics_service
+from app.services.graph_codec import check_graph_format, columnar_graph_response
+from app.services.response_cache import cached_response, response_cache_service
 
 router = APIRouter(prefix="/knowledge-graph", tags=["Knowledge Graph"])
 
+# Cypher 不支持参数化标签和关系类型，拼接前必须校验
+_CYPHER_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# /graph 预压缩响应缓存键前缀
+GRAPH_CACHE_PREFIX = "knowledge_graph:graph"
+
+
+def _neo4j_id(neo_entity: Any) -> str:
+    """使用 element_id 作为稳定 ID，如果不可用则退回到 id"""
+    raw_id = getattr(neo_entity, "element_id", None) or getattr(neo_entity, "id", None)
+    return str(raw_id)
+
+
+def _to_graph_node(neo_node: Any) -> GraphNode:
+    """将 Neo4j Node 转换为 GraphNode"""
+    # Neo4j Node 对象可以像字典一样访问属性
+    properties = dict(neo_node)
+    node_id = _neo4j_id(neo_node)
+
+    labels = list(getattr(neo_node, "labels", []))
+    node_type = labels[0].lower() if labels else "unknown"
+
+    # 尝试从常见字段中选择一个合适的显示名称
+    label = (
+        properties.get("name")
+        or properties.get("title")
+        or properties.get("label")
+        or node_id
+    )
+
+    # 字段类型已确定，跳过逐字段校验
+    return GraphNode.model_construct(
+        id=node_id,
+        label=str(label),
+        type=node_type,
+        properties=properties,
+    )
+
+
+def _split_identifiers(raw: Optional[str], field: str) -> list[str]:
+    """解析逗号分隔的标签/关系类型列表并校验"""
+    if not raw:
+        return []
+    values = [value.strip() for value in raw.split(",") if value.strip()]
+    for value in values:
+        if not _CYPHER_IDENTIFIER.match(value):
+            raise HTTPException(status_code=400, detail=f"非法的{field}: {value}")
+    return values
+
 
 @router.get("/nodes", response_model=KnowledgeGraphResponse)
 async def get_knowledge_graph_nodes(
+    request: Request,
     type: Optional[str] = Query(None, description="节点类型筛选"),
     limit: int = Query(100, description="返回数量限制"),
-    db: AsyncSession = Depends(get_session),
+    format: str = Query("json", description="返回格式: json, columnar"),
+    encoding: str = Query("json", description="columnar 格式的编码: json, gzip, msgpack"),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """获取知识图谱节点和边数据"""
+    check_graph_format(format)
     
     nodes = []
     edges = []
@@ -96,10 +155,8 @@ async def get_knowledge_graph_nodes(
             }
         ))
     
-    # 获取作者节点（从论文作者表）
-    authors_query = select(PaperAuthor.author_name, func.count(PaperAuthor.paper_id).label("paper_count")).group_by(PaperAuthor.author_name).limit(20)
-    authors_result = await db.execute(authors_query)
-    authors = authors_result.all()
+    # 获取作者节点（读取离线计算的作者指标）
+    authors = await author_metrics_service.get_top_authors(db, limit=20)
     
     for author in authors:
         nodes.append(GraphNode(
@@ -108,35 +165,43 @@ async def get_knowledge_graph_nodes(
             type="author",
             properties={
                 "paper_count": author.paper_count,
-                "h_index": min(author.paper_count, 20)  # 简化的h指数计算
+                "h_index": author.h_index,
+                "pagerank": author.pagerank
             }
         ))
     
-    # 创建关系边
+    # 创建关系边（仅在本次返回的节点之间连边，走索引连接）
+    paper_ids = [paper.id for paper in papers]
+
     # 作者-论文关系
-    author_paper_query = select(PaperAuthor).limit(50)
-    author_paper_result = await db.execute(author_paper_query)
-    author_papers = author_paper_result.scalars().all()
-    
-    for ap in author_papers:
-        edges.append(GraphEdge(
-            source=f"author_{hash(ap.author_name) % 100000}",
-            target=f"paper_{ap.paper_id}",
-            relationship="authored",
-            weight=1.0
-        ))
-    
-    # 项目-论文关系（基于相关项目字段）
-    for paper in papers[:20]:  # 限制数量避免过多边
-        if paper.related_projects:
-            for project in projects[:10]:
-                if str(project.id) in str(paper.related_projects):
-                    edges.append(GraphEdge(
-                        source=f"project_{project.id}",
-                        target=f"paper_{paper.id}",
-                        relationship="produces",
-                        weight=0.8
-                    ))
+    author_names = [author.author_name for author in authors]
+    if paper_ids and author_names:
+        author_paper_query = select(PaperAuthor.author_name, PaperAuthor.paper_id).where(
+            PaperAuthor.paper_id.in_(paper_ids),
+            PaperAuthor.author_name.in_(author_names),
+        ).distinct()
+        for row in (await db.execute(author_paper_query)).all():
+            edges.append(GraphEdge(
+                source=f"author_{hash(row.author_name) % 100000}",
+                target=f"paper_{row.paper_id}",
+                relationship="authored",
+                weight=1.0
+            ))
+
+    # 项目-论文关系（基于 paper_projects 关联表）
+    project_ids = [project.id for project in projects]
+    if paper_ids and project_ids:
+        paper_project_query = select(PaperProject.project_id, PaperProject.paper_id).where(
+            PaperProject.paper_id.in_(paper_ids),
+            PaperProject.project_id.in_(project_ids),
+        )
+        for row in (await db.execute(paper_project_query)).all():
+            edges.append(GraphEdge(
+                source=f"project_{row.project_id}",
+                target=f"paper_{row.paper_id}",
+                relationship="produces",
+                weight=0.8
+            ))
     
     # 统计信息
     stats = GraphStats(
@@ -150,6 +215,11 @@ async def get_knowledge_graph_nodes(
         }
     )
     
+    if format == "columnar":
+        return columnar_graph_response(
+            nodes, edges, stats, encoding=encoding, accept_encoding=request.headers.get("accept-encoding")
+        )
+
     return KnowledgeGraphResponse(
         nodes=nodes,
         edges=edges,
@@ -159,16 +229,46 @@ async def get_knowledge_graph_nodes(
 
 @router.get("/graph", response_model=KnowledgeGraphResponse)
 async def get_knowledge_graph_from_neo4j(
+    request: Request,
     type: Optional[str] = Query(None, description="节点类型（Neo4j标签）筛选"),
     limit: int = Query(200, description="返回节点和关系数量上限"),
+    format: str = Query("json", description="返回格式: json, columnar"),
+    encoding: str = Query("json", description="columnar 格式的编码: json, gzip, msgpack"),
+    include_properties: bool = Query(True, description="columnar 格式是否包含节点属性"),
     session=Depends(get_neo4j_session),
 ) -> Any:
     """从 Neo4j 获取知识图谱节点和边数据。
 
     - 当提供 type 时，会优先匹配具有该标签的节点；
-    - 未提供 type 时，返回混合类型的节点和关系。
+    - 未提供 type 时，返回混合类型的节点和关系；
+    - format=columnar 时返回列式紧凑结构（见 app.services.graph_codec），
+      可配合 encoding=gzip/msgpack 进一步压缩；
+    - format=json 时响应按 type/limit 预压缩缓存，命中时直接返回 br/gzip 字节。
     """
+    check_graph_format(format)
+
+    if format == "columnar":
+        nodes, edges, stats = await _load_neo4j_graph(session, type, limit)
+        return columnar_graph_response(
+            nodes,
+            edges,
+            stats,
+            encoding=encoding,
+            include_properties=include_properties,
+            accept_encoding=request.headers.get("accept-encoding"),
+        )
+
+    async def build() -> bytes:
+        nodes, edges, stats = await _load_neo4j_graph(session, type, limit)
+        return dumps(KnowledgeGraphResponse(nodes=nodes, edges=edges, stats=stats))
 
+    return await cached_response(request, f"{GRAPH_CACHE_PREFIX}:{type or 'all'}:{limit}", build)
+
+
+async def _load_neo4j_graph(
+    session, type: Optional[str], limit: int
+) -> tuple[list[GraphNode], list[GraphEdge], GraphStats]:
+    """从 Neo4j 加载节点和关系，返回 (节点, 边, 统计)"""
     nodes: dict[str, GraphNode] = {}
     edges: list[GraphEdge] = []
 
@@ -191,31 +291,8 @@ async def get_knowledge_graph_from_neo4j(
         # 加载节点
         node_result = await neo_session.run(node_query, type=type, limit=limit)
         async for record in node_result:
-            neo_node = record["n"]
-            # Neo4j Node 对象可以像字典一样访问属性
-            properties = dict(neo_node)
-
-            # 使用 element_id 作为稳定的节点 ID，如果不可用则退回到 id
-            raw_id = getattr(neo_node, "element_id", None) or getattr(neo_node, "id", None)
-            node_id = str(raw_id)
-
-            labels = list(getattr(neo_node, "labels", []))
-            node_type = labels[0].lower() if labels else "unknown"
-
-            # 尝试从常见字段中选择一个合适的显示名称
-            label = (
-                properties.get("name")
-                or properties.get("title")
-                or properties.get("label")
-                or node_id
-            )
-
-            nodes[node_id] = GraphNode(
-                id=node_id,
-                label=str(label),
-                type=node_type,
-                properties=properties,
-            )
+            graph_node = _to_graph_node(record["n"])
+            nodes[graph_node.id] = graph_node
 
         # 加载关系
         edge_result = await neo_session.run(edge_query, type=type, limit=limit)
@@ -224,29 +301,13 @@ async def get_knowledge_graph_from_neo4j(
             target_node = record["target"]
             rel = record["r"]
 
-            source_raw_id = getattr(source_node, "element_id", None) or getattr(source_node, "id", None)
-            target_raw_id = getattr(target_node, "element_id", None) or getattr(target_node, "id", None)
-            source_id = str(source_raw_id)
-            target_id = str(target_raw_id)
+            source_id = _neo4j_id(source_node)
+            target_id = _neo4j_id(target_node)
 
             # 确保关系两端的节点也在节点集合中
             for neo_node, node_id in ((source_node, source_id), (target_node, target_id)):
                 if node_id not in nodes:
-                    props = dict(neo_node)
-                    labels = list(getattr(neo_node, "labels", []))
-                    node_type = labels[0].lower() if labels else "unknown"
-                    label = (
-                        props.get("name")
-                        or props.get("title")
-                        or props.get("label")
-                        or node_id
-                    )
-                    nodes[node_id] = GraphNode(
-                        id=node_id,
-                        label=str(label),
-                        type=node_type,
-                        properties=props,
-                    )
+                    nodes[node_id] = _to_graph_node(neo_node)
 
             relationship_type = getattr(rel, "type", None) or "RELATED_TO"
 
@@ -270,16 +331,95 @@ async def get_knowledge_graph_from_neo4j(
         node_types=node_types,
     )
 
-    return KnowledgeGraphResponse(
+    return list(nodes.values()), edges, stats
+
+
+@router.get("/expand", response_model=GraphExpandResponse)
+async def expand_knowledge_graph_node(
+    node_id: str = Query(..., description="起始节点ID（Neo4j element_id）"),
+    depth: int = Query(1, ge=1, le=3, description="展开跳数"),
+    rel_types: Optional[str] = Query(None, description="关系类型过滤，逗号分隔"),
+    label: Optional[str] = Query(None, description="起始节点标签，提供时按标签匹配"),
+    limit: int = Query(50, ge=1, le=500, description="每页关系数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    seen: Optional[str] = Query(None, description="客户端已加载的节点ID，逗号分隔"),
+    session=Depends(get_neo4j_session),
+) -> Any:
+    """按需展开节点的 k 跳邻域，供前端力导向图增量加载。
+
+    - 起始节点通过 element_id 直接定位，不做全图标签扫描；
+    - 关系按 element_id 排序，使用 cursor 游标分页；
+    - 返回的 nodes 只包含不在 seen 中的节点，edges 为当前页全部关系。
+    """
+    start_labels = _split_identifiers(label, "标签")
+    types = _split_identifiers(rel_types, "关系类型")
+
+    label_clause = "".join(f":`{value}`" for value in start_labels[:1])
+    type_clause = ":" + "|".join(f"`{value}`" for value in types) if types else ""
+
+    # 先沿 depth-1 跳到达边界节点，再取出与之相连的关系，保证每条关系只按 ID 出现一次
+    expand_query = f"""
+    MATCH (start{label_clause})
+    WHERE elementId(start) = $node_id
+    MATCH (start)-[{type_clause}*0..{depth - 1}]-(frontier)-[r{type_clause}]-()
+    WITH DISTINCT r
+    WHERE $cursor IS NULL OR elementId(r) > $cursor
+    RETURN startNode(r) AS source, r, endNode(r) AS target
+    ORDER BY elementId(r)
+    LIMIT $page_size
+    """
+
+    seen_ids = {value.strip() for value in seen.split(",")} if seen else set()
+    nodes: dict[str, GraphNode] = {}
+    edges: list[GraphEdge] = []
+    last_rel_id: Optional[str] = None
+    has_more = False
+
+    async with session as neo_session:
+        result = await neo_session.run(
+            expand_query,
+            node_id=node_id,
+            cursor=cursor,
+            page_size=limit + 1,
+        )
+        async for record in result:
+            if len(edges) >= limit:
+                has_more = True
+                break
+
+            rel = record["r"]
+            source_node = record["source"]
+            target_node = record["target"]
+            source_id = _neo4j_id(source_node)
+            target_id = _neo4j_id(target_node)
+
+            for neo_node, graph_id in ((source_node, source_id), (target_node, target_id)):
+                if graph_id not in seen_ids and graph_id not in nodes:
+                    nodes[graph_id] = _to_graph_node(neo_node)
+
+            edges.append(
+                GraphEdge(
+                    source=source_id,
+                    target=target_id,
+                    relationship=str(getattr(rel, "type", None) or "RELATED_TO"),
+                    weight=1.0,
+                )
+            )
+            last_rel_id = _neo4j_id(rel)
+
+        await result.consume()
+
+    return GraphExpandResponse(
         nodes=list(nodes.values()),
         edges=edges,
-        stats=stats,
+        next_cursor=last_rel_id if has_more else None,
+        has_more=has_more,
     )
 
 
 @router.get("/relationships", response_model=RelationshipAnalysisResponse)
 async def get_relationship_analysis(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """获取关系分析数据"""
     
@@ -389,6 +529,9 @@ async def create_entity(
         if not record:
             raise HTTPException(status_code=500, detail="创建实体失败")
         
+        # 图谱数据已变化，清除预压缩的 /graph 响应缓存
+        await response_cache_service.delete_pattern(f"{GRAPH_CACHE_PREFIX}:*")
+        
         created_node = record["n"]
         node_id = str(getattr(created_node, "element_id", None) or getattr(created_node, "id", None))
         
@@ -1,54 +1,66 @@
 from typing import Any, Annotated, Optional
 from uuid import UUID
 import os
-import shutil
 from pathlib import Path
-from datetime import datetime
-from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import crud_paper
 from app.db.postgres import get_session
-from app.api.deps import get_current_user, get_current_admin_user
-from app.models.tables import User
-from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
+from app.api.batch import add_batch_routes, run_audited
+from app.api.deps import conditional_get, get_current_user, get_current_admin_user, parse_facets
+from app.models.tables import Paper, PaperAuthor, User
+from app.schemas.common import (
+    PaginatedResponse,
+    PaginationParams,
+    StatsResponse,
+)
 from app.schemas.papers import (
     AuthorContribution,
+    PaperBatchUpdate,
     PaperCreate,
+    PaperDetailResponse,
     PaperListItem,
     PaperResponse,
     PaperUpdate,
 )
+from app.core.globals import system_config
 from app.services.audit_log import audit_log_service
+from app.services.file_delivery import file_download_response
+from app.services.file_storage import DOCUMENT_EXTENSIONS, IMAGE_EXTENSIONS, file_storage_service
+from app.services.image_variants import image_variant_service
 
 router = APIRouter(prefix="/papers", tags=["Papers"])
 
 
-@router.get("/", response_model=PaginatedResponse[PaperListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[PaperListItem],
+    dependencies=[Depends(conditional_get(Paper.__tablename__))],
+)
 async def get_papers(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     search: str = Query(None, description="Search in title and abstract"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取论文列表"""
+    facet_names = parse_facets(facets, crud_paper.available_facets)
     filters = {}
     if status:
         filters["status"] = status
 
-    if search:
-        papers = await crud_paper.search(
-            db, query=search, skip=pagination.offset, limit=pagination.size
-        )
-        total = len(papers)  # 简化实现，实际应该单独查询总数
-    else:
-        papers = await crud_paper.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_paper.count(db, filters=filters)
+    papers, total, facet_counts = await crud_paper.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [
         PaperListItem(
@@ -71,10 +83,15 @@ async def get_papers(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(Paper.__tablename__))],
+)
 async def get_paper_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取论文统计数据"""
     stats = await crud_paper.get_stats(db)
@@ -106,7 +123,11 @@ async def get_author_contributions(
     return await crud_paper.get_author_contributions(db, limit=limit)
 
 
-@router.get("/{paper_id}", response_model=PaperResponse)
+@router.get(
+    "/{paper_id}",
+    response_model=PaperResponse,
+    dependencies=[Depends(conditional_get(Paper.__tablename__))],
+)
 async def get_paper(
     paper_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -118,17 +139,21 @@ async def get_paper(
     return paper
 
 
-@router.get("/{paper_id}/detail", response_model=PaperResponse)
+@router.get(
+    "/{paper_id}/detail",
+    response_model=PaperDetailResponse,
+    dependencies=[Depends(conditional_get(Paper.__tablename__, PaperAuthor.__tablename__))],
+)
 async def get_paper_detail(
     paper_id: UUID,
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取论文完整详情（包含图片路径等完整信息）
     
-    此接口用于详情视图，返回完整的论文信息包括图片路径和文件路径。
+    此接口用于详情视图，返回完整的论文信息包括图片路径、文件路径和作者列表。
     与列表接口分离，避免在列表加载时传输大量图片路径信息。
     """
-    paper = await crud_paper.get(db, paper_id)
+    paper = await crud_paper.get_with_authors(db, paper_id)
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
     return paper
@@ -137,12 +162,18 @@ async def get_paper_detail(
 @router.get("/{paper_id}/image")
 async def get_paper_image(
     paper_id: UUID,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=system_config.IMAGE_VARIANT_MAX_DIMENSION, description="缩放后的最大宽度"),
+    h: Optional[int] = Query(None, ge=1, le=system_config.IMAGE_VARIANT_MAX_DIMENSION, description="缩放后的最大高度"),
+    fmt: Optional[str] = Query(None, description="输出格式: webp, jpeg, png"),
+    v: Optional[str] = Query(None, description="原图内容哈希（ETag 值），匹配时允许长期缓存"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取论文图片
     
     根据论文的image_path字段返回图片文件。
-    支持本地文件路径。
+    提供 w/h/fmt 参数时返回缩放/转码后的变体（如列表卡片使用 ?w=320&fmt=webp），
+    变体按原图内容哈希缓存在磁盘上，响应带强 ETag；带 ?v=<内容哈希> 时允许长期缓存。
     """
     paper = await crud_paper.get(db, paper_id)
     if not paper:
@@ -151,59 +182,22 @@ async def get_paper_image(
     if not paper.image_path:
         raise HTTPException(status_code=404, detail="No image attached to this paper")
     
-    # 检查文件是否存在
-    image_path_str = paper.image_path
-    
-    # 处理路径：移除前导斜杠（如果有）
-    if image_path_str.startswith('/'):
-        image_path_str = image_path_str[1:]
-    
-    image_path = Path(image_path_str)
-    
-    # 如果是相对路径，从 back 目录开始
-    if not image_path.is_absolute():
-        back_dir = Path(__file__).parent.parent.parent.parent
-        image_path = back_dir / image_path
-    
-    if not image_path.exists():
-        raise HTTPException(status_code=404, detail=f"Image not found: {image_path}")
-    
-    if not image_path.is_file():
-        raise HTTPException(status_code=400, detail="Invalid image path")
-    
-    # 根据文件扩展名设置正确的media_type
-    ext = image_path.suffix.lower()
-    media_type_map = {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.bmp': 'image/bmp',
-        '.webp': 'image/webp',
-        '.svg': 'image/svg+xml',
-    }
-    media_type = media_type_map.get(ext, 'image/jpeg')
-    
-    # 返回图片文件
-    return FileResponse(
-        path=str(image_path),
-        media_type=media_type,
-        headers={
-            "Cache-Control": "public, max-age=3600"
-        }
+    return await image_variant_service.image_response(
+        request, paper.image_path, width=w, height=h, fmt=fmt, version=v
     )
 
 
-@router.get("/{paper_id}/download")
+@router.api_route("/{paper_id}/download", methods=["GET", "HEAD"])
 async def download_paper_file(
     paper_id: UUID,
+    inline: bool = Query(False, description="是否在浏览器中直接打开（PDF 预览）"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """下载论文文件
     
     根据论文的file_path字段下载对应的PDF或Word文件。
-    支持本地文件路径。
-    自动检测文件类型（PDF或Word）。
+    支持 Range / If-Range（断点续传、浏览器内 PDF 按需加载）和多段 Range；
+    配置 DOWNLOAD_ACCEL_MODE 后由前置 nginx 通过 X-Accel-Redirect 发送文件。
     """
     paper = await crud_paper.get(db, paper_id)
     if not paper:
@@ -212,67 +206,34 @@ async def download_paper_file(
     if not paper.file_path:
         raise HTTPException(status_code=404, detail="No file attached to this paper")
     
-    # 检查文件是否存在
-    file_path_str = paper.file_path
-    
-    # 处理路径：移除前导斜杠（如果有）
-    if file_path_str.startswith('/'):
-        file_path_str = file_path_str[1:]
-    
-    file_path = Path(file_path_str)
-    
-    # 如果是相对路径，从 back 目录开始
-    if not file_path.is_absolute():
-        back_dir = Path(__file__).parent.parent.parent.parent
-        file_path = back_dir / file_path
-    
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
-    
-    if not file_path.is_file():
-        raise HTTPException(status_code=400, detail="Invalid file path")
-    
-    # 获取文件名和扩展名
-    filename = file_path.name
-    extension = file_path.suffix.lower()
-    
-    # 设置适当的media_type
+    extension = Path(paper.file_path).suffix.lower()
     if extension == ".pdf":
-        media_type = "application/pdf"
         file_type = "pdf"
     elif extension in [".doc", ".docx"]:
-        media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         file_type = "word"
     else:
-        # 默认为二进制流
-        media_type = "application/octet-stream"
         file_type = "unknown"
     
-    # 返回文件
-    # 对文件名进行URL编码以支持中文和特殊字符
-    encoded_filename = quote(filename)
-    
-    return FileResponse(
-        path=str(file_path),
-        media_type=media_type,
-        headers={
-            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-            "X-File-Type": file_type
-        }
+    return file_download_response(
+        paper.file_path,
+        headers={"X-File-Type": file_type},
+        inline=inline,
     )
 
 
 @router.post("/upload-file")
 async def upload_paper_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     file_type: str = Query(..., description="文件类型：image 或 document"),
     current_user: Annotated[User, Depends(get_current_admin_user)] = None,
+    db: AsyncSession = Depends(get_session),
 ) -> Any:
     """
     上传论文文件（图片或文档）
     
-    文件会被保存到 uploads/images 或 uploads/documents 文件夹
-    文件名格式：原文件名_时间戳.扩展名
+    文件按内容 SHA-256 存储到 uploads/objects/ab/cd/<哈希>.扩展名，
+    内容相同的文件只保存一份；超过 MAX_FILE_SIZE_MB 时返回 413
     
     返回服务器上的文件相对路径
     """
@@ -281,48 +242,25 @@ async def upload_paper_file(
         if file_type not in ["image", "document"]:
             raise HTTPException(status_code=400, detail="文件类型必须是 image 或 document")
         
-        # 获取文件扩展名
-        file_extension = Path(file.filename).suffix
-        
-        # 验证文件扩展名
-        if file_type == "image":
-            allowed_extensions = [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".svg"]
-            upload_folder = "images"
-        else:  # document
-            allowed_extensions = [".pdf", ".doc", ".docx"]
-            upload_folder = "documents"
-        
-        if file_extension.lower() not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"不支持的文件格式。允许的格式：{', '.join(allowed_extensions)}"
-            )
+        allowed_extensions = IMAGE_EXTENSIONS if file_type == "image" else DOCUMENT_EXTENSIONS
         
-        # 创建上传目录
-        base_upload_dir = Path("uploads") / upload_folder
-        base_upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 生成新文件名：原文件名（不含扩展名）+ 时间戳 + 扩展名
-        original_name = Path(file.filename).stem
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 精确到毫秒
-        new_filename = f"{original_name}_{timestamp}{file_extension}"
-        
-        # 完整文件路径
-        file_path = base_upload_dir / new_filename
-        
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored, deduplicated = await file_storage_service.save_upload(
+            db, file, allowed_extensions=allowed_extensions
+        )
         
-        # 返回相对路径（用于存储到数据库）
-        relative_path = str(file_path).replace("\\", "/")
+        # 响应返回后预生成标准尺寸缩略图
+        if file_type == "image":
+            background_tasks.add_task(image_variant_service.pregenerate, stored.storage_path)
         
         return {
             "success": True,
-            "file_path": relative_path,
+            "file_path": stored.storage_path,
             "original_filename": file.filename,
-            "new_filename": new_filename,
+            "new_filename": Path(stored.storage_path).name,
             "file_type": file_type,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "deduplicated": deduplicated,
             "message": "文件上传成功"
         }
         
@@ -451,43 +389,34 @@ async def delete_paper(
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """删除论文（需要管理员权限）"""
-    # 先获取论文信息用于日志
-    paper_to_delete = await crud_paper.get(db, paper_id)
-    if not paper_to_delete:
-        raise HTTPException(status_code=404, detail="Paper not found")
-    
-    try:
+    async def remove() -> Paper:
+        # DELETE ... RETURNING 返回被删除的论文，用于判断是否存在和记录日志
         paper = await crud_paper.remove(db, id=paper_id)
-        
-        # 记录删除日志
-        await audit_log_service.log_action(
-            user_id=str(current_user.id),
-            action="delete",
-            resource_type="paper",
-            resource_id=str(paper_id),
-            changes={
-                "before": {
-                    "title": paper_to_delete.title,
-                    "status": paper_to_delete.status,
-                    "journal": paper_to_delete.journal
-                }
-            },
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-            status="success"
-        )
-        
-        return {"message": "Paper deleted successfully"}
-    except Exception as e:
-        # 记录失败日志
-        await audit_log_service.log_action(
-            user_id=str(current_user.id),
-            action="delete",
-            resource_type="paper",
-            resource_id=str(paper_id),
-            status="failed",
-            error_message=str(e),
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent")
-        )
-        raise
+        if not paper:
+            raise HTTPException(status_code=404, detail="Paper not found")
+        return paper
+
+    await run_audited(
+        request,
+        current_user,
+        action="delete",
+        resource_type="paper",
+        resource_id=str(paper_id),
+        operation=remove,
+        changes=lambda paper: {
+            "before": {"title": paper.title, "status": paper.status, "journal": paper.journal}
+        },
+    )
+    return {"message": "Paper deleted successfully"}
+
+
+add_batch_routes(
+    router,
+    crud_paper,
+    resource_type="paper",
+    label="论文",
+    create_schema=PaperCreate,
+    batch_update_schema=PaperBatchUpdate,
+    response_schema=PaperResponse,
+    summary_fields=("title", "status"),
+)
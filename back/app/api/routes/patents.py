@@ -1,49 +1,62 @@
 from typing import Any, Annotated
 from uuid import UUID
+from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import crud_patent
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user
-from app.models.tables import User
+from app.api.batch import add_batch_routes, run_audited
+from app.api.deps import conditional_get, get_current_admin_user, parse_facets
+from app.models.tables import Patent, User
 from app.services.audit_log import audit_log_service
-from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
-from app.schemas.patents import PatentCreate, PatentListItem, PatentResponse, PatentUpdate
+from app.services.file_storage import DOCUMENT_EXTENSIONS, IMAGE_EXTENSIONS, file_storage_service
+from app.schemas.common import (
+    PaginatedResponse,
+    PaginationParams,
+    StatsResponse,
+)
+from app.schemas.patents import (
+    PatentBatchUpdate,
+    PatentCreate,
+    PatentListItem,
+    PatentResponse,
+    PatentUpdate,
+)
 
 router = APIRouter(prefix="/patents", tags=["Patents"])
 
 
-@router.get("/", response_model=PaginatedResponse[PatentListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[PatentListItem],
+    dependencies=[Depends(conditional_get(Patent.__tablename__))],
+)
 async def get_patents(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     technology_field: str = Query(None, description="Filter by technology field"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取专利列表"""
+    facet_names = parse_facets(facets, crud_patent.available_facets)
     filters = {}
     if status:
         filters["status"] = status
     if technology_field:
         filters["technology_field"] = technology_field
 
-    # 如果有搜索关键词，优先使用搜索逻辑
-    if search:
-        patents = await crud_patent.search(
-            db,
-            query=search,
-            skip=pagination.offset,
-            limit=pagination.size,
-        )
-        total = len(patents)
-    else:
-        patents = await crud_patent.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_patent.count(db, filters=filters)
+    patents, total, facet_counts = await crud_patent.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [
         PatentListItem(
@@ -65,10 +78,15 @@ async def get_patents(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(Patent.__tablename__))],
+)
 async def get_patent_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取专利统计数据"""
     stats = await crud_patent.get_stats(db)
@@ -90,7 +108,11 @@ async def get_maintenance_reminders(
     return await crud_patent.get_maintenance_reminders(db, days_ahead=days_ahead)
 
 
-@router.get("/{patent_id}", response_model=PatentResponse)
+@router.get(
+    "/{patent_id}",
+    response_model=PatentResponse,
+    dependencies=[Depends(conditional_get(Patent.__tablename__))],
+)
 async def get_patent(
     patent_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -102,6 +124,48 @@ async def get_patent(
     return patent
 
 
+@router.post("/upload-file")
+async def upload_patent_file(
+    file: UploadFile = File(...),
+    file_type: str = Query(..., description="文件类型：image 或 document"),
+    current_user: Annotated[User, Depends(get_current_admin_user)] = None,
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """
+    上传专利文件（图片或文档）
+    
+    与论文、项目共用内容寻址存储，相同内容只保存一份
+    
+    返回服务器上的文件相对路径
+    """
+    try:
+        # 验证文件类型
+        if file_type not in ["image", "document"]:
+            raise HTTPException(status_code=400, detail="文件类型必须是 image 或 document")
+        
+        allowed_extensions = IMAGE_EXTENSIONS if file_type == "image" else DOCUMENT_EXTENSIONS
+        stored, deduplicated = await file_storage_service.save_upload(
+            db, file, allowed_extensions=allowed_extensions
+        )
+        
+        return {
+            "success": True,
+            "file_path": stored.storage_path,
+            "original_filename": file.filename,
+            "new_filename": Path(stored.storage_path).name,
+            "file_type": file_type,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "deduplicated": deduplicated,
+            "message": "文件上传成功"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"文件上传失败：{str(e)}")
+
+
 @router.post("/", response_model=PatentResponse)
 async def create_patent(
     patent_in: PatentCreate,
@@ -187,34 +251,32 @@ async def delete_patent(
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """删除专利（需要管理员权限）"""
-    patent_to_delete = await crud_patent.get(db, patent_id)
-    if not patent_to_delete:
-        raise HTTPException(status_code=404, detail="Patent not found")
-    
-    try:
-        deleted_data = {"name": patent_to_delete.name, "status": patent_to_delete.status}
+    async def remove() -> Patent:
+        # DELETE ... RETURNING 返回被删除的专利，用于判断是否存在和记录日志
         patent = await crud_patent.remove(db, id=patent_id)
-        
-        await audit_log_service.log_action(
-            user_id=str(current_user.id),
-            action="delete",
-            resource_type="patent",
-            resource_id=str(patent_id),
-            changes={"before": deleted_data},
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-            status="success"
-        )
-        return {"message": "Patent deleted successfully"}
-    except Exception as e:
-        await audit_log_service.log_action(
-            user_id=str(current_user.id),
-            action="delete",
-            resource_type="patent",
-            resource_id=str(patent_id),
-            status="failed",
-            error_message=str(e),
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent")
-        )
-        raise
+        if not patent:
+            raise HTTPException(status_code=404, detail="Patent not found")
+        return patent
+
+    await run_audited(
+        request,
+        current_user,
+        action="delete",
+        resource_type="patent",
+        resource_id=str(patent_id),
+        operation=remove,
+        changes=lambda patent: {"before": {"name": patent.name, "status": patent.status}},
+    )
+    return {"message": "Patent deleted successfully"}
+
+
+add_batch_routes(
+    router,
+    crud_patent,
+    resource_type="patent",
+    label="专利",
+    create_schema=PatentCreate,
+    batch_update_schema=PatentBatchUpdate,
+    response_schema=PatentResponse,
+    summary_fields=("name", "patent_number"),
+)
@@ -1,25 +1,27 @@
-from typing import Any, Annotated
+from typing import Any, Annotated, Optional
 from uuid import UUID
-import shutil
 import subprocess
 import psutil
 import os
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import crud_project
+from app.crud import crud_project, unit_of_work
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user, get_current_user
-from app.models.tables import User
+from app.api.deps import conditional_get, get_current_admin_user, get_current_user, parse_facets
+from app.models.tables import Project, ProjectMilestone, User
+from app.core.globals import system_config
 from app.services.audit_log import audit_log_service
+from app.services.file_storage import IMAGE_EXTENSIONS, file_storage_service
+from app.services.image_variants import image_variant_service
 from app.core.config import settings
 from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
 from app.schemas.projects import (
     ProjectCreate,
+    ProjectDetailResponse,
     ProjectListItem,
     ProjectMilestoneResponse,
     ProjectResponse,
@@ -29,16 +31,22 @@ from app.schemas.projects import (
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
-@router.get("/", response_model=PaginatedResponse[ProjectListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[ProjectListItem],
+    dependencies=[Depends(conditional_get(Project.__tablename__))],
+)
 async def get_projects(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     priority: str = Query(None, description="Filter by priority"),
     project_type: str = Query(None, description="Filter by project type"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取项目列表"""
+    facet_names = parse_facets(facets, crud_project.available_facets)
     filters = {}
     if status:
         filters["status"] = status
@@ -47,20 +55,14 @@ async def get_projects(
     if project_type:
         filters["project_type"] = project_type
 
-    # 如果有搜索关键词，优先使用搜索逻辑
-    if search:
-        projects = await crud_project.search(
-            db,
-            query=search,
-            skip=pagination.offset,
-            limit=pagination.size,
-        )
-        total = len(projects)
-    else:
-        projects = await crud_project.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_project.count(db, filters=filters)
+    projects, total, facet_counts = await crud_project.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [
         ProjectListItem(
@@ -85,10 +87,15 @@ async def get_projects(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(Project.__tablename__))],
+)
 async def get_project_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取项目统计数据"""
     stats = await crud_project.get_stats(db)
@@ -119,7 +126,11 @@ async def get_project_milestones(
     )
 
 
-@router.get("/{project_id}", response_model=ProjectResponse)
+@router.get(
+    "/{project_id}",
+    response_model=ProjectResponse,
+    dependencies=[Depends(conditional_get(Project.__tablename__))],
+)
 async def get_project(
     project_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -131,16 +142,20 @@ async def get_project(
     return project
 
 
-@router.get("/{project_id}/detail", response_model=ProjectResponse)
+@router.get(
+    "/{project_id}/detail",
+    response_model=ProjectDetailResponse,
+    dependencies=[Depends(conditional_get(Project.__tablename__, ProjectMilestone.__tablename__))],
+)
 async def get_project_detail(
     project_id: UUID,
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """
-    获取项目完整详情（包含图片路径等）
+    获取项目完整详情（包含图片路径、里程碑等）
     用于详情视图，按需加载
     """
-    project = await crud_project.get(db, project_id)
+    project = await crud_project.get_with_milestones(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
@@ -149,11 +164,18 @@ async def get_project_detail(
 @router.get("/{project_id}/image")
 async def get_project_image(
     project_id: UUID,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=system_config.IMAGE_VARIANT_MAX_DIMENSION, description="缩放后的最大宽度"),
+    h: Optional[int] = Query(None, ge=1, le=system_config.IMAGE_VARIANT_MAX_DIMENSION, description="缩放后的最大高度"),
+    fmt: Optional[str] = Query(None, description="输出格式: webp, jpeg, png"),
+    v: Optional[str] = Query(None, description="原图内容哈希（ETag 值），匹配时允许长期缓存"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """
     获取项目图片
     支持相对路径（uploads文件夹）和绝对路径
+    提供 w/h/fmt 参数时返回缩放/转码后的变体（如列表卡片使用 ?w=320&fmt=webp），
+    变体按原图内容哈希缓存在磁盘上，响应带强 ETag；带 ?v=<内容哈希> 时允许长期缓存
     """
     project = await crud_project.get(db, project_id)
     if not project:
@@ -162,62 +184,24 @@ async def get_project_image(
     if not project.image_path:
         raise HTTPException(status_code=404, detail="No image attached to this project")
     
-    # 检查文件是否存在
-    image_path_str = project.image_path
-    
-    # 处理路径：移除前导斜杠（如果有）
-    if image_path_str.startswith('/'):
-        image_path_str = image_path_str[1:]
-    
-    image_path = Path(image_path_str)
-    
-    # 如果是相对路径，从当前文件所在目录的父目录开始（即back目录）
-    if not image_path.is_absolute():
-        # 获取back目录的路径（当前文件在back/app/api/routes/，需要4个parent）
-        back_dir = Path(__file__).parent.parent.parent.parent
-        image_path = back_dir / image_path
-    
-    # 空行保持代码间距
-    
-    if not image_path.exists():
-        raise HTTPException(status_code=404, detail=f"Image not found: {image_path}")
-    
-    if not image_path.is_file():
-        raise HTTPException(status_code=400, detail="Invalid image path")
-    
-    # 根据文件扩展名设置正确的media_type
-    ext = image_path.suffix.lower()
-    media_type_map = {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.bmp': 'image/bmp',
-        '.webp': 'image/webp',
-        '.svg': 'image/svg+xml',
-    }
-    media_type = media_type_map.get(ext, 'image/jpeg')
-    
-    return FileResponse(
-        path=str(image_path),
-        media_type=media_type,
-        headers={
-            "Cache-Control": "public, max-age=3600"
-        }
+    return await image_variant_service.image_response(
+        request, project.image_path, width=w, height=h, fmt=fmt, version=v
     )
 
 
 @router.post("/upload-file")
 async def upload_project_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     file_type: str = Query(..., description="文件类型：image"),
     current_user: Annotated[User, Depends(get_current_admin_user)] = None,
+    db: AsyncSession = Depends(get_session),
 ) -> Any:
     """
     上传项目文件（图片）
     
-    文件会被保存到 uploads/images 文件夹
-    文件名格式：原文件名_时间戳.扩展名
+    文件按内容 SHA-256 存储到 uploads/objects/ab/cd/<哈希>.扩展名，
+    内容相同的文件只保存一份；超过 MAX_FILE_SIZE_MB 时返回 413
     
     返回服务器上的文件相对路径
     """
@@ -226,43 +210,24 @@ async def upload_project_file(
         if file_type != "image":
             raise HTTPException(status_code=400, detail="文件类型必须是 image")
         
-        # 获取文件扩展名
-        file_extension = Path(file.filename).suffix
-        
-        # 验证文件扩展名
-        allowed_extensions = [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".svg"]
-        
-        if file_extension.lower() not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"不支持的文件格式。允许的格式：{', '.join(allowed_extensions)}"
-            )
+        allowed_extensions = IMAGE_EXTENSIONS
         
-        # 创建上传目录
-        base_upload_dir = Path("uploads") / "images"
-        base_upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 生成新文件名：原文件名（不含扩展名）+ 时间戳 + 扩展名
-        original_name = Path(file.filename).stem
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 精确到毫秒
-        new_filename = f"{original_name}_{timestamp}{file_extension}"
-        
-        # 完整文件路径
-        file_path = base_upload_dir / new_filename
-        
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored, deduplicated = await file_storage_service.save_upload(
+            db, file, allowed_extensions=allowed_extensions
+        )
         
-        # 返回相对路径（用于存储到数据库）
-        relative_path = str(file_path).replace("\\", "/")
+        # 响应返回后预生成标准尺寸缩略图
+        background_tasks.add_task(image_variant_service.pregenerate, stored.storage_path)
         
         return {
             "success": True,
-            "file_path": relative_path,
+            "file_path": stored.storage_path,
             "original_filename": file.filename,
-            "new_filename": new_filename,
+            "new_filename": Path(stored.storage_path).name,
             "file_type": file_type,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "deduplicated": deduplicated,
             "message": "文件上传成功"
         }
         
@@ -400,15 +365,14 @@ async def delete_project(
         
         # 删除相关的里程碑记录
         from sqlalchemy import delete, select
-        from app.models.tables import ProjectMilestone
         
-        # 先删除项目里程碑
-        delete_milestones_stmt = delete(ProjectMilestone).where(ProjectMilestone.project_id == project_id)
-        await db.execute(delete_milestones_stmt)
-        await db.commit()
-        
-        # 然后删除项目
-        deleted_project = await crud_project.remove(db, id=project_id)
+        # 里程碑和项目在同一事务中删除
+        async with unit_of_work(db) as uow:
+            delete_milestones_stmt = delete(ProjectMilestone).where(ProjectMilestone.project_id == project_id)
+            await db.execute(delete_milestones_stmt)
+            uow.mark_changed(ProjectMilestone.__tablename__)
+            
+            deleted_project = await crud_project.remove(db, id=project_id)
         
         # 记录日志
         await audit_log_service.log_action(
@@ -873,30 +837,33 @@ async def get_pending_startup_requests(
     获取待审批的项目启动请求列表（仅管理员）
     """
     from sqlalchemy import select
-    from app.models.tables import ProjectStartupRequest, Project
+    from sqlalchemy.orm import joinedload
+    from app.models.tables import ProjectStartupRequest
     from app.schemas.startup_requests import StartupRequestResponse
     
-    # 查询所有待审批的启动请求
+    # 查询所有待审批的启动请求（项目和请求人随同一条查询连接加载）
     stmt = (
-        select(ProjectStartupRequest, Project, User)
-        .join(Project, ProjectStartupRequest.project_id == Project.id)
-        .join(User, ProjectStartupRequest.requester_id == User.id)
+        select(ProjectStartupRequest)
+        .options(
+            joinedload(ProjectStartupRequest.project, innerjoin=True),
+            joinedload(ProjectStartupRequest.requester, innerjoin=True),
+        )
         .where(ProjectStartupRequest.status == "pending")
         .order_by(ProjectStartupRequest.created_at.desc())
     )
     
     result = await db.execute(stmt)
-    rows = result.all()
+    startup_requests = result.scalars().all()
     
     # 构建响应
     requests = []
-    for startup_request, project, requester in rows:
+    for startup_request in startup_requests:
         requests.append({
             "id": str(startup_request.id),
             "project_id": str(startup_request.project_id),
-            "project_name": project.name,
+            "project_name": startup_request.project.name,
             "requester_id": str(startup_request.requester_id),
-            "requester_name": requester.username,
+            "requester_name": startup_request.requester.username,
             "request_reason": startup_request.request_reason,
             "status": startup_request.status,
             "created_at": startup_request.created_at.isoformat(),
@@ -1141,7 +1108,8 @@ async def get_startup_requests_history(
     获取历史审批记录（仅管理员）
     """
     from sqlalchemy import select, or_
-    from app.models.tables import ProjectStartupRequest, Project
+    from sqlalchemy.orm import joinedload, selectinload
+    from app.models.tables import ProjectStartupRequest
     
     # 构建查询条件
     conditions = []
@@ -1154,40 +1122,35 @@ async def get_startup_requests_history(
             ProjectStartupRequest.status == "rejected"
         ))
     
-    # 查询历史记录
+    # 查询历史记录：项目和请求人连接加载，审批人再用一条 IN 查询批量加载
     stmt = (
-        select(ProjectStartupRequest, Project, User)
-        .join(Project, ProjectStartupRequest.project_id == Project.id)
-        .join(User, ProjectStartupRequest.requester_id == User.id)
+        select(ProjectStartupRequest)
+        .options(
+            joinedload(ProjectStartupRequest.project, innerjoin=True),
+            joinedload(ProjectStartupRequest.requester, innerjoin=True),
+            selectinload(ProjectStartupRequest.approver),
+        )
         .where(*conditions)
         .order_by(ProjectStartupRequest.updated_at.desc())
         .limit(limit)
     )
     
     result = await db.execute(stmt)
-    rows = result.all()
+    startup_requests = result.scalars().all()
     
     # 构建响应
     requests = []
-    for startup_request, project, requester in rows:
-        # 获取审批人信息
-        approver_name = None
-        if startup_request.approver_id:
-            from sqlalchemy import select as sql_select
-            approver_stmt = sql_select(User).where(User.id == startup_request.approver_id)
-            approver_result = await db.execute(approver_stmt)
-            approver = approver_result.scalars().first()
-            if approver:
-                approver_name = approver.username
+    for startup_request in startup_requests:
+        approver = startup_request.approver
         
         requests.append({
             "id": str(startup_request.id),
             "project_id": str(startup_request.project_id),
-            "project_name": project.name,
+            "project_name": startup_request.project.name,
             "requester_id": str(startup_request.requester_id),
-            "requester_name": requester.username,
+            "requester_name": startup_request.requester.username,
             "approver_id": str(startup_request.approver_id) if startup_request.approver_id else None,
-            "approver_name": approver_name,
+            "approver_name": approver.username if approver else None,
             "request_reason": startup_request.request_reason,
             "reject_reason": startup_request.reject_reason,
             "status": startup_request.status,
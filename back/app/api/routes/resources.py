@@ -2,15 +2,22 @@ from typing import Any, Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import crud_resource
+from app.crud import UnitOfWork, crud_resource, unit_of_work
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user
-from app.models.tables import User
+from app.api.batch import add_batch_routes, run_audited
+from app.api.deps import conditional_get, get_current_admin_user, parse_facets
+from app.models.tables import Resource, ResourceAchievement, ResourceUsageLog, User
 from app.services.audit_log import audit_log_service
-from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
+from app.schemas.common import (
+    PaginatedResponse,
+    PaginationParams,
+    StatsResponse,
+)
 from app.schemas.resources import (
+    ResourceBatchUpdate,
     ResourceCreate,
     ResourceListItem,
     ResourceResponse,
@@ -21,35 +28,35 @@ from app.schemas.resources import (
 router = APIRouter(prefix="/resources", tags=["Resources"])
 
 
-@router.get("/", response_model=PaginatedResponse[ResourceListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[ResourceListItem],
+    dependencies=[Depends(conditional_get(Resource.__tablename__))],
+)
 async def get_resources(
     pagination: PaginationParams = Depends(),
     resource_type: str = Query(None, description="Filter by resource type"),
     is_public: bool = Query(None, description="Filter by public/private"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取资源列表"""
+    facet_names = parse_facets(facets, crud_resource.available_facets)
     filters = {}
     if resource_type:
         filters["resource_type"] = resource_type
     if is_public is not None:
         filters["is_public"] = is_public
 
-    # 如果有搜索关键词，优先使用搜索逻辑
-    if search:
-        resources = await crud_resource.search(
-            db,
-            query=search,
-            skip=pagination.offset,
-            limit=pagination.size,
-        )
-        total = len(resources)
-    else:
-        resources = await crud_resource.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_resource.count(db, filters=filters)
+    resources, total, facet_counts = await crud_resource.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [
         ResourceListItem(
@@ -72,10 +79,14 @@ async def get_resources(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats")
+@router.get(
+    "/stats",
+    dependencies=[Depends(conditional_get(Resource.__tablename__))],
+)
 async def get_resource_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取资源统计数据"""
     stats = await crud_resource.get_stats(db)
@@ -122,7 +133,11 @@ async def download_resource(
     return {"message": "Download count updated"}
 
 
-@router.get("/{resource_id}", response_model=ResourceResponse)
+@router.get(
+    "/{resource_id}",
+    response_model=ResourceResponse,
+    dependencies=[Depends(conditional_get(Resource.__tablename__))],
+)
 async def get_resource(
     resource_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -217,6 +232,13 @@ async def update_resource(
         raise
 
 
+async def delete_resource_links(db: AsyncSession, uow: UnitOfWork, resource_ids: list[UUID]) -> None:
+    """删除资源前清理关联的成果记录和使用日志（与删除资源在同一事务中）"""
+    await db.execute(delete(ResourceAchievement).where(ResourceAchievement.resource_id.in_(resource_ids)))
+    await db.execute(delete(ResourceUsageLog).where(ResourceUsageLog.resource_id.in_(resource_ids)))
+    uow.mark_changed(ResourceAchievement.__tablename__, ResourceUsageLog.__tablename__)
+
+
 @router.delete("/{resource_id}")
 async def delete_resource(
     resource_id: UUID,
@@ -224,53 +246,36 @@ async def delete_resource(
     current_user: Annotated[User, Depends(get_current_admin_user)],
     db: AsyncSession = Depends(get_session),
 ) -> Any:
-    """删除资源"""
-    # 首先检查资源是否存在
-    resource = await crud_resource.get(db, resource_id)
-    if not resource:
-        raise HTTPException(status_code=404, detail="Resource not found")
-    
-    try:
-        # 保存删除前数据
-        deleted_data = {"name": resource.name, "resource_type": resource.resource_type}
-        
-        # 删除相关的资源记录
-        from sqlalchemy import delete
-        from app.models.tables import ResourceAchievement, ResourceUsageLog
-        
-        # 先删除资源成果记录
-        delete_achievements_stmt = delete(ResourceAchievement).where(ResourceAchievement.resource_id == resource_id)
-        await db.execute(delete_achievements_stmt)
-        
-        # 删除资源使用日志记录
-        delete_usage_logs_stmt = delete(ResourceUsageLog).where(ResourceUsageLog.resource_id == resource_id)
-        await db.execute(delete_usage_logs_stmt)
-        
-        # 然后删除资源
-        resource = await crud_resource.remove(db, id=resource_id)
-        
-        # 记录日志
-        await audit_log_service.log_action(
-            user_id=str(current_user.id),
-            action="delete",
-            resource_type="resource",
-            resource_id=str(resource_id),
-            changes={"before": deleted_data},
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-            status="success"
-        )
-        
-        return {"message": "Resource and related achievements deleted successfully"}
-    except Exception as e:
-        await audit_log_service.log_action(
-            user_id=str(current_user.id),
-            action="delete",
-            resource_type="resource",
-            resource_id=str(resource_id),
-            status="failed",
-            error_message=str(e),
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent")
-        )
-        raise
+    """删除资源及其关联的成果记录和使用日志"""
+    async def remove() -> Resource:
+        async with unit_of_work(db) as uow:
+            await delete_resource_links(db, uow, [resource_id])
+            # DELETE ... RETURNING 返回被删除的资源，不存在时整个事务回滚
+            resource = await crud_resource.remove(db, id=resource_id)
+            if not resource:
+                raise HTTPException(status_code=404, detail="Resource not found")
+        return resource
+
+    await run_audited(
+        request,
+        current_user,
+        action="delete",
+        resource_type="resource",
+        resource_id=str(resource_id),
+        operation=remove,
+        changes=lambda resource: {"before": {"name": resource.name, "resource_type": resource.resource_type}},
+    )
+    return {"message": "Resource and related achievements deleted successfully"}
+
+
+add_batch_routes(
+    router,
+    crud_resource,
+    resource_type="resource",
+    label="资源",
+    create_schema=ResourceCreate,
+    batch_update_schema=ResourceBatchUpdate,
+    response_schema=ResourceResponse,
+    summary_fields=("name", "resource_type"),
+    before_delete=delete_resource_links,
+)
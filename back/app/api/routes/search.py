@@ -1,19 +1,31 @@
 import time
 from typing import Any, List
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.globals import system_config
 from app.crud.papers import crud_paper
 from app.crud.projects import crud_project
 from app.crud.patents import crud_patent
 from app.crud.resources import crud_resource
-from app.db.postgres import get_session
-from app.api.deps import get_current_user
+from app.db.postgres import get_read_session, get_session
+from app.api.deps import get_current_admin_user, get_current_user
 from app.models.tables import User
 from app.schemas.common import PaginationParams
-from app.schemas.search import SearchResponse, SearchResult
+from app.schemas.search import (
+    SavedViewCreate,
+    SavedViewResponse,
+    SavedViewResultsResponse,
+    SavedViewUpdate,
+    SearchResponse,
+    SearchResult,
+    TypeaheadResponse,
+)
+from app.services.saved_views import saved_view_service
 from app.services.search_history import search_history_service
+from app.services.typeahead import typeahead_service
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
@@ -24,13 +36,13 @@ async def global_search(
     type: str = Query("all", description="搜索类型: papers|projects|patents|resources|all"),
     pagination: PaginationParams = Depends(),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ) -> Any:
     """全局搜索功能"""
     start_time = time.time()
     
-    # 记录搜索历史到Redis
-    await search_history_service.record_search(
+    # 记录搜索历史（写入进程内缓冲，由后台任务批量写回Redis）
+    search_history_service.record_search(
         user_id=str(current_user.id),
         keyword=q,
         category=type if type != "all" else None
@@ -189,9 +201,33 @@ async def get_search_suggestions(
     }
 
 
+@router.get("/typeahead", response_model=TypeaheadResponse)
+async def typeahead(
+    q: str = Query(..., min_length=1, max_length=200, description="输入中的标题片段"),
+    limit: int = Query(10, ge=1, le=50, description="返回数量限制"),
+) -> Any:
+    """论文、专利、项目标题输入联想（进程内索引，不访问数据库）"""
+    start_time = time.perf_counter()
+    items = typeahead_service.search(q, limit)
+    return {
+        "query": q,
+        "items": items,
+        "ready": typeahead_service.ready,
+        "took_ms": round((time.perf_counter() - start_time) * 1000, 3),
+    }
+
+
+@router.get("/typeahead/stats")
+async def typeahead_stats(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """标题联想索引的规模和内存占用（当前 worker）"""
+    return typeahead_service.stats()
+
+
 @router.get("/trending")
 async def get_trending_searches(
-    hours: int = Query(24, description="最近多少小时"),
+    hours: int = Query(24, ge=1, le=system_config.SEARCH_TRENDING_MAX_HOURS, description="最近多少小时"),
     limit: int = Query(10, description="返回数量限制"),
 ) -> Any:
     """获取趋势搜索（最近N小时的热搜）"""
@@ -207,3 +243,86 @@ async def get_trending_searches(
         ],
         "count": len(trending)
     }
+
+
+@router.get("/views", response_model=list[SavedViewResponse])
+async def list_saved_views(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """获取当前用户保存的搜索视图"""
+    return await saved_view_service.list_views(db, current_user.id)
+
+
+@router.post("/views", response_model=SavedViewResponse)
+async def create_saved_view(
+    view_in: SavedViewCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """保存搜索视图（同时物化结果快照）"""
+    return await saved_view_service.create_view(
+        db,
+        current_user.id,
+        name=view_in.name,
+        target=view_in.target,
+        keyword=view_in.keyword,
+        filters=view_in.filters,
+        description=view_in.description,
+    )
+
+
+@router.get("/views/{view_id}", response_model=SavedViewResponse)
+async def get_saved_view(
+    view_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """获取搜索视图详情"""
+    return await saved_view_service.get_view(db, view_id, current_user.id)
+
+
+@router.put("/views/{view_id}", response_model=SavedViewResponse)
+async def update_saved_view(
+    view_id: UUID,
+    view_in: SavedViewUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """修改搜索视图（筛选条件或关键词变化时重建快照）"""
+    view = await saved_view_service.get_view(db, view_id, current_user.id, for_update=True)
+    return await saved_view_service.update_view(db, view, view_in.model_dump(exclude_unset=True))
+
+
+@router.delete("/views/{view_id}")
+async def delete_saved_view(
+    view_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """删除搜索视图"""
+    view = await saved_view_service.get_view(db, view_id, current_user.id)
+    await saved_view_service.delete_view(db, view)
+    return {"message": "搜索视图已删除"}
+
+
+@router.get("/views/{view_id}/results", response_model=SavedViewResultsResponse)
+async def get_saved_view_results(
+    view_id: UUID,
+    cursor: str = Query(None, description="上一页返回的 next_cursor"),
+    size: int = Query(20, ge=1, le=100, description="每页数量"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> Any:
+    """打开搜索视图：增量刷新结果快照后按键集分页返回"""
+    start_time = time.perf_counter()
+    view = await saved_view_service.get_view(db, view_id, current_user.id, for_update=True)
+    reevaluated = await saved_view_service.refresh(db, view)
+    items, next_cursor = await saved_view_service.get_results(db, view, cursor=cursor, size=size)
+    return {
+        "items": items,
+        "total": view.result_count,
+        "next_cursor": next_cursor,
+        "reevaluated": reevaluated,
+        "took_ms": round((time.perf_counter() - start_time) * 1000, 3),
+    }
@@ -6,8 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.software_copyrights import crud_software_copyright
 from app.db.postgres import get_session
-from app.api.deps import get_current_admin_user
-from app.models.tables import User
+from app.api.deps import conditional_get, get_current_admin_user, parse_facets
+from app.models.tables import SoftwareCopyright, User
 from app.services.audit_log import audit_log_service
 from app.schemas.common import PaginatedResponse, PaginationParams, StatsResponse
 from app.schemas.software_copyrights import (
@@ -45,14 +45,20 @@ def map_software_copyright_to_response(sc) -> dict:
     }
 
 
-@router.get("/", response_model=PaginatedResponse[SoftwareCopyrightListItem])
+@router.get(
+    "/",
+    response_model=PaginatedResponse[SoftwareCopyrightListItem],
+    dependencies=[Depends(conditional_get(SoftwareCopyright.__tablename__))],
+)
 async def get_software_copyrights(
     pagination: PaginationParams = Depends(),
     status: str = Query(None, description="Filter by status"),
     search: str = Query(None, description="Search keyword"),
+    facets: str = Query(None, description="Comma-separated facets to count, e.g. status,year"),
     db: AsyncSession = Depends(get_session),
 ) -> Any:
     """获取软著列表"""
+    facet_names = parse_facets(facets, crud_software_copyright.available_facets)
     filters = {}
     if status:
         # 状态映射
@@ -63,16 +69,14 @@ async def get_software_copyrights(
         }
         filters["status"] = status_map.get(status, status)
 
-    if search:
-        software_copyrights = await crud_software_copyright.search(
-            db, query=search, skip=pagination.offset, limit=pagination.size
-        )
-        total = len(software_copyrights)
-    else:
-        software_copyrights = await crud_software_copyright.get_multi(
-            db, skip=pagination.offset, limit=pagination.size, filters=filters
-        )
-        total = await crud_software_copyright.count(db, filters=filters)
+    software_copyrights, total, facet_counts = await crud_software_copyright.get_page(
+        db,
+        skip=pagination.offset,
+        limit=pagination.size,
+        filters=filters,
+        search=search,
+        facets=facet_names,
+    )
 
     items = [SoftwareCopyrightListItem(**map_software_copyright_to_response(sc)) for sc in software_copyrights]
 
@@ -82,10 +86,15 @@ async def get_software_copyrights(
         page=pagination.page,
         size=pagination.size,
         pages=(total + pagination.size - 1) // pagination.size,
+        facets=facet_counts,
     )
 
 
-@router.get("/stats", response_model=list[StatsResponse])
+@router.get(
+    "/stats",
+    response_model=list[StatsResponse],
+    dependencies=[Depends(conditional_get(SoftwareCopyright.__tablename__))],
+)
 async def get_software_copyright_stats(db: AsyncSession = Depends(get_session)) -> Any:
     """获取软著统计数据"""
     stats = await crud_software_copyright.get_stats(db)
@@ -98,7 +107,11 @@ async def get_software_copyright_stats(db: AsyncSession = Depends(get_session))
     ]
 
 
-@router.get("/{software_copyright_id}", response_model=SoftwareCopyrightResponse)
+@router.get(
+    "/{software_copyright_id}",
+    response_model=SoftwareCopyrightResponse,
+    dependencies=[Depends(conditional_get(SoftwareCopyright.__tablename__))],
+)
 async def get_software_copyright(
     software_copyright_id: UUID,
     db: AsyncSession = Depends(get_session),
@@ -140,6 +153,7 @@ async def create_software_copyright(
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await crud_software_copyright.bump_version()
         
         # 记录日志
         await audit_log_service.log_action(
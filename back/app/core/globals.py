@@ -34,6 +34,7 @@ class FeatureFlags:
     ENABLE_API_RATE_LIMITING: bool = True
     ENABLE_API_CACHING: bool = True
     ENABLE_API_DOCUMENTATION: bool = True
+    ENABLE_RESPONSE_COMPRESSION: bool = True
     
     # Database Features
     ENABLE_DATABASE_LOGGING: bool = False
@@ -70,6 +71,7 @@ class SystemConfig:
     
     # File Upload Settings
     MAX_FILE_SIZE_MB: int = 50
+    UPLOAD_OBJECT_DIR: str = "uploads/objects"  # content-addressed store, relative to back/
     ALLOWED_FILE_EXTENSIONS: tuple = (
         '.pdf', '.doc', '.docx', '.txt', '.md',
         '.jpg', '.jpeg', '.png', '.gif',
@@ -77,6 +79,24 @@ class SystemConfig:
         '.zip', '.rar', '.7z'
     )
     
+    # Image Variant Settings
+    IMAGE_VARIANT_CACHE_DIR: str = "uploads/cache/variants"
+    IMAGE_VARIANT_WORKERS: int = 2
+    IMAGE_VARIANT_MAX_DIMENSION: int = 2048
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_STANDARD_WIDTHS: tuple = (320, 640, 1280)
+    IMAGE_CACHE_MAX_AGE: int = 86400 * 7  # 7 days, only for ?v=<content hash> URLs; others use no-cache + ETag
+    
+    # Download Settings
+    # None: app streams the file itself (Range supported);
+    # "nginx": X-Accel-Redirect to DOWNLOAD_ACCEL_PREFIX; "sendfile": X-Sendfile (Apache/lighttpd)
+    DOWNLOAD_ACCEL_MODE: Optional[str] = None
+    DOWNLOAD_ACCEL_PREFIX: str = "/protected"  # nginx internal location mapped to back/
+    
+    # Resource Counter Settings
+    RESOURCE_COUNTER_FLUSH_SECONDS: int = 60  # write-behind interval for download counts
+    RESOURCE_USAGE_WINDOW_DAYS: int = 30  # usage_rate = active days in window / window
+    
     # Pagination Settings
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
@@ -88,10 +108,32 @@ class SystemConfig:
     # Search Settings
     SEARCH_RESULTS_LIMIT: int = 1000
     SEARCH_TIMEOUT_SECONDS: int = 30
+    SEARCH_HISTORY_FLUSH_SECONDS: float = 1.0  # search history is buffered in-process between flushes
+    SEARCH_HISTORY_BUFFER_SIZE: int = 1000  # flush early once this many searches are buffered
+    SEARCH_SUGGEST_MAX_KEYWORDS: int = 100000  # lowest decayed-score keywords are evicted from the prefix index
+    SEARCH_SUGGEST_HALF_LIFE_DAYS: float = 30  # suggestion scores halve this often, so new keywords can outrank stale ones
+    SEARCH_SUGGEST_CANDIDATES: int = 100  # prefix matches fetched per request before ranking by count
+    SEARCH_TRENDING_MAX_HOURS: int = 168  # hourly trending buckets are kept for this long
+    SEARCH_TRENDING_BUCKET_SIZE: int = 1000  # keywords kept per hourly bucket
+    SEARCH_TRENDING_CACHE_SECONDS: int = 60  # merged trending windows are cached this long
+    SEARCH_TRENDING_HALF_LIFE_HOURS: float = 0  # > 0 weights older buckets by 0.5 ** (age / half-life)
+    SEARCH_TYPEAHEAD_REFRESH_SECONDS: int = 5  # per-worker title index polls table versions this often
+    SEARCH_TYPEAHEAD_KEY_LENGTH: int = 32  # index keys are truncated; longer queries are re-checked
+    SEARCH_TYPEAHEAD_WORD_KEYS: int = 8  # extra keys per title for word starts
+    SEARCH_TYPEAHEAD_CANDIDATES: int = 200  # prefix matches ranked per request
+    SEARCH_TYPEAHEAD_FETCH_SIZE: int = 5000  # rows per fetch while streaming titles
+    SEARCH_SAVED_VIEW_MAX_PER_USER: int = 50  # saved search views each user may keep
     
     # Export Settings
     EXPORT_BATCH_SIZE: int = 1000
     EXPORT_TIMEOUT_MINUTES: int = 30
+    
+    # Import Settings
+    IMPORT_BATCH_SIZE: int = 5000  # rows per COPY into the staging table
+    IMPORT_MAX_ERRORS: int = 100  # row errors reported back to the client
+    
+    # Batch Write Settings
+    BATCH_MAX_ITEMS: int = 500  # max records per /batch request
 
 
 # =============================================================================
@@ -105,21 +147,36 @@ class DatabaseConfig:
     POSTGRES_POOL_SIZE: int = 10
     POSTGRES_MAX_OVERFLOW: int = 20
     POSTGRES_POOL_TIMEOUT: int = 30
+    POSTGRES_POOL_RECYCLE: int = 1800  # seconds; recycle before server/proxy idle timeouts
+    POSTGRES_POOL_PRE_PING: bool = True
+    # asyncpg prepared statement cache per connection; set to 0 behind pgbouncer
+    # in transaction pooling mode, which cannot keep prepared statements
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 500
+    
+    # Read Replica Settings
+    POSTGRES_REPLICA_MAX_LAG_SECONDS: float = 5.0  # fall back to primary beyond this lag
+    POSTGRES_REPLICA_CHECK_INTERVAL: int = 5  # seconds between replica lag checks
+    POSTGRES_REPLICA_CHECK_TIMEOUT: float = 1.0
+    POSTGRES_STICKY_PRIMARY_SECONDS: int = 10  # read-your-writes window after a commit
     
     # MongoDB Settings
     MONGO_MAX_POOL_SIZE: int = 100
     MONGO_MIN_POOL_SIZE: int = 10
     MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_MAX_IDLE_TIME_MS: int = 300000  # close pooled connections idle longer than this
     
     # Redis Settings
-    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_MAX_CONNECTIONS: int = 50  # per client; requests wait for a free connection beyond this
     REDIS_SOCKET_TIMEOUT: int = 5
     REDIS_SOCKET_CONNECT_TIMEOUT: int = 5
+    REDIS_MIN_IDLE_CONNECTIONS: int = 5  # connections opened at startup so first requests skip the handshake
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds; PING idle connections before reuse
     
     # Neo4j Settings
     NEO4J_MAX_CONNECTION_LIFETIME: int = 3600
     NEO4J_MAX_CONNECTION_POOL_SIZE: int = 100
     NEO4J_CONNECTION_ACQUISITION_TIMEOUT: int = 60
+    NEO4J_MIN_IDLE_CONNECTIONS: int = 2  # connections opened at startup
 
 
 # =============================================================================
@@ -137,6 +194,12 @@ class APIConfig:
     MAX_REQUEST_SIZE_MB: int = 10
     REQUEST_TIMEOUT_SECONDS: int = 30
     
+    # Response Compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # on-the-fly compression
+    CACHED_BROTLI_QUALITY: int = 11  # precompressed cache entries, compressed once
+    
     # CORS Settings (runtime overrides)
     ADDITIONAL_CORS_ORIGINS: list = []
     
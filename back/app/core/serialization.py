@@ -0,0 +1,51 @@
+"""基于 orjson 的 JSON 序列化工具
+
+orjson 原生支持 UUID、date、datetime、dataclass 和 numpy 数组，
+这里补充 schemas 中常见但 orjson 不支持的类型（Decimal、Pydantic 模型、集合等），
+供 ORJSONResponse 和 Redis 缓存编解码共用。
+
+ORJSONResponse 只用于没有 response_model、直接返回 dict 的路由：设置了 response_model
+且未指定 response_class 时，FastAPI 直接用 Pydantic 的 model_dump_json 渲染，
+比先转成 dict 再交给 orjson 更快。
+"""
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj: Any) -> Any:
+    """orjson 无法直接序列化的类型的回退处理（与 jsonable_encoder 的结果保持一致）"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节"""
+    return orjson.dumps(obj, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+def loads(data: bytes | str) -> Any:
+    """反序列化 JSON 字节或字符串"""
+    return orjson.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 渲染的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,6 +1,6 @@
 """CRUD operations for database models."""
 
-from .base import CRUDBase
+from .base import CRUDBase, UnitOfWork, unit_of_work
 from .papers import crud_paper
 from .patents import crud_patent
 from .projects import crud_project
@@ -12,6 +12,8 @@ from .cooperations import crud_cooperation
 
 __all__ = [
     "CRUDBase",
+    "UnitOfWork",
+    "unit_of_work",
     "crud_paper",
     "crud_patent", 
     "crud_project",
@@ -1,21 +1,96 @@
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
 from typing import Any, Dict, Generic, Optional, Type, TypeVar, Union
 from uuid import UUID
 
 from pydantic import BaseModel
-from sqlalchemy import func, select
+from sqlalchemy import Date, DateTime, Integer, and_, cast, delete, distinct, extract, func, insert, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.base import Base
+from app.models.tables import AchievementTag, Tag
+from app.services.file_storage import FILE_FIELDS, file_storage_service
+from app.services.table_versions import table_version_service
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# session.info 中保存当前工作单元的键
+UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+class UnitOfWork:
+    """一次事务中的批量写操作，记录需要在提交后递增版本号的表"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.tables: set[str] = set()
+        # 表名 -> 删除的记录ID，提交后写入删除日志
+        self.deleted: dict[str, set] = {}
+
+    def mark_changed(self, *tables: str) -> None:
+        """登记直接执行 SQL 修改的表（CRUD 写方法会自动登记）"""
+        self.tables.update(tables)
+
+    def mark_deleted(self, table: str, ids: Sequence[UUID]) -> None:
+        """登记删除的记录ID（CRUD 删除方法会自动登记）"""
+        self.tables.add(table)
+        self.deleted.setdefault(table, set()).update(ids)
+
+
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession) -> AsyncIterator[UnitOfWork]:
+    """把多次 CRUD 写操作合并到一个事务中
+
+    上下文内 CRUD 写方法只 flush 不提交；正常退出时统一提交一次并递增涉及表的
+    版本号，发生异常时整体回滚。可以嵌套，只有最外层负责提交。
+    """
+    current = db.info.get(UNIT_OF_WORK_KEY)
+    if current is not None:
+        yield current
+        return
+
+    uow = UnitOfWork(db)
+    db.info[UNIT_OF_WORK_KEY] = uow
+    try:
+        yield uow
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(UNIT_OF_WORK_KEY, None)
+    await table_version_service.bump(*uow.tables, deleted=uow.deleted)
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # 列表搜索（ILIKE）匹配的列
+    search_fields: tuple[str, ...] = ()
+    # 分面名 -> 列名；日期列按年份分组
+    facet_fields: Dict[str, str] = {}
+    # AchievementTag.achievement_type 中本表成果的类型，设置后支持 tag 分面
+    achievement_type: Optional[str] = None
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
+    @property
+    def available_facets(self) -> tuple[str, ...]:
+        facets = tuple(self.facet_fields)
+        return facets + ("tag",) if self.achievement_type else facets
+
+    def apply_filters(self, query, filters: Optional[dict] = None, search: Optional[str] = None):
+        if filters:
+            for key, value in filters.items():
+                if hasattr(self.model, key) and value is not None:
+                    query = query.where(getattr(self.model, key) == value)
+        
+        if search and self.search_fields:
+            pattern = f"%{search}%"
+            query = query.where(or_(*[getattr(self.model, field).ilike(pattern) for field in self.search_fields]))
+        return query
+
     async def get(self, db: AsyncSession, id: UUID) -> Optional[ModelType]:
         result = await db.execute(select(self.model).where(self.model.id == id))
         return result.scalar_one_or_none()
@@ -27,14 +102,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         skip: int = 0,
         limit: int = 100,
         filters: Optional[dict] = None,
+        search: Optional[str] = None,
     ) -> list[ModelType]:
-        query = select(self.model)
-        
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key) and value is not None:
-                    query = query.where(getattr(self.model, key) == value)
-        
+        query = self.apply_filters(select(self.model), filters, search)
         query = query.offset(skip).limit(limit)
         result = await db.execute(query)
         return list(result.scalars().all())
@@ -44,24 +114,112 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: AsyncSession,
         *,
         filters: Optional[dict] = None,
+        search: Optional[str] = None,
     ) -> int:
-        query = select(func.count(self.model.id))
-        
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key) and value is not None:
-                    query = query.where(getattr(self.model, key) == value)
-        
+        query = self.apply_filters(select(func.count(self.model.id)), filters, search)
         result = await db.execute(query)
         return result.scalar() or 0
 
+    def _facet_expression(self, name: str):
+        if name == "tag":
+            return Tag.name
+        column = getattr(self.model, self.facet_fields[name])
+        if isinstance(column.type, (Date, DateTime)):
+            return cast(extract("year", column), Integer)
+        return column
+
+    async def get_facets(
+        self,
+        db: AsyncSession,
+        *,
+        facets: Sequence[str],
+        filters: Optional[dict] = None,
+        search: Optional[str] = None,
+    ) -> tuple[int, Dict[str, list[Dict[str, Any]]]]:
+        """在一条 GROUPING SETS 查询中统计当前筛选条件下的总数和各分面取值的数量
+
+        Returns:
+            (总数, {分面名: [{"value": 取值, "count": 数量}, ...]})，取值按数量降序
+        """
+        expressions = [self._facet_expression(name) for name in facets]
+        with_tags = "tag" in facets
+        # 连接标签后一条记录可能出现多次，按主键去重计数
+        count = func.count(distinct(self.model.id)) if with_tags else func.count()
+
+        query = select(
+            count.label("count"),
+            *[expression.label(f"facet_{idx}") for idx, expression in enumerate(expressions)],
+            *[func.grouping(expression).label(f"grouping_{idx}") for idx, expression in enumerate(expressions)],
+        ).select_from(self.model)
+        if with_tags:
+            # 走 uq_achievement_tags (achievement_type, achievement_id, tag_id) 索引
+            query = query.outerjoin(
+                AchievementTag,
+                and_(
+                    AchievementTag.achievement_type == self.achievement_type,
+                    AchievementTag.achievement_id == self.model.id,
+                ),
+            ).outerjoin(Tag, Tag.id == AchievementTag.tag_id)
+        query = self.apply_filters(query, filters, search)
+        # 每个分面一个分组集，空分组集 () 给出总数
+        query = query.group_by(func.grouping_sets(*[tuple_(expression) for expression in expressions], tuple_()))
+
+        total = 0
+        counts: Dict[str, list[Dict[str, Any]]] = {name: [] for name in facets}
+        for row in (await db.execute(query)).mappings():
+            grouped = [idx for idx in range(len(facets)) if row[f"grouping_{idx}"] == 0]
+            if not grouped:
+                total = row["count"]
+                continue
+            value = row[f"facet_{grouped[0]}"]
+            if value is not None:
+                counts[facets[grouped[0]]].append({"value": value, "count": row["count"]})
+
+        for buckets in counts.values():
+            buckets.sort(key=lambda bucket: bucket["count"], reverse=True)
+        return total, counts
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[dict] = None,
+        search: Optional[str] = None,
+        facets: Sequence[str] = (),
+    ) -> tuple[list[ModelType], int, Optional[Dict[str, list[Dict[str, Any]]]]]:
+        """列表页：当前页记录、总数，以及请求了分面时的分面统计（总数由同一查询给出）"""
+        items = await self.get_multi(db, skip=skip, limit=limit, filters=filters, search=search)
+        if facets:
+            total, facet_counts = await self.get_facets(db, facets=facets, filters=filters, search=search)
+            return items, total, facet_counts
+        return items, await self.count(db, filters=filters, search=search), None
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_data = obj_in.model_dump()
-        db_obj = self.model(**obj_data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        return (await self.create_many(db, objs_in=[obj_in]))[0]
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+    ) -> list[ModelType]:
+        """批量创建，一条 INSERT ... RETURNING 写入并返回全部记录（顺序与输入一致）"""
+        if not objs_in:
+            return []
+
+        rows = [obj.model_dump() if isinstance(obj, BaseModel) else dict(obj) for obj in objs_in]
+        result = await db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            rows,
+        )
+        db_objs = list(result.all())
+        await file_storage_service.adjust_refs(
+            db, [path for db_obj in db_objs for path in self.file_refs(db_obj)], 1
+        )
+        await self.commit(db)
+        return db_objs
 
     async def update(
         self,
@@ -70,23 +228,119 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
+        update_data = self._update_values(obj_in)
+        if not update_data:
+            return db_obj
+
+        old_files = self.file_refs(db_obj)
+        # RETURNING 直接刷新会话中的 db_obj（含 updated_at），无需再 refresh
+        result = await db.scalars(
+            update(self.model)
+            .where(self.model.id == db_obj.id)
+            .values(**update_data)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        result.all()
+        await self.sync_file_refs(db, old_files, self.file_refs(db_obj))
+        await self.commit(db)
+        return db_obj
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[UUID],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> list[ModelType]:
+        """把同一组字段值写入多条记录，返回实际更新的记录"""
+        update_data = self._update_values(obj_in)
+        if not ids or not update_data:
+            return []
+
+        touched_files = [field for field in FILE_FIELDS if field in update_data]
+        old_files: list[str] = []
+        if touched_files:
+            result = await db.execute(
+                select(*[getattr(self.model, field) for field in touched_files])
+                .where(self.model.id.in_(ids))
+            )
+            old_files = [path for row in result for path in row if path]
+
+        result = await db.scalars(
+            update(self.model)
+            .where(self.model.id.in_(ids))
+            .values(**update_data)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        db_objs = list(result.all())
+        if touched_files:
+            new_files = [update_data[field] for field in touched_files if update_data[field]] * len(db_objs)
+            await self.sync_file_refs(db, old_files, new_files)
+        await self.commit(db)
+        return db_objs
+
+    async def remove(self, db: AsyncSession, *, id: UUID) -> Optional[ModelType]:
+        removed = await self.remove_many(db, ids=[id])
+        return removed[0] if removed else None
+
+    async def remove_many(self, db: AsyncSession, *, ids: Sequence[UUID]) -> list[ModelType]:
+        """批量删除，DELETE ... RETURNING 返回被删除的记录"""
+        if not ids:
+            return []
+
+        result = await db.scalars(
+            delete(self.model).where(self.model.id.in_(ids)).returning(self.model)
+        )
+        db_objs = list(result.all())
+        await file_storage_service.adjust_refs(
+            db, [path for db_obj in db_objs for path in self.file_refs(db_obj)], -1
+        )
+        await self.commit(db, deleted=[db_obj.id for db_obj in db_objs])
+        return db_objs
+
+    def _update_values(self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            if hasattr(db_obj, field):
-                setattr(db_obj, field, value)
-        
-        db.add(db_obj)
+        return {field: value for field, value in update_data.items() if hasattr(self.model, field)}
+
+    def file_refs(self, db_obj: ModelType) -> list[str]:
+        """记录引用的上传文件路径（image_path/file_path）"""
+        return [getattr(db_obj, field) for field in FILE_FIELDS if getattr(db_obj, field, None)]
+
+    async def sync_file_refs(self, db: AsyncSession, old_files: list[str], new_files: list[str]) -> None:
+        """文件字段变化时更新 stored_files 引用计数（不提交事务）"""
+        if old_files != new_files:
+            await file_storage_service.adjust_refs(db, old_files, -1)
+            await file_storage_service.adjust_refs(db, new_files, 1)
+
+    @property
+    def version_tables(self) -> tuple[str, ...]:
+        """写操作后需要递增版本号的表"""
+        return (self.model.__tablename__,)
+
+    async def commit(self, db: AsyncSession, *, deleted: Sequence[UUID] = ()) -> None:
+        """提交写操作并递增版本号；处于 unit_of_work 中时只 flush，由上下文统一提交
+
+        Args:
+            deleted: 本次删除的记录ID，随版本号写入删除日志
+        """
+        uow = db.info.get(UNIT_OF_WORK_KEY)
+        if uow is not None:
+            await db.flush()
+            uow.mark_changed(*self.version_tables)
+            if deleted:
+                uow.mark_deleted(self.model.__tablename__, deleted)
+            return
         await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        await self.bump_version(deleted=deleted)
 
-    async def remove(self, db: AsyncSession, *, id: UUID) -> Optional[ModelType]:
-        obj = await self.get(db, id)
-        if obj:
-            await db.delete(obj)
-            await db.commit()
-        return obj
+    async def bump_version(self, *, deleted: Sequence[UUID] = ()) -> None:
+        """递增本表版本号，使依赖本表的 ETag 失效"""
+        await table_version_service.bump(
+            *self.version_tables,
+            deleted={self.model.__tablename__: deleted} if deleted else None,
+        )
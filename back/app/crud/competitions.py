@@ -8,6 +8,10 @@ from app.schemas.competitions import CompetitionCreate, CompetitionUpdate
 
 
 class CRUDCompetition(CRUDBase[Competition, CompetitionCreate, CompetitionUpdate]):
+    search_fields = ("name",)
+    facet_fields = {"status": "status", "level": "level", "year": "award_date"}
+    achievement_type = "competition"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取比赛统计数据"""
         total_query = select(func.count(self.model.id))
@@ -46,12 +50,7 @@ class CRUDCompetition(CRUDBase[Competition, CompetitionCreate, CompetitionUpdate
         limit: int = 100,
     ) -> list[Competition]:
         """搜索比赛"""
-        search_query = select(self.model).where(
-            self.model.name.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_competition = CRUDCompetition(Competition)
@@ -8,6 +8,10 @@ from app.schemas.conferences import ConferenceCreate, ConferenceUpdate
 
 
 class CRUDConference(CRUDBase[Conference, ConferenceCreate, ConferenceUpdate]):
+    search_fields = ("name", "location")
+    facet_fields = {"status": "participation_type", "level": "level", "year": "start_date"}
+    achievement_type = "conference"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取会议统计数据"""
         total_query = select(func.count(self.model.id))
@@ -45,13 +49,7 @@ class CRUDConference(CRUDBase[Conference, ConferenceCreate, ConferenceUpdate]):
         limit: int = 100,
     ) -> list[Conference]:
         """搜索会议"""
-        search_query = select(self.model).where(
-            self.model.name.ilike(f"%{query}%") |
-            self.model.location.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_conference = CRUDConference(Conference)
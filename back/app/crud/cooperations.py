@@ -8,6 +8,10 @@ from app.schemas.cooperations import CooperationCreate, CooperationUpdate
 
 
 class CRUDCooperation(CRUDBase[Cooperation, CooperationCreate, CooperationUpdate]):
+    search_fields = ("organization", "content")
+    facet_fields = {"status": "status", "type": "cooperation_type", "year": "start_date"}
+    achievement_type = "cooperation"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取合作统计数据"""
         total_query = select(func.count(self.model.id))
@@ -45,13 +49,7 @@ class CRUDCooperation(CRUDBase[Cooperation, CooperationCreate, CooperationUpdate
         limit: int = 100,
     ) -> list[Cooperation]:
         """搜索合作"""
-        search_query = select(self.model).where(
-            self.model.organization.ilike(f"%{query}%") |
-            self.model.content.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_cooperation = CRUDCooperation(Cooperation)
@@ -1,15 +1,143 @@
-from typing import Dict, Optional
+from collections.abc import Sequence
+from typing import Any, Dict, Optional, Union
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.crud.base import CRUDBase
-from app.models.tables import Paper, PaperAuthor
+from app.crud.base import CRUDBase, unit_of_work
+from app.models.tables import Paper, PaperAuthor, PaperProject, Project
 from app.schemas.papers import PaperCreate, PaperUpdate
 
 
+def extract_project_ids(related_projects: Any) -> set[UUID]:
+    """从 related_projects JSONB 中解析出项目ID
+
+    兼容导入时的 {"projects": [{"project_id": ..., "project_name": ...}]}、
+    直接的列表以及纯字符串ID等格式，无法解析的条目会被忽略。
+    """
+    if not related_projects:
+        return set()
+
+    if isinstance(related_projects, dict):
+        items = related_projects.get("projects")
+        if items is None:
+            items = related_projects.get("project_ids", [])
+    else:
+        items = related_projects
+
+    if not isinstance(items, list):
+        items = [items]
+
+    project_ids: set[UUID] = set()
+    for item in items:
+        raw = (item.get("project_id") or item.get("id")) if isinstance(item, dict) else item
+        try:
+            project_ids.add(UUID(str(raw)))
+        except (TypeError, ValueError):
+            continue
+    return project_ids
+
+
+# 批量写入关联行时每条语句的最大论文/关联数，避免超出参数数量上限
+LINK_CHUNK_SIZE = 5000
+
+
 class CRUDPaper(CRUDBase[Paper, PaperCreate, PaperUpdate]):
+    search_fields = ("title", "abstract")
+    facet_fields = {"status": "status", "year": "publish_date"}
+    achievement_type = "paper"
+
+    @property
+    def version_tables(self) -> tuple[str, ...]:
+        return (self.model.__tablename__, PaperProject.__tablename__)
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[PaperCreate, Dict[str, Any]]],
+    ) -> list[Paper]:
+        async with unit_of_work(db):
+            papers = await super().create_many(db, objs_in=objs_in)
+            await self.replace_project_links(
+                db, {paper.id: extract_project_ids(paper.related_projects) for paper in papers}
+            )
+        return papers
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Paper,
+        obj_in: Union[PaperUpdate, Dict[str, Any]],
+    ) -> Paper:
+        async with unit_of_work(db):
+            paper = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+            if "related_projects" in self._update_values(obj_in):
+                await self.sync_project_links(db, paper_id=paper.id, related_projects=paper.related_projects)
+        return paper
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[UUID],
+        obj_in: Union[PaperUpdate, Dict[str, Any]],
+    ) -> list[Paper]:
+        async with unit_of_work(db):
+            papers = await super().update_many(db, ids=ids, obj_in=obj_in)
+            if "related_projects" in self._update_values(obj_in):
+                await self.replace_project_links(
+                    db, {paper.id: extract_project_ids(paper.related_projects) for paper in papers}
+                )
+        return papers
+
+    async def sync_project_links(
+        self, db: AsyncSession, *, paper_id: UUID, related_projects: Any
+    ) -> None:
+        """根据 related_projects 重建 paper_projects 关联行（不提交事务）"""
+        await self.replace_project_links(db, {paper_id: extract_project_ids(related_projects)})
+
+    async def replace_project_links(self, db: AsyncSession, links: dict[UUID, set[UUID]]) -> None:
+        """批量重建多篇论文的 paper_projects 关联行（不提交事务）"""
+        paper_ids = list(links)
+        for start in range(0, len(paper_ids), LINK_CHUNK_SIZE):
+            chunk = paper_ids[start:start + LINK_CHUNK_SIZE]
+            await db.execute(delete(PaperProject).where(PaperProject.paper_id.in_(chunk)))
+
+        # 只保留真实存在的项目，避免外键冲突
+        project_ids = list({project_id for ids in links.values() for project_id in ids})
+        existing: set[UUID] = set()
+        for start in range(0, len(project_ids), LINK_CHUNK_SIZE):
+            chunk = project_ids[start:start + LINK_CHUNK_SIZE]
+            result = await db.execute(select(Project.id).where(Project.id.in_(chunk)))
+            existing.update(result.scalars())
+
+        rows = [
+            {"paper_id": paper_id, "project_id": project_id}
+            for paper_id, ids in links.items()
+            for project_id in ids
+            if project_id in existing
+        ]
+        for start in range(0, len(rows), LINK_CHUNK_SIZE):
+            await db.execute(
+                insert(PaperProject)
+                .values(rows[start:start + LINK_CHUNK_SIZE])
+                .on_conflict_do_nothing(constraint="uq_paper_projects")
+            )
+
+    async def get_with_authors(self, db: AsyncSession, id: UUID) -> Optional[Paper]:
+        """获取论文及其作者列表（共两条查询）"""
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.id == id)
+            .options(selectinload(self.model.author_list))
+        )
+        return result.scalar_one_or_none()
+
     async def get_by_status(
         self, db: AsyncSession, *, status: str, skip: int = 0, limit: int = 100
     ) -> list[Paper]:
@@ -74,13 +202,7 @@ class CRUDPaper(CRUDBase[Paper, PaperCreate, PaperUpdate]):
         limit: int = 100,
     ) -> list[Paper]:
         """搜索论文"""
-        search_query = select(self.model).where(
-            self.model.title.ilike(f"%{query}%") |
-            self.model.abstract.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_paper = CRUDPaper(Paper)
@@ -9,6 +9,10 @@ from app.schemas.patents import PatentCreate, PatentUpdate
 
 
 class CRUDPatent(CRUDBase[Patent, PatentCreate, PatentUpdate]):
+    search_fields = ("name", "patent_number", "technology_field")
+    facet_fields = {"status": "status", "type": "patent_type", "year": "application_date", "field": "technology_field"}
+    achievement_type = "patent"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取专利统计数据"""
         total_query = select(func.count(self.model.id))
@@ -66,14 +70,7 @@ class CRUDPatent(CRUDBase[Patent, PatentCreate, PatentUpdate]):
         limit: int = 100,
     ) -> list[Patent]:
         """搜索专利"""
-        search_query = select(self.model).where(
-            self.model.name.ilike(f"%{query}%") |
-            self.model.patent_number.ilike(f"%{query}%") |
-            self.model.technology_field.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_patent = CRUDPatent(Patent)
@@ -1,7 +1,9 @@
-from typing import Dict
+from typing import Dict, Optional
+from uuid import UUID
 
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.crud.base import CRUDBase
 from app.models.tables import Project, ProjectMilestone
@@ -9,6 +11,10 @@ from app.schemas.projects import ProjectCreate, ProjectUpdate
 
 
 class CRUDProject(CRUDBase[Project, ProjectCreate, ProjectUpdate]):
+    search_fields = ("name", "description")
+    facet_fields = {"status": "status", "priority": "priority", "type": "project_type", "year": "start_date"}
+    achievement_type = "project"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取项目统计数据"""
         total_query = select(func.count(self.model.id))
@@ -47,6 +53,15 @@ class CRUDProject(CRUDBase[Project, ProjectCreate, ProjectUpdate]):
             "usage_rate": (total_used / total_budget * 100) if total_budget > 0 else 0,
         }
 
+    async def get_with_milestones(self, db: AsyncSession, id: UUID) -> Optional[Project]:
+        """获取项目及其里程碑（共两条查询）"""
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.id == id)
+            .options(selectinload(self.model.milestones))
+        )
+        return result.scalar_one_or_none()
+
     async def get_milestones(
         self, db: AsyncSession, *, project_id: str, skip: int = 0, limit: int = 100
     ) -> list[ProjectMilestone]:
@@ -79,13 +94,7 @@ class CRUDProject(CRUDBase[Project, ProjectCreate, ProjectUpdate]):
         limit: int = 100,
     ) -> list[Project]:
         """搜索项目"""
-        search_query = select(self.model).where(
-            self.model.name.ilike(f"%{query}%") |
-            self.model.description.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_project = CRUDProject(Project)
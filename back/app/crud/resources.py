@@ -1,4 +1,5 @@
 from typing import Dict
+from uuid import UUID
 
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,9 +7,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
 from app.models.tables import Resource, ResourceUsageLog
 from app.schemas.resources import ResourceCreate, ResourceUpdate
+from app.services.resource_counters import resource_counter_service
 
 
 class CRUDResource(CRUDBase[Resource, ResourceCreate, ResourceUpdate]):
+    search_fields = ("name", "description", "resource_type")
+    facet_fields = {"type": "resource_type", "public": "is_public"}
+    achievement_type = "resource"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取资源统计数据"""
         total_query = select(func.count(self.model.id))
@@ -83,12 +89,8 @@ class CRUDResource(CRUDBase[Resource, ResourceCreate, ResourceUpdate]):
     async def update_download_count(
         self, db: AsyncSession, *, resource_id: str
     ) -> None:
-        """更新下载次数"""
-        resource = await self.get(db, resource_id)
-        if resource:
-            resource.download_count += 1
-            db.add(resource)
-            await db.commit()
+        """更新下载次数（经 Redis 累计后由后台任务批量写回）"""
+        await resource_counter_service.record_download(db, UUID(str(resource_id)))
 
     async def search(
         self,
@@ -99,14 +101,7 @@ class CRUDResource(CRUDBase[Resource, ResourceCreate, ResourceUpdate]):
         limit: int = 100,
     ) -> list[Resource]:
         """搜索资源"""
-        search_query = select(self.model).where(
-            self.model.name.ilike(f"%{query}%") |
-            self.model.description.ilike(f"%{query}%") |
-            self.model.resource_type.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_resource = CRUDResource(Resource)
@@ -8,6 +8,10 @@ from app.schemas.software_copyrights import SoftwareCopyrightCreate, SoftwareCop
 
 
 class CRUDSoftwareCopyright(CRUDBase[SoftwareCopyright, SoftwareCopyrightCreate, SoftwareCopyrightUpdate]):
+    search_fields = ("name", "registration_number")
+    facet_fields = {"status": "status", "type": "category", "year": "registration_date"}
+    achievement_type = "software_copyright"
+
     async def get_stats(self, db: AsyncSession) -> Dict[str, int]:
         """获取软著统计数据"""
         total_query = select(func.count(self.model.id))
@@ -45,13 +49,7 @@ class CRUDSoftwareCopyright(CRUDBase[SoftwareCopyright, SoftwareCopyrightCreate,
         limit: int = 100,
     ) -> list[SoftwareCopyright]:
         """搜索软著"""
-        search_query = select(self.model).where(
-            self.model.name.ilike(f"%{query}%") |
-            self.model.registration_number.ilike(f"%{query}%")
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(search_query)
-        return list(result.scalars().all())
+        return await self.get_multi(db, skip=skip, limit=limit, search=query)
 
 
 crud_software_copyright = CRUDSoftwareCopyright(SoftwareCopyright)
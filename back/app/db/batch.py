@@ -0,0 +1,30 @@
+"""批量查询辅助函数
+
+逐行查询关联数据（如每位作者再查一次项目数）会产生 N+1 次往返，
+这里把同一列上的多个键合并成一条 ``WHERE col = ANY(:keys)`` 查询。
+"""
+from collections.abc import Hashable, Iterable
+from typing import Optional
+
+from sqlalchemy import any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+async def count_by(
+    db: AsyncSession, column: InstrumentedAttribute, keys: Iterable[Optional[Hashable]]
+) -> list[int]:
+    """统计 column 等于各个键的记录数，结果与 keys 一一对应（None 和不存在的键为 0）"""
+    keys = list(keys)
+    distinct = list({key for key in keys if key is not None})
+    if not distinct:
+        return [0] * len(keys)
+
+    # 单个数组参数，不同批量大小共用同一条预编译语句
+    keys_param = bindparam("keys", distinct, type_=ARRAY(column.type))
+    result = await db.execute(
+        select(column, func.count()).where(column == any_(keys_param)).group_by(column)
+    )
+    counts = dict(result.all())
+    return [counts.get(key, 0) for key in keys]
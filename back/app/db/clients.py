@@ -0,0 +1,95 @@
+"""Redis / MongoDB / Neo4j 客户端工厂
+
+按 DatabaseConfig 中的连接池设置创建客户端，并在启动时预先建立最少数量的连接，
+避免首批请求承担 TCP/TLS 握手和认证的开销。
+"""
+import asyncio
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from neo4j import AsyncDriver, AsyncGraphDatabase
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.connection import SSLConnection
+
+from app.core.config import settings
+from app.core.globals import database_config
+
+
+def create_redis_client(*, decode_responses: bool = True) -> Redis:
+    """创建 Redis 客户端
+
+    使用 BlockingConnectionPool：连接数达到 REDIS_MAX_CONNECTIONS 后新的请求
+    等待空闲连接（最多 REDIS_SOCKET_TIMEOUT 秒），而不是直接抛出连接数过多的错误。
+    """
+    pool_kwargs = {
+        "max_connections": database_config.REDIS_MAX_CONNECTIONS,
+        "timeout": database_config.REDIS_SOCKET_TIMEOUT,
+        "socket_timeout": database_config.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": database_config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        "socket_keepalive": True,
+        "health_check_interval": database_config.REDIS_HEALTH_CHECK_INTERVAL,
+        "encoding": "utf-8",
+        "decode_responses": decode_responses,
+    }
+    # rediss:// 会自动使用 SSL，这里处理 redis:// 但要求 SSL 的情况
+    if settings.redis_ssl:
+        pool_kwargs["connection_class"] = SSLConnection
+
+    pool = BlockingConnectionPool.from_url(str(settings.redis_dsn), **pool_kwargs)
+    return Redis(connection_pool=pool)
+
+
+async def warm_redis_pool(client: Redis, size: Optional[int] = None) -> None:
+    """同时取出 size 个连接（取出时即完成连接），归还后留在池中复用
+
+    get_connection() 不带参数需要 redis-py 5.3+（requirements.txt 中的最低版本）。
+    """
+    size = min(
+        database_config.REDIS_MIN_IDLE_CONNECTIONS if size is None else size,
+        database_config.REDIS_MAX_CONNECTIONS,
+    )
+    pool = client.connection_pool
+    results = await asyncio.gather(*(pool.get_connection() for _ in range(size)), return_exceptions=True)
+    for result in results:
+        if not isinstance(result, BaseException):
+            await pool.release(result)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+
+
+def create_mongo_client() -> AsyncIOMotorClient:
+    """创建 MongoDB 客户端，驱动会在后台维持 MONGO_MIN_POOL_SIZE 个连接"""
+    return AsyncIOMotorClient(
+        settings.mongo_dsn,
+        maxPoolSize=database_config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=database_config.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=database_config.MONGO_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=database_config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    )
+
+
+def create_neo4j_driver() -> AsyncDriver:
+    """创建 Neo4j 驱动"""
+    return AsyncGraphDatabase.driver(
+        settings.neo4j_uri,
+        auth=(settings.neo4j_user, settings.neo4j_password),
+        max_connection_lifetime=database_config.NEO4J_MAX_CONNECTION_LIFETIME,
+        max_connection_pool_size=database_config.NEO4J_MAX_CONNECTION_POOL_SIZE,
+        connection_acquisition_timeout=database_config.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        keep_alive=True,
+    )
+
+
+async def warm_neo4j_pool(driver: AsyncDriver, database: str, size: Optional[int] = None) -> None:
+    """同时打开 size 个会话执行简单查询，使连接池中保留相应数量的连接"""
+    size = min(
+        database_config.NEO4J_MIN_IDLE_CONNECTIONS if size is None else size,
+        database_config.NEO4J_MAX_CONNECTION_POOL_SIZE,
+    )
+
+    async def ping() -> None:
+        async with driver.session(database=database) as session:
+            await session.run("RETURN 1")
+
+    await asyncio.gather(*(ping() for _ in range(size)))
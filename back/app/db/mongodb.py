@@ -3,6 +3,7 @@ from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.core.config import settings
+from app.db.clients import create_mongo_client
 
 client: Optional[AsyncIOMotorClient] = None
 
@@ -16,7 +17,7 @@ async def init_mongo() -> None:
     if not settings.mongo_dsn:
         raise ValueError("MongoDB DSN is required when mongo is enabled.")
 
-    client = AsyncIOMotorClient(settings.mongo_dsn)
+    client = create_mongo_client()
 
     await get_database().command("ping")
 
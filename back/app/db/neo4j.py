@@ -1,8 +1,9 @@
 from typing import Optional
 
-from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncManagedTransaction, AsyncSession
+from neo4j import AsyncDriver, AsyncManagedTransaction, AsyncSession
 
 from app.core.config import settings
+from app.db.clients import create_neo4j_driver, warm_neo4j_pool
 
 driver: Optional[AsyncDriver] = None
 
@@ -17,15 +18,13 @@ async def init_neo4j() -> None:
         raise ValueError("Neo4j URI, user, and password are required when neo4j is enabled.")
 
     if driver is None:
-        driver = AsyncGraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password),
-        )
+        driver = create_neo4j_driver()
 
     # 使用指定的数据库进行健康检查
     database = settings.neo4j_database or "neo4j"  # 默认使用 neo4j 数据库
     async with driver.session(database=database) as session:
         await session.execute_read(_health_check)
+    await warm_neo4j_pool(driver, database)
 
 
 async def close_neo4j() -> None:
@@ -1,18 +1,228 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import Optional
+from contextvars import ContextVar
+from typing import Any, Optional
 
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.sql import text
+from starlette.requests import Request
 
 from app.core.config import settings
+from app.core.globals import database_config
+from app.services.recent_writes import recent_writes_service
 
 engine: Optional[AsyncEngine] = None
 session_factory: Optional[async_sessionmaker[AsyncSession]] = None
 
+# 只读副本（未配置 APP_POSTGRES_REPLICA_DSN 时为 None，读请求全部走主库）
+replica_engine: Optional[AsyncEngine] = None
+replica_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+# 当前请求的写入状态，由 ReadYourWritesMiddleware 在请求开始时设置
+_request_writes: ContextVar[Optional[dict]] = ContextVar("postgres_request_writes", default=None)
+
+
+class PoolStats:
+    """连接池统计（按进程统计，每个 uvicorn worker 各有一个连接池）"""
+
+    # 获取连接耗时直方图的桶上界（毫秒），最后一个桶为 +Inf
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_counts = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, wait_ms: float) -> None:
+        self.wait_sum_ms += wait_ms
+        self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+        self.wait_counts[bisect_left(self.WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def histogram(self) -> dict[str, int]:
+        """累计直方图：le -> 耗时不超过该值的获取次数"""
+        result: dict[str, int] = {}
+        cumulative = 0
+        for bound, count in zip((*self.WAIT_BUCKETS_MS, "+Inf"), self.wait_counts):
+            cumulative += count
+            result[str(bound)] = cumulative
+        return result
+
+
+pool_stats = PoolStats()
+replica_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录获取连接耗时和超时次数的连接池"""
+
+    stats: PoolStats = pool_stats
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.observe_wait((time.perf_counter() - start) * 1000)
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _register_pool_events(pool: InstrumentedQueuePool, stats: PoolStats) -> None:
+    pool.stats = stats
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        stats.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        stats.checkouts += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+        stats.invalidations += 1
+
+
+def _create_engine(dsn: str, stats: PoolStats) -> AsyncEngine:
+    """按 DatabaseConfig 创建带连接池统计的引擎（主库和只读副本共用）"""
+    new_engine = create_async_engine(
+        dsn,
+        echo=settings.postgres_echo,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=database_config.POSTGRES_POOL_SIZE,
+        max_overflow=database_config.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=database_config.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=database_config.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=database_config.POSTGRES_POOL_PRE_PING,
+        connect_args={
+            # asyncpg 自身的语句缓存，以及 SQLAlchemy 适配层的预编译语句缓存
+            "statement_cache_size": database_config.POSTGRES_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": database_config.POSTGRES_STATEMENT_CACHE_SIZE,
+        },
+    )
+    _register_pool_events(new_engine.pool, stats)
+    return new_engine
+
+
+class ReplicaMonitor:
+    """只读副本可用性与复制延迟检查，结果缓存 POSTGRES_REPLICA_CHECK_INTERVAL 秒"""
+
+    # 主库空闲时 pg_last_xact_replay_timestamp() 不再前进，
+    # 已接收的 WAL 全部回放完毕时视为没有延迟
+    LAG_QUERY = text("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """)
+
+    def __init__(self) -> None:
+        self.available = False
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def reset(self) -> None:
+        self.available = False
+        self.lag_seconds = None
+        self._checked_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < database_config.POSTGRES_REPLICA_CHECK_INTERVAL
+
+    async def _measure_lag(self) -> float:
+        async with replica_engine.connect() as connection:  # type: ignore[union-attr]
+            return float((await connection.execute(self.LAG_QUERY)).scalar() or 0)
+
+    async def is_available(self) -> bool:
+        if replica_engine is None:
+            return False
+        if self._is_fresh():
+            return self.available
+
+        async with self._lock:
+            # 等锁期间其他请求可能已经完成检查
+            if self._is_fresh():
+                return self.available
+            try:
+                self.lag_seconds = await asyncio.wait_for(
+                    self._measure_lag(), timeout=database_config.POSTGRES_REPLICA_CHECK_TIMEOUT
+                )
+                self.available = self.lag_seconds <= database_config.POSTGRES_REPLICA_MAX_LAG_SECONDS
+            except Exception as e:
+                print(f"PostgreSQL replica check failed: {e}")
+                self.available = False
+                self.lag_seconds = None
+            self._checked_at = time.monotonic()
+        return self.available
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def _engine_pool_status(target: Optional[AsyncEngine], stats: PoolStats) -> dict[str, Any]:
+    if target is None:
+        return {"status": "disabled"}
+
+    pool = target.pool
+    waits = sum(stats.wait_counts)
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": database_config.POSTGRES_MAX_OVERFLOW,
+        "timeout_seconds": database_config.POSTGRES_POOL_TIMEOUT,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # 负数表示连接池尚未建满 pool_size 个连接
+        "overflow": pool.overflow(),
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "connects": stats.connects,
+        "invalidations": stats.invalidations,
+        "wait_ms": {
+            "avg": round(stats.wait_sum_ms / waits, 3) if waits else 0.0,
+            "max": round(stats.wait_max_ms, 3),
+            "histogram": stats.histogram(),
+        },
+    }
+
+
+def get_pool_status() -> dict[str, Any]:
+    """当前进程主库和只读副本连接池的实时状态"""
+    replica = _engine_pool_status(replica_engine, replica_pool_stats)
+    if replica_engine is not None:
+        replica["available"] = replica_monitor.available
+        replica["lag_seconds"] = replica_monitor.lag_seconds
+    return {
+        "pid": os.getpid(),
+        "primary": _engine_pool_status(engine, pool_stats),
+        "replica": replica,
+    }
+
 
 async def init_postgres() -> None:
-    global engine, session_factory
+    global engine, session_factory, replica_engine, replica_session_factory
 
     if not settings.postgres_enabled:
         return
@@ -21,18 +231,34 @@ async def init_postgres() -> None:
         raise ValueError("PostgreSQL DSN is required when postgres is enabled.")
 
     if engine is None:
-        engine = create_async_engine(str(settings.postgres_dsn), echo=settings.postgres_echo, future=True)
+        engine = _create_engine(str(settings.postgres_dsn), pool_stats)
         session_factory = async_sessionmaker(engine, expire_on_commit=False)
 
+    if settings.postgres_replica_dsn and replica_engine is None:
+        replica_engine = _create_engine(str(settings.postgres_replica_dsn), replica_pool_stats)
+        replica_session_factory = async_sessionmaker(
+            replica_engine, expire_on_commit=False, info={"replica": True}
+        )
+
     async with engine.begin() as connection:
         await connection.execute(text("SELECT 1"))
 
+    # 副本不可用不影响启动，读请求会回退到主库
+    if replica_engine is not None and not await replica_monitor.is_available():
+        print("PostgreSQL replica unavailable or lagging, reads will use the primary")
+
 
 async def close_postgres() -> None:
-    global engine
+    global engine, replica_engine
     if engine is not None:
         await engine.dispose()
         engine = None
+        pool_stats.reset()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+        replica_engine = None
+        replica_pool_stats.reset()
+        replica_monitor.reset()
 
 
 @asynccontextmanager
@@ -56,3 +282,86 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     finally:
         await session.close()
 
+
+# ---------------------------------------------------------------------------
+# 读写分离
+# ---------------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context: Any) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_execute(orm_execute_state: Any) -> None:
+    # 文本 SQL 无法区分读写，按写操作处理
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.info.pop("has_writes", False) and not session.info.get("replica"):
+        tracker = _request_writes.get()
+        if tracker is not None:
+            tracker["wrote"] = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+
+def begin_request_tracking(user_id: Optional[str] = None) -> dict:
+    """开始记录当前请求是否提交过写操作（由 ReadYourWritesMiddleware 调用）
+
+    Args:
+        user_id: 请求 Token 中的用户ID，匿名请求为 None
+    """
+    tracker = {"wrote": False, "user_id": user_id}
+    _request_writes.set(tracker)
+    return tracker
+
+
+def use_primary(request: Request) -> None:
+    """强制本次请求的只读会话使用主库"""
+    request.state.db_primary = True
+
+
+async def _should_use_replica(request: Request) -> bool:
+    if replica_session_factory is None or request.method not in ("GET", "HEAD"):
+        return False
+    if getattr(request.state, "db_primary", False):
+        return False
+
+    tracker = _request_writes.get()
+    if tracker is not None:
+        if tracker["wrote"]:
+            return False
+        # 该用户最近提交过写操作
+        if tracker["user_id"] and await recent_writes_service.wrote_recently(tracker["user_id"]):
+            return False
+
+    return await replica_monitor.is_available()
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """只读路由使用的会话
+
+    配置了只读副本且副本延迟在阈值内时使用副本；当前用户刚提交过写操作、
+    路由依赖要求强一致（见 use_primary）或副本不可用时使用主库。
+
+    使用该会话的路由及其调用的服务不得写数据库（热备副本上会报
+    read-only transaction 错误），需要补算的数据由后台任务在主库上写入。
+    """
+    if not settings.postgres_enabled:
+        raise RuntimeError("PostgreSQL connection is disabled.")
+    if session_factory is None:
+        raise RuntimeError("PostgreSQL session factory is not initialised.")
+
+    factory = replica_session_factory if await _should_use_replica(request) else session_factory
+    session = factory()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -1,14 +1,20 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Optional
 
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 
 from app.core.config import settings
+from app.db.clients import create_redis_client, warm_redis_pool
 
 redis_client: Optional[Redis] = None
+# 不做解码的客户端，用于存取压缩后的响应等二进制数据
+redis_binary_client: Optional[Redis] = None
 
 
 async def init_redis() -> None:
-    global redis_client
+    global redis_client, redis_binary_client
 
     if not settings.redis_enabled:
         return
@@ -16,29 +22,22 @@ async def init_redis() -> None:
     if not settings.redis_dsn:
         raise ValueError("Redis DSN is required when redis is enabled.")
 
-    # Create Redis client with conditional SSL parameter
-    redis_kwargs = {
-        "encoding": "utf-8",
-        "decode_responses": True,
-    }
-    
-    # Only add SSL parameter if it's True (Redis.from_url doesn't accept ssl=False)
-    if settings.redis_ssl:
-        redis_kwargs["ssl"] = True
-    
-    redis_client = Redis.from_url(
-        str(settings.redis_dsn),
-        **redis_kwargs
-    )
+    redis_client = create_redis_client()
+    redis_binary_client = create_redis_client(decode_responses=False)
 
     await redis_client.ping()
+    await warm_redis_pool(redis_client)
 
 
 async def close_redis() -> None:
-    global redis_client
-    if redis_client is not None:
-        await redis_client.close()
-        redis_client = None
+    global redis_client, redis_binary_client
+    # 连接池由 create_redis_client 显式创建，关闭客户端不会断开池中的连接
+    for client in (redis_client, redis_binary_client):
+        if client is not None:
+            await client.close()
+            await client.connection_pool.disconnect()
+    redis_client = None
+    redis_binary_client = None
 
 
 def get_client() -> Redis:
@@ -48,3 +47,27 @@ def get_client() -> Redis:
         raise RuntimeError("Redis client is not initialised.")
     return redis_client
 
+
+
+def get_binary_client() -> Redis:
+    if not settings.redis_enabled:
+        raise RuntimeError("Redis connection is disabled.")
+    if redis_binary_client is None:
+        raise RuntimeError("Redis client is not initialised.")
+    return redis_binary_client
+
+
+@asynccontextmanager
+async def redis_pipeline(transaction: bool = False) -> AsyncIterator[Pipeline]:
+    """在一次往返中发送多条命令
+
+    transaction=True 时用 MULTI/EXEC 包裹，保证命令按原子方式执行。
+
+    用法:
+        async with redis_pipeline() as pipe:
+            pipe.lpush(key, value)
+            pipe.expire(key, ttl)
+            results = await pipe.execute()
+    """
+    async with get_client().pipeline(transaction=transaction) as pipe:
+        yield pipe
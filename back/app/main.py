@@ -13,6 +13,7 @@ from app.api.routes import (
     cooperations,
     dashboard,
     health,
+    imports,
     knowledge_graph,
     notifications,
     paper_documents,
@@ -26,8 +27,16 @@ from app.api.routes import (
     users,
 )
 from app.core.config import settings
+from app.core.globals import api_config, database_config, feature_flags
 from app.core.logging import configure_logging
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.services.author_metrics import author_metrics_service
+from app.services.image_variants import image_variant_service
 from app.services.project_cleanup import project_cleanup_service
+from app.services.resource_counters import resource_counter_service
+from app.services.search_history import search_history_service
+from app.services.typeahead import typeahead_service
 from app.db.mongodb import close_mongo, init_mongo
 from app.db.neo4j import close_neo4j, init_neo4j
 from app.db.postgres import close_postgres, init_postgres
@@ -43,8 +52,18 @@ async def lifespan(app: FastAPI):
     await init_mongo()
     await init_redis()
 
+    resource_counter_service.start()
+    search_history_service.start()
+    typeahead_service.start()
+    author_metrics_service.start()
+
     yield
 
+    await author_metrics_service.stop()
+    await typeahead_service.stop()
+    await search_history_service.stop()
+    await resource_counter_service.stop()
+
     # 清理所有运行中的项目进程
     try:
         cleanup_results = await project_cleanup_service.cleanup_all_running_projects()
@@ -58,6 +77,8 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"清理项目进程失败: {str(e)}")
 
+    image_variant_service.shutdown()
+
     await close_redis()
     await close_mongo()
     await close_neo4j()
@@ -77,6 +98,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 配置了只读副本时，用户提交写操作后的短时间内读请求固定走主库
+if settings.postgres_replica_dsn:
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        sticky_seconds=database_config.POSTGRES_STICKY_PRIMARY_SECONDS,
+    )
+
+if feature_flags.ENABLE_RESPONSE_COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=api_config.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=api_config.GZIP_LEVEL,
+        brotli_quality=api_config.BROTLI_QUALITY,
+    )
+
 app.include_router(health.router, prefix=settings.api_prefix)
 app.include_router(auth.router, prefix=settings.api_prefix)
 app.include_router(users.router, prefix=settings.api_prefix)
@@ -94,6 +130,7 @@ app.include_router(competitions.router, prefix=settings.api_prefix)
 app.include_router(conferences.router, prefix=settings.api_prefix)
 app.include_router(cooperations.router, prefix=settings.api_prefix)
 app.include_router(software_copyrights.router, prefix=settings.api_prefix)
+app.include_router(imports.router, prefix=settings.api_prefix)  # 批量导入
 app.include_router(search.router, prefix=settings.api_prefix)
 app.include_router(knowledge_graph.router, prefix=settings.api_prefix)
 
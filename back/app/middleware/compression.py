@@ -0,0 +1,222 @@
+"""响应压缩中间件
+
+- 按 Accept-Encoding（含 q 值）协商 br / gzip；
+- 完整响应体小于 minimum_size 时不压缩；
+- StreamingResponse 等分块响应逐块压缩并 flush，不做整体缓冲；
+- 已带 Content-Encoding 的响应（如预压缩缓存、列式图谱 gzip）、
+  图片/PDF 等已压缩格式以及 206/304 响应原样透传。
+
+使用纯 ASGI 实现，避免 BaseHTTPMiddleware 对流式响应的缓冲。
+"""
+import gzip
+import zlib
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+# 值得压缩的内容类型前缀
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/",
+)
+
+# 不压缩的状态码：无响应体或分段响应
+SKIP_STATUS_CODES = {204, 206, 304}
+
+
+def _encoding_weights(accept_encoding: Optional[str]) -> dict[str, float]:
+    """解析 Accept-Encoding：编码 -> q 值"""
+    weights: dict[str, float] = {}
+    if not accept_encoding:
+        return weights
+
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    return weights
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """客户端是否接受指定的内容编码（q=0 视为拒绝）"""
+    weights = _encoding_weights(accept_encoding)
+    return weights.get(encoding, weights.get("*", 0.0)) > 0
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """根据 Accept-Encoding 选择编码，返回 br、gzip 或 identity"""
+    weights = _encoding_weights(accept_encoding)
+    wildcard = weights.get("*")
+    best, best_q = "identity", 0.0
+    # SUPPORTED_ENCODINGS 按偏好排序，q 值相同时优先 br
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(body: bytes, encoding: str, *, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """一次性压缩完整响应体"""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=gzip_level)
+    return body
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+class _StreamCompressor:
+    """分块压缩器，每块 flush 后立即可被客户端解码"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 生成带 gzip 头的数据流
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """gzip / brotli 响应压缩中间件"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """单个请求的压缩状态"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[_StreamCompressor] = None
+
+    def _set_encoding_headers(self, start_message: Message, content_length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] in SKIP_STATUS_CODES
+                or "content-encoding" in headers
+                or "content-range" in headers
+                or not is_compressible(headers.get("content-type"))
+            )
+            if self.passthrough:
+                await self.downstream(message)
+            else:
+                # 等到第一个 body 消息才能判断是完整响应还是流式响应
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+
+            if not more_body:
+                # 完整响应：不足阈值时原样返回
+                if len(body) < self.middleware.minimum_size:
+                    await self.downstream(start_message)
+                    await self.downstream(message)
+                    return
+                compressed = compress_body(
+                    body,
+                    self.encoding,
+                    gzip_level=self.middleware.gzip_level,
+                    brotli_quality=self.middleware.brotli_quality,
+                )
+                self._set_encoding_headers(start_message, len(compressed))
+                await self.downstream(start_message)
+                await self.downstream({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+            # 流式响应：逐块压缩，长度未知
+            self.compressor = _StreamCompressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            self._set_encoding_headers(start_message, None)
+            await self.downstream(start_message)
+
+        if self.compressor is None:
+            await self.downstream(message)
+            return
+
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
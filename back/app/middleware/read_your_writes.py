@@ -0,0 +1,37 @@
+"""读写分离的 read-your-writes 中间件
+
+记录每个请求是否向主库提交过写操作；提交过时按 Bearer Token 中的用户ID
+记录到 recent_writes_service，该用户在 POSTGRES_STICKY_PRIMARY_SECONDS 秒内的
+只读请求都走主库，不会因为副本复制延迟读到自己刚修改之前的数据
+（见 app.db.postgres.get_read_session）。匿名请求不记录。
+
+使用纯 ASGI 实现，不缓冲响应体。
+"""
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.postgres import begin_request_tracking
+from app.services.recent_writes import recent_writes_service, user_id_from_authorization
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp, sticky_seconds: int) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        user_id = user_id_from_authorization(Headers(scope=scope).get("authorization"))
+        tracker = begin_request_tracking(user_id)
+
+        async def send_wrapper(message: Message) -> None:
+            # 路由在发送响应头之前完成提交，此时已能确定是否写过数据；
+            # 先记录再发送响应，客户端收到响应后发起的读请求一定能看到记录
+            if message["type"] == "http.response.start" and tracker["wrote"] and user_id:
+                await recent_writes_service.mark(user_id, self.sticky_seconds)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -5,9 +5,9 @@ from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, Numeric, String, Text, UniqueConstraint
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, Numeric, String, Text, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PGUUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
 
@@ -26,6 +26,9 @@ class User(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class Paper(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "papers"
+    __table_args__ = (
+        Index("idx_papers_updated_at", "updated_at"),
+    )
 
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     authors: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
@@ -44,9 +47,17 @@ class Paper(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     file_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     created_by: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
 
+    # 关联一律 lazy="raise"：异步会话中不能隐式懒加载，需要时用 selectinload 等显式加载
+    author_list: Mapped[list[PaperAuthor]] = relationship(
+        back_populates="paper", order_by="PaperAuthor.order_index", lazy="raise", passive_deletes=True
+    )
+
 
 class Patent(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "patents"
+    __table_args__ = (
+        Index("idx_patents_updated_at", "updated_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
     patent_number: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -66,6 +77,9 @@ class Patent(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class SoftwareCopyright(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "software_copyrights"
+    __table_args__ = (
+        Index("idx_software_copyrights_updated_at", "updated_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
     registration_number: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -84,6 +98,9 @@ class SoftwareCopyright(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class Project(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("idx_projects_updated_at", "updated_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
     project_number: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -103,9 +120,16 @@ class Project(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     startup_command: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="启动命令")
     created_by: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
 
+    milestones: Mapped[list[ProjectMilestone]] = relationship(
+        back_populates="project", order_by="ProjectMilestone.due_date", lazy="raise", passive_deletes=True
+    )
+
 
 class Competition(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "competitions"
+    __table_args__ = (
+        Index("idx_competitions_updated_at", "updated_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
     level: Mapped[str] = mapped_column(String(20), nullable=False)
@@ -124,6 +148,9 @@ class Competition(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class Conference(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "conferences"
+    __table_args__ = (
+        Index("idx_conferences_updated_at", "updated_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
     level: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
@@ -145,6 +172,9 @@ class Conference(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class Cooperation(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "cooperations"
+    __table_args__ = (
+        Index("idx_cooperations_updated_at", "updated_at"),
+    )
 
     organization: Mapped[str] = mapped_column(String(200), nullable=False)
     content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -165,6 +195,9 @@ class Cooperation(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class Resource(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "resources"
+    __table_args__ = (
+        Index("idx_resources_updated_at", "updated_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
     resource_type: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -183,6 +216,11 @@ class Resource(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     is_public: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_by: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
 
+    # 使用记录数量不设上限，按页单独查询（见 CRUDResource.get_usage_logs），不随资源加载
+    usage_logs: Mapped[list[ResourceUsageLog]] = relationship(
+        back_populates="resource", lazy="raise", passive_deletes=True
+    )
+
 
 class Relationship(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "relationships"
@@ -227,16 +265,74 @@ class AchievementTag(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 class PaperAuthor(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "paper_authors"
 
-    paper_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("papers.id"), nullable=False)
+    paper_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("papers.id"), nullable=False, index=True)
     author_id: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     author_name: Mapped[str] = mapped_column(String(100), nullable=False)
     affiliation: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     contribution_level: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     order_index: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
+    paper: Mapped[Paper] = relationship(back_populates="author_list", lazy="raise")
+
+
+class PaperProject(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """论文-项目关联表（由 papers.related_projects 规范化而来）"""
+    __tablename__ = "paper_projects"
+    __table_args__ = (
+        UniqueConstraint("paper_id", "project_id", name="uq_paper_projects"),
+        Index("idx_paper_projects_project_id", "project_id"),
+    )
+
+    paper_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("papers.id", ondelete="CASCADE"), nullable=False)
+    project_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+
+
+class AuthorMetric(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """作者指标表（由离线任务 author_metrics_service.refresh 计算）"""
+    __tablename__ = "author_metrics"
+
+    author_name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    author_id: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    paper_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)
+    first_author_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_citations: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h_index: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)
+    coauthor_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, comment="合作者数量（合著网络度数）")
+    degree_centrality: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    pagerank: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    active_years: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    papers_per_year: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class KeywordField(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """关键词-研究领域映射表（keyword 为小写、去空格后的规范形式）"""
+    __tablename__ = "keyword_fields"
+
+    keyword: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    field: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+
+
+class StoredFile(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """内容寻址的上传文件（相同内容只存一份，由各成果表的 image_path/file_path 引用）"""
+    __tablename__ = "stored_files"
+    __table_args__ = (
+        Index("idx_stored_files_unreferenced", "updated_at", postgresql_where=text("ref_count = 0")),
+    )
+
+    sha256: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    storage_path: Mapped[str] = mapped_column(String(500), unique=True, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    original_filename: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, comment="被成果记录引用的次数")
+
 
 class ProjectMilestone(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "project_milestones"
+    __table_args__ = (
+        Index("idx_project_milestones_project_id", "project_id"),
+    )
 
     project_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -246,6 +342,8 @@ class ProjectMilestone(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     completion_percent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     responsible_person: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
 
+    project: Mapped[Project] = relationship(back_populates="milestones", lazy="raise")
+
 
 class Reminder(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "reminders"
@@ -262,6 +360,9 @@ class Reminder(UUIDPrimaryKeyMixin, TimestampMixin, Base):
 
 class ResourceUsageLog(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "resource_usage_logs"
+    __table_args__ = (
+        Index("idx_resource_usage_logs_resource_date", "resource_id", "usage_date"),
+    )
 
     resource_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("resources.id"), nullable=False)
     user_id: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -271,6 +372,16 @@ class ResourceUsageLog(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     usage_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+    resource: Mapped[Resource] = relationship(back_populates="usage_logs", lazy="raise")
+
+
+class ResourceDownloadFlush(Base):
+    """已写回数据库的下载增量批次（保证同一批增量只累加一次）"""
+    __tablename__ = "resource_download_flushes"
+
+    batch_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    flushed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False, index=True)
+
 
 class ResourceMaintenanceTask(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "resource_maintenance_tasks"
@@ -292,6 +403,27 @@ class SearchSavedView(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     filters: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    target: Mapped[str] = mapped_column(String(50), default="papers", nullable=False, comment="papers/patents/projects/...")
+    keyword: Mapped[Optional[str]] = mapped_column(String(200), nullable=True, comment="搜索关键词")
+    compiled_query: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="生成结果快照的查询语句")
+    watermark: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, comment="快照已覆盖到的 updated_at")
+    source_version: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, comment="快照对应的表版本号")
+    result_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    refreshed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class SearchSavedViewResult(Base):
+    """保存的搜索视图的结果快照（按 sort_at, item_id 倒序键集分页）"""
+    __tablename__ = "search_saved_view_results"
+    __table_args__ = (
+        Index("idx_search_saved_view_results_keyset", "view_id", "sort_at", "item_id"),
+    )
+
+    view_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("search_saved_views.id", ondelete="CASCADE"), primary_key=True
+    )
+    item_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    sort_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, comment="成果的 created_at")
 
 
 class ProjectStartupRequest(UUIDPrimaryKeyMixin, TimestampMixin, Base):
@@ -309,3 +441,7 @@ class ProjectStartupRequest(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, comment="过期时间（1小时后）")
     process_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, comment="进程 ID")
     is_running: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, comment="是否运行中")
+
+    project: Mapped[Project] = relationship(lazy="raise")
+    requester: Mapped[User] = relationship(foreign_keys=[requester_id], lazy="raise")
+    approver: Mapped[Optional[User]] = relationship(foreign_keys=[approver_id], lazy="raise")
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel
@@ -34,6 +35,20 @@ class TopAuthor(BaseSchema):
     h_index: int
 
 
+class AuthorMetricResponse(BaseSchema):
+    author_name: str
+    paper_count: int
+    first_author_count: int
+    total_citations: int
+    h_index: int
+    coauthor_count: int
+    degree_centrality: float
+    pagerank: float
+    active_years: int
+    papers_per_year: float
+    computed_at: datetime
+
+
 class AnalyticsOverviewResponse(BaseModel):
     summary: Summary
     trends: list[Trend]
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Generic, Optional, TypeVar
+from typing import Any, Generic, Optional, TypeVar
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.globals import system_config
 
 T = TypeVar("T")
 
@@ -29,12 +31,19 @@ class PaginationParams(BaseModel):
         return (self.page - 1) * self.size
 
 
+class FacetCount(BaseModel):
+    value: Any
+    count: int
+
+
 class PaginatedResponse(BaseModel, Generic[T]):
     items: list[T]
     total: int
     page: int
     size: int
     pages: int
+    # 请求了 facets 参数时返回：分面名 -> 各取值的记录数（按数量降序）
+    facets: Optional[dict[str, list[FacetCount]]] = None
 
 
 class StatsResponse(BaseModel):
@@ -50,3 +59,12 @@ class FilterParams(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     search: Optional[str] = None
+
+
+class BatchDeleteRequest(BaseModel):
+    ids: list[UUID] = Field(..., min_length=1, max_length=system_config.BATCH_MAX_ITEMS)
+
+
+class BatchDeleteResponse(BaseModel):
+    deleted: int
+    ids: list[UUID]
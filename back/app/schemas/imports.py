@@ -0,0 +1,21 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    row: int
+    column: Optional[str] = None
+    message: str
+
+
+class ImportResult(BaseModel):
+    entity: str
+    total_rows: int
+    inserted: int
+    updated: int
+    skipped: int
+    error_count: int
+    errors: list[ImportRowError]
+    ignored_columns: list[str]
+    dry_run: bool
@@ -31,6 +31,14 @@ class KnowledgeGraphResponse(BaseModel):
     stats: GraphStats
 
 
+class GraphExpandResponse(BaseModel):
+    """邻域展开结果：nodes 只包含客户端尚未见过的节点"""
+    nodes: list[GraphNode]
+    edges: list[GraphEdge]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
 class KeyRelationship(BaseSchema):
     source: str
     target: str
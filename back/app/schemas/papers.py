@@ -3,7 +3,9 @@ from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.core.globals import system_config
 
 from .common import BaseSchema, TimestampSchema, UUIDSchema
 
@@ -48,10 +50,28 @@ class PaperUpdate(BaseModel):
     file_path: Optional[str] = None
 
 
+class PaperBatchUpdate(BaseModel):
+    ids: list[UUID] = Field(..., min_length=1, max_length=system_config.BATCH_MAX_ITEMS)
+    changes: PaperUpdate
+
+
 class PaperResponse(PaperBase, UUIDSchema, TimestampSchema):
     created_by: Optional[UUID] = None
 
 
+class PaperAuthorResponse(BaseSchema):
+    id: UUID
+    author_id: Optional[UUID] = None
+    author_name: str
+    affiliation: Optional[str] = None
+    contribution_level: int
+    order_index: int
+
+
+class PaperDetailResponse(PaperResponse):
+    author_list: list[PaperAuthorResponse] = []
+
+
 class PaperListItem(BaseSchema):
     id: UUID
     title: str
@@ -3,7 +3,9 @@ from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.core.globals import system_config
 
 from .common import BaseSchema, TimestampSchema, UUIDSchema
 
@@ -44,6 +46,11 @@ class PatentUpdate(BaseModel):
     file_path: Optional[str] = None
 
 
+class PatentBatchUpdate(BaseModel):
+    ids: list[UUID] = Field(..., min_length=1, max_length=system_config.BATCH_MAX_ITEMS)
+    changes: PatentUpdate
+
+
 class PatentResponse(PatentBase, UUIDSchema, TimestampSchema):
     created_by: Optional[UUID] = None
 
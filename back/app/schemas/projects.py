@@ -83,3 +83,7 @@ class ProjectMilestoneCreate(ProjectMilestoneBase):
 
 class ProjectMilestoneResponse(ProjectMilestoneBase, UUIDSchema, TimestampSchema):
     project_id: UUID
+
+
+class ProjectDetailResponse(ProjectResponse):
+    milestones: list[ProjectMilestoneResponse] = []
@@ -3,7 +3,9 @@ from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.core.globals import system_config
 
 from .common import BaseSchema, TimestampSchema, UUIDSchema
 
@@ -17,8 +19,6 @@ class ResourceBase(BaseSchema):
     maintenance_cycle_days: Optional[int] = None
     next_maintenance_date: Optional[date] = None
     license: Optional[str] = None
-    download_count: int = 0
-    usage_rate: Optional[Decimal] = None
     image_path: Optional[str] = None
     file_path: Optional[str] = None
     external_url: Optional[str] = None
@@ -39,8 +39,6 @@ class ResourceUpdate(BaseModel):
     maintenance_cycle_days: Optional[int] = None
     next_maintenance_date: Optional[date] = None
     license: Optional[str] = None
-    download_count: Optional[int] = None
-    usage_rate: Optional[Decimal] = None
     image_path: Optional[str] = None
     file_path: Optional[str] = None
     external_url: Optional[str] = None
@@ -48,7 +46,15 @@ class ResourceUpdate(BaseModel):
     is_public: Optional[bool] = None
 
 
+class ResourceBatchUpdate(BaseModel):
+    ids: list[UUID] = Field(..., min_length=1, max_length=system_config.BATCH_MAX_ITEMS)
+    changes: ResourceUpdate
+
+
 class ResourceResponse(ResourceBase, UUIDSchema, TimestampSchema):
+    # 下载次数由计数服务写回，使用率由使用记录计算，均不接受手工录入
+    download_count: int = 0
+    usage_rate: Optional[Decimal] = None
     created_by: Optional[UUID] = None
 
 
@@ -1,7 +1,8 @@
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Optional
+from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.common import BaseSchema
 
@@ -26,3 +27,63 @@ class SearchResponse(BaseModel):
     pages: int
     query: str
     search_time: float
+
+
+class TypeaheadItem(BaseModel):
+    type: str
+    id: UUID
+    title: str
+    url: str
+
+
+class TypeaheadResponse(BaseModel):
+    query: str
+    items: list[TypeaheadItem]
+    ready: bool
+    took_ms: float
+
+
+class SavedViewCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    target: str = Field(..., description="papers|patents|projects|competitions|conferences|cooperations|software_copyrights|resources")
+    keyword: Optional[str] = Field(None, max_length=200)
+    filters: dict[str, Any] = Field(default_factory=dict)
+
+
+class SavedViewUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+    keyword: Optional[str] = Field(None, max_length=200)
+    filters: Optional[dict[str, Any]] = None
+
+
+class SavedViewResponse(BaseSchema):
+    id: UUID
+    name: str
+    description: Optional[str] = None
+    target: str
+    keyword: Optional[str] = None
+    filters: dict[str, Any]
+    result_count: int
+    refreshed_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class SavedViewResultItem(BaseModel):
+    id: UUID
+    type: str
+    title: str
+    status: Optional[str] = None
+    url: str
+    created_at: datetime
+
+
+class SavedViewResultsResponse(BaseModel):
+    items: list[SavedViewResultItem]
+    total: int
+    next_cursor: Optional[str] = None
+    # 本次打开时重新评估的变化行数，-1 表示重建了整个快照
+    reevaluated: int
+    took_ms: float
@@ -0,0 +1,237 @@
+"""作者指标离线计算服务
+
+基于 paper_authors 与 papers.citation_count 计算：
+- 真实 h 指数、总被引、论文数、第一作者论文数
+- 合著网络的度数、度中心性与 PageRank（SciPy 稀疏矩阵）
+- 产出效率（活跃年数、年均论文数）
+
+结果写入 author_metrics 表，接口直接读取预计算结果。
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.postgres import get_session
+from app.models.tables import AuthorMetric, Paper, PaperAuthor
+from app.services.cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+def compute_h_index(citations: list[int]) -> int:
+    """h 指数：至少有 h 篇论文被引次数不少于 h"""
+    h = 0
+    for rank, count in enumerate(sorted(citations, reverse=True), start=1):
+        if count < rank:
+            break
+        h = rank
+    return h
+
+
+def pagerank(
+    adjacency: sp.csr_matrix,
+    damping: float = 0.85,
+    tol: float = 1e-8,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """加权无向图的 PageRank（幂迭代，悬挂节点均匀分配）"""
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inv_weight = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    # 行归一化后转置，得到列随机矩阵
+    transition = (sp.diags(inv_weight) @ adjacency).T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        next_rank = damping * (transition @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        converged = np.abs(next_rank - rank).sum() < n * tol
+        rank = next_rank
+        if converged:
+            break
+    return rank
+
+
+@dataclass
+class _AuthorAccumulator:
+    author_id: Optional[UUID] = None
+    citations: dict[UUID, int] = field(default_factory=dict)
+    first_author_papers: set[UUID] = field(default_factory=set)
+    years: set[int] = field(default_factory=set)
+
+
+def compute_author_metrics(rows: list[tuple], computed_at: datetime) -> list[dict]:
+    """根据 (author_name, author_id, paper_id, order_index, citation_count, publish_date) 行计算指标
+
+    同一作者在同一论文中重复出现时只计一次。
+    """
+    authors: dict[str, _AuthorAccumulator] = {}
+    for author_name, author_id, paper_id, order_index, citation_count, publish_date in rows:
+        acc = authors.setdefault(author_name, _AuthorAccumulator())
+        if author_id and acc.author_id is None:
+            acc.author_id = author_id
+        acc.citations[paper_id] = citation_count or 0
+        if order_index == 0:
+            acc.first_author_papers.add(paper_id)
+        if publish_date:
+            acc.years.add(publish_date.year)
+
+    names = list(authors)
+    if not names:
+        return []
+
+    # 作者 x 论文 关联矩阵 B，合著矩阵 A = B·Bᵀ（对角线为自身论文数，需清零）
+    author_index = {name: idx for idx, name in enumerate(names)}
+    paper_index: dict[UUID, int] = {}
+    row_idx: list[int] = []
+    col_idx: list[int] = []
+    for name, acc in authors.items():
+        for paper_id in acc.citations:
+            row_idx.append(author_index[name])
+            col_idx.append(paper_index.setdefault(paper_id, len(paper_index)))
+
+    incidence = sp.csr_matrix(
+        (np.ones(len(row_idx)), (row_idx, col_idx)),
+        shape=(len(names), len(paper_index)),
+    )
+    coauthorship = (incidence @ incidence.T).tolil()
+    coauthorship.setdiag(0)
+    coauthorship = coauthorship.tocsr()
+    coauthorship.eliminate_zeros()
+
+    degree = np.diff(coauthorship.indptr)
+    degree_centrality = degree / (len(names) - 1) if len(names) > 1 else np.zeros(len(names))
+    ranks = pagerank(coauthorship)
+
+    metrics = []
+    for idx, name in enumerate(names):
+        acc = authors[name]
+        citations = list(acc.citations.values())
+        active_years = (max(acc.years) - min(acc.years) + 1) if acc.years else 0
+        metrics.append({
+            "author_name": name,
+            "author_id": acc.author_id,
+            "paper_count": len(citations),
+            "first_author_count": len(acc.first_author_papers),
+            "total_citations": sum(citations),
+            "h_index": compute_h_index(citations),
+            "coauthor_count": int(degree[idx]),
+            "degree_centrality": float(degree_centrality[idx]),
+            "pagerank": float(ranks[idx]),
+            "active_years": active_years,
+            "papers_per_year": round(len(citations) / active_years, 2) if active_years else 0.0,
+            "computed_at": computed_at,
+        })
+    return metrics
+
+
+class AuthorMetricsService:
+    """作者指标服务类"""
+
+    UPSERT_BATCH_SIZE = 1000
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """重新计算并写入全部作者指标，返回作者数量"""
+        result = await db.execute(
+            select(
+                PaperAuthor.author_name,
+                PaperAuthor.author_id,
+                PaperAuthor.paper_id,
+                PaperAuthor.order_index,
+                Paper.citation_count,
+                Paper.publish_date,
+            ).join(Paper, Paper.id == PaperAuthor.paper_id)
+        )
+        rows = [tuple(row) for row in result.all()]
+
+        computed_at = datetime.now(timezone.utc)
+        # 矩阵计算为 CPU 密集型，放到线程池避免阻塞事件循环
+        metrics = await asyncio.to_thread(compute_author_metrics, rows, computed_at)
+
+        for start in range(0, len(metrics), self.UPSERT_BATCH_SIZE):
+            batch = metrics[start:start + self.UPSERT_BATCH_SIZE]
+            stmt = insert(AuthorMetric).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AuthorMetric.author_name],
+                set_={
+                    key: stmt.excluded[key]
+                    for key in batch[0]
+                    if key != "author_name"
+                } | {"updated_at": func.now()},
+            )
+            await db.execute(stmt)
+
+        # 删除已不存在的作者
+        await db.execute(delete(AuthorMetric).where(AuthorMetric.computed_at < computed_at))
+        await db.commit()
+
+        logger.info(f"作者指标已刷新: {len(metrics)} 位作者")
+        return len(metrics)
+
+    async def get_top_authors(self, db: AsyncSession, *, limit: int = 10) -> list[AuthorMetric]:
+        """按论文数读取预计算的作者指标
+
+        只读查询，可在只读副本上执行；表尚未计算时返回空列表，
+        由启动任务、compute_author_metrics.py 或刷新接口负责写入。
+        """
+        query = (
+            select(AuthorMetric)
+            .order_by(AuthorMetric.paper_count.desc(), AuthorMetric.h_index.desc())
+            .limit(limit)
+        )
+        return list((await db.execute(query)).scalars().all())
+
+    async def ensure_computed(self) -> None:
+        """表为空时在主库上计算一次（应用启动时在后台执行）"""
+        async for db in get_session():
+            try:
+                if (await db.execute(select(AuthorMetric.author_name).limit(1))).first() is None:
+                    if await self.refresh(db):
+                        # 计算完成前缓存的 overview / export 中作者列表为空
+                        await cache_service.delete_pattern("analytics:*")
+            except Exception as e:
+                logger.warning(f"作者指标初始计算失败: {e}")
+            break
+
+    def start(self) -> None:
+        """在后台补算作者指标，不阻塞应用启动"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.ensure_computed())
+
+    async def stop(self) -> None:
+        """取消尚未完成的初始计算（应用关闭时调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get_overall_h_index(self, db: AsyncSession) -> int:
+        """全部论文的整体 h 指数（单条窗口函数查询）"""
+        ranked = select(
+            Paper.citation_count,
+            func.row_number().over(order_by=Paper.citation_count.desc()).label("rank"),
+        ).subquery()
+        query = select(func.count()).select_from(ranked).where(ranked.c.citation_count >= ranked.c.rank)
+        return (await db.execute(query)).scalar() or 0
+
+
+# 创建全局实例
+author_metrics_service = AuthorMetricsService()
@@ -0,0 +1,545 @@
+"""成果数据批量导入服务
+
+前端原先逐行调用各成果的创建接口导入 CSV，数千行就是数千次请求、数千次提交
+和数千条操作日志。本服务在服务端一次完成：
+
+- 在线程池中流式读取 CSV / XLSX，按模型列类型逐行校验并转换，收集行级错误；
+- 每批校验通过的行通过 COPY ... FROM STDIN 写入事务级临时表；
+- 用一条语句把临时表合并到目标表：有业务编号（DOI、专利号等）的成果按编号
+  更新已有记录、插入新记录，其余成果直接插入；
+- 同步论文-项目关联表和上传文件引用计数，最后由路由写入一条汇总操作日志。
+"""
+import asyncio
+import codecs
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import ARRAY, Boolean, Column, Date, DateTime, Integer, Numeric, String, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.globals import system_config
+from app.crud.papers import crud_paper, extract_project_ids
+from app.models.tables import (
+    Competition,
+    Conference,
+    Cooperation,
+    Paper,
+    PaperProject,
+    Patent,
+    Project,
+    Resource,
+    SoftwareCopyright,
+)
+from app.services.file_storage import FILE_FIELDS, file_storage_service
+from app.services.table_versions import table_version_service
+
+# 可导入的成果类型 -> (模型, 用于匹配已有记录的业务编号列)
+# 没有业务编号的成果只做插入
+IMPORT_ENTITIES = {
+    "papers": (Paper, "doi"),
+    "patents": (Patent, "patent_number"),
+    "software_copyrights": (SoftwareCopyright, "registration_number"),
+    "projects": (Project, "project_number"),
+    "competitions": (Competition, None),
+    "conferences": (Conference, None),
+    "cooperations": (Cooperation, None),
+    "resources": (Resource, None),
+}
+
+# 由系统维护、不允许通过导入写入的列
+SYSTEM_COLUMNS = {"id", "created_at", "updated_at", "created_by"}
+PROTECTED_COLUMNS = {
+    # 启动脚本会在服务器上执行，只能通过审批流程设置
+    "projects": {"startup_script_path", "startup_command"},
+    # 由下载计数服务和使用记录维护
+    "resources": {"download_count", "usage_rate"},
+}
+
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+
+TRUE_VALUES = {"true", "t", "1", "yes", "y", "是"}
+FALSE_VALUES = {"false", "f", "0", "no", "n", "否"}
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d")
+LIST_SEPARATORS = re.compile(r"[,，;；]")
+
+# 引用计数按批调整，避免超出单条语句的参数数量上限
+SQL_CHUNK_SIZE = 5000
+
+_preparer = postgresql.dialect().identifier_preparer
+
+
+def _chunks(items: list, size: int = SQL_CHUNK_SIZE) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _detect_encoding(stream: BinaryIO) -> str:
+    """区分 UTF-8 与 Excel 中文环境常见的 GBK 编码导出"""
+    sample = stream.read(64 * 1024)
+    stream.seek(0)
+    try:
+        # 增量解码器允许样本末尾截断的多字节字符
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "gb18030"
+
+
+def _open_rows(stream: BinaryIO, extension: str) -> tuple[list[str], Iterator[tuple]]:
+    """打开上传文件，返回 (表头, 数据行迭代器)（在线程池中执行）"""
+    stream.seek(0)
+    if extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise HTTPException(status_code=400, detail="服务器未安装 openpyxl，暂不支持 xlsx 导入，请使用 CSV")
+        try:
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+        except Exception:
+            raise HTTPException(status_code=400, detail="无法解析 xlsx 文件")
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        wrapper = io.TextIOWrapper(stream, encoding=_detect_encoding(stream), newline="")
+        rows = (tuple(row) for row in csv.reader(wrapper))
+
+    header = next(rows, None)
+    if not header:
+        raise HTTPException(status_code=400, detail="文件为空或缺少表头")
+    return [str(name).strip() if name is not None else "" for name in header], rows
+
+
+def _coerce(column: Column, value: Any) -> Any:
+    """按列类型转换单元格的值，无法转换时抛出 ValueError（消息直接返回给用户）"""
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    if value is None:
+        return None
+
+    column_type = column.type
+    if isinstance(column_type, PGUUID):
+        try:
+            return value if isinstance(value, UUID) else UUID(str(value))
+        except ValueError:
+            raise ValueError("不是有效的UUID")
+
+    if isinstance(column_type, Boolean):
+        if isinstance(value, bool):
+            return value
+        lowered = str(value).strip().lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError("不是有效的布尔值")
+
+    if isinstance(column_type, Integer):
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError("不是有效的整数")
+        if number != number.to_integral_value():
+            raise ValueError("不是有效的整数")
+        number = int(number)
+        if not -2**31 <= number < 2**31:
+            raise ValueError("整数超出范围")
+        return number
+
+    if isinstance(column_type, Numeric):
+        try:
+            number = Decimal(str(value).replace(",", ""))
+        except InvalidOperation:
+            raise ValueError("不是有效的数字")
+        if not number.is_finite():
+            raise ValueError("不是有效的数字")
+        if column_type.precision is not None:
+            integer_digits = column_type.precision - (column_type.scale or 0)
+            if abs(number) >= Decimal(10) ** integer_digits:
+                raise ValueError("数值超出范围")
+        return number
+
+    if isinstance(column_type, DateTime):
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            raise ValueError("不是有效的日期时间")
+
+    if isinstance(column_type, Date):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(str(value), fmt).date()
+            except ValueError:
+                continue
+        raise ValueError("不是有效的日期（格式：YYYY-MM-DD）")
+
+    if isinstance(column_type, JSONB):
+        if not isinstance(value, str):
+            raise ValueError("不是有效的JSON")
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            raise ValueError("不是有效的JSON")
+        # COPY 时按文本传给 jsonb 编码器
+        return json.dumps(parsed, ensure_ascii=False)
+
+    if isinstance(column_type, ARRAY):
+        if isinstance(value, str) and value.startswith("["):
+            try:
+                items = json.loads(value)
+            except ValueError:
+                raise ValueError("不是有效的列表")
+            if not isinstance(items, list):
+                raise ValueError("不是有效的列表")
+        else:
+            items = LIST_SEPARATORS.split(str(value))
+        items = [str(item).strip() for item in items if item is not None and str(item).strip()]
+        return items or None
+
+    if isinstance(column_type, String):
+        if isinstance(value, float) and value.is_integer():
+            # xlsx 中的编号可能被识别为数字
+            value = int(value)
+        value = str(value)
+        if column_type.length is not None and len(value) > column_type.length:
+            raise ValueError(f"长度超过 {column_type.length} 个字符")
+        return value
+
+    return value
+
+
+class RowValidator:
+    """逐行校验并转换为 COPY 记录，同时收集行级错误"""
+
+    def __init__(
+        self,
+        *,
+        entity: str,
+        header: list[str],
+        columns: dict[str, Column],
+        key_column: Optional[str],
+        created_by: Optional[UUID],
+        max_errors: int,
+    ) -> None:
+        self.created_by = created_by
+        self.max_errors = max_errors
+
+        # 文件中出现的可导入列：(列, 在行中的位置)
+        self.file_columns: list[tuple[Column, int]] = []
+        self.ignored_columns: list[str] = []
+        seen: set[str] = set()
+        for index, name in enumerate(header):
+            if name in columns and name not in seen:
+                self.file_columns.append((columns[name], index))
+                seen.add(name)
+            elif name:
+                self.ignored_columns.append(name)
+
+        # 文件中缺少、但有默认值的必填列，插入时使用模型默认值
+        self.default_columns = [
+            column for name, column in columns.items()
+            if name not in seen and column.default is not None and column.default.is_scalar
+        ]
+        missing = [
+            name for name, column in columns.items()
+            if name not in seen and not column.nullable and column.default is None
+        ]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"文件缺少必填列：{', '.join(missing)}")
+
+        # COPY 到临时表的列顺序
+        self.record_columns = (
+            ["id", "created_by"]
+            + [column.name for column, _ in self.file_columns]
+            + [column.name for column in self.default_columns]
+        )
+        # 更新已有记录时只覆盖文件中出现的列
+        self.update_columns = [column.name for column, _ in self.file_columns]
+        self.has_related_projects = entity == "papers" and "related_projects" in seen
+        # 文件中没有业务编号列时无法匹配已有记录，只做插入
+        self.key_column = key_column if key_column in seen else None
+        self._key_index = self.update_columns.index(self.key_column) if self.key_column else None
+        self._related_index = (
+            self.update_columns.index("related_projects") if self.has_related_projects else None
+        )
+
+        self.total_rows = 0
+        self.invalid_rows = 0
+        self.errors: list[dict] = []
+        self.error_count = 0
+        self._key_rows: dict[Any, int] = {}
+        # 论文临时ID -> related_projects 中的项目ID
+        self.project_links: dict[UUID, set[UUID]] = {}
+
+    def _add_error(self, row: int, column: Optional[str], message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "column": column, "message": message})
+
+    def next_batch(self, rows: Iterator[tuple], size: int) -> list[tuple]:
+        """读取并校验下一批行（在线程池中执行），返回空列表表示读取完毕"""
+        records: list[tuple] = []
+        for values in rows:
+            # 第 1 行是表头
+            row_number = self.total_rows + 2
+            if not any(value not in (None, "") for value in values):
+                # 忽略空行，但保留行号
+                self.total_rows += 1
+                continue
+            self.total_rows += 1
+
+            record_values = []
+            valid = True
+            for column, index in self.file_columns:
+                raw = values[index] if index < len(values) else None
+                try:
+                    value = _coerce(column, raw)
+                except ValueError as e:
+                    self._add_error(row_number, column.name, str(e))
+                    valid = False
+                    continue
+                if value is None and not column.nullable:
+                    if column.default is not None and column.default.is_scalar:
+                        value = column.default.arg
+                    else:
+                        self._add_error(row_number, column.name, "必填字段为空")
+                        valid = False
+                        continue
+                record_values.append(value)
+
+            if valid and self._key_index is not None:
+                key = record_values[self._key_index]
+                if key is not None:
+                    first_row = self._key_rows.setdefault(key, row_number)
+                    if first_row != row_number:
+                        self._add_error(row_number, self.key_column, f"与第 {first_row} 行重复")
+                        valid = False
+
+            if not valid:
+                self.invalid_rows += 1
+                continue
+
+            record_id = uuid.uuid4()
+            if self.has_related_projects:
+                related = record_values[self._related_index]
+                self.project_links[record_id] = extract_project_ids(json.loads(related)) if related else set()
+
+            records.append(
+                (record_id, self.created_by, *record_values, *(column.default.arg for column in self.default_columns))
+            )
+            if len(records) >= size:
+                break
+        return records
+
+
+class BulkImportService:
+    """成果数据批量导入服务类"""
+
+    @staticmethod
+    def importable_columns(entity: str) -> dict[str, Column]:
+        model, _ = IMPORT_ENTITIES[entity]
+        excluded = SYSTEM_COLUMNS | PROTECTED_COLUMNS.get(entity, set())
+        return {
+            column.name: column
+            for column in model.__table__.columns
+            if column.name not in excluded
+        }
+
+    async def import_file(
+        self,
+        db: AsyncSession,
+        entity: str,
+        upload: UploadFile,
+        *,
+        created_by: Optional[UUID],
+        dry_run: bool = False,
+        skip_invalid: bool = False,
+    ) -> dict:
+        """导入 CSV / XLSX 文件
+
+        Args:
+            dry_run: 完整执行后回滚，用于预览插入/更新数量和错误
+            skip_invalid: 为 True 时跳过校验失败的行；否则存在错误时不写入任何数据
+        """
+        if entity not in IMPORT_ENTITIES:
+            raise HTTPException(
+                status_code=404,
+                detail=f"不支持导入的类型。可导入的类型：{', '.join(IMPORT_ENTITIES)}",
+            )
+        extension = Path(upload.filename or "").suffix.lower()
+        if extension not in IMPORT_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的文件格式。允许的格式：{', '.join(IMPORT_EXTENSIONS)}",
+            )
+        max_bytes = system_config.MAX_FILE_SIZE_MB * 1024 * 1024
+        if upload.size is not None and upload.size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"文件大小超过限制（最大 {system_config.MAX_FILE_SIZE_MB}MB）",
+            )
+
+        model, key_column = IMPORT_ENTITIES[entity]
+        table_name = model.__tablename__
+        header, rows = await asyncio.to_thread(_open_rows, upload.file, extension)
+        validator = RowValidator(
+            entity=entity,
+            header=header,
+            columns=self.importable_columns(entity),
+            key_column=key_column,
+            created_by=created_by,
+            max_errors=system_config.IMPORT_MAX_ERRORS,
+        )
+        staging = f"_import_{table_name}"
+        column_list = ", ".join(_preparer.quote(name) for name in validator.record_columns)
+        await db.execute(text(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {_preparer.quote(table_name)} WITH NO DATA"
+        ))
+        connection = await db.connection()
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+
+        while True:
+            records = await asyncio.to_thread(validator.next_batch, rows, system_config.IMPORT_BATCH_SIZE)
+            if not records:
+                break
+            await driver_connection.copy_records_to_table(
+                staging, records=records, columns=validator.record_columns
+            )
+
+        result = {
+            "entity": entity,
+            "total_rows": validator.total_rows,
+            "inserted": 0,
+            "updated": 0,
+            "skipped": validator.invalid_rows,
+            "error_count": validator.error_count,
+            "errors": validator.errors,
+            "ignored_columns": validator.ignored_columns,
+            "dry_run": dry_run,
+        }
+        if validator.error_count and not skip_invalid:
+            await db.rollback()
+            return result
+
+        file_fields = [field for field in FILE_FIELDS if hasattr(model, field)]
+        merged = (await db.execute(text(self._merge_sql(
+            table_name, staging, validator, file_fields
+        )))).all()
+
+        # 写入的记录ID -> 临时表中的行ID（业务编号重复的历史记录会被同一行更新）
+        sources: dict[UUID, UUID] = {}
+        updated_rows: set[UUID] = set()
+        old_files: list[Optional[str]] = []
+        new_files: list[Optional[str]] = []
+        for row in merged:
+            sources[row.id] = row.staging_id
+            if row.inserted:
+                result["inserted"] += 1
+            else:
+                updated_rows.add(row.staging_id)
+            mapping = row._mapping
+            old_files.extend(mapping[f"old_{field}"] for field in file_fields)
+            new_files.extend(mapping[f"new_{field}"] for field in file_fields)
+        result["updated"] = len(updated_rows)
+        for chunk in _chunks(old_files):
+            await file_storage_service.adjust_refs(db, chunk, -1)
+        for chunk in _chunks(new_files):
+            await file_storage_service.adjust_refs(db, chunk, 1)
+
+        if validator.has_related_projects:
+            await crud_paper.replace_project_links(db, {
+                paper_id: validator.project_links.get(staging_id, set())
+                for paper_id, staging_id in sources.items()
+            })
+
+        if dry_run:
+            await db.rollback()
+            return result
+
+        await db.commit()
+        tables = [table_name]
+        if validator.has_related_projects:
+            tables.append(PaperProject.__tablename__)
+        await table_version_service.bump(*tables)
+        return result
+
+    @staticmethod
+    def _merge_sql(
+        table_name: str,
+        staging: str,
+        validator: RowValidator,
+        file_fields: list[str],
+    ) -> str:
+        """生成把临时表合并到目标表的单条语句
+
+        返回每条写入记录的 (staging_id, id, inserted, old_<文件列>..., new_<文件列>...)，
+        用于统计插入/更新数量和调整文件引用计数。
+        """
+        quote = _preparer.quote
+        key_column = validator.key_column
+        target = quote(table_name)
+        columns = ", ".join(quote(name) for name in validator.record_columns)
+        source_columns = ", ".join(f"s.{quote(name)}" for name in validator.record_columns)
+
+        def file_list(alias: Optional[str], prefix: Optional[str] = None) -> str:
+            """文件列列表；alias 为 None 时输出 NULL，prefix 不为空时加别名 <prefix>_<列名>"""
+            items = []
+            for field in file_fields:
+                item = f"{alias}.{quote(field)}" if alias else "NULL"
+                items.append(f", {item} AS {prefix}_{field}" if prefix else f", {item}")
+            return "".join(items)
+
+        inserted = (
+            f"INSERT INTO {target} ({columns}) SELECT {source_columns} FROM {staging} s"
+            + ("" if key_column is None else
+               " WHERE NOT EXISTS (SELECT 1 FROM previous p WHERE p.staging_id = s.id)")
+            + f" RETURNING id{''.join(f', {quote(field)}' for field in file_fields)}"
+        )
+        select_inserted = (
+            f"SELECT i.id AS staging_id, i.id, true AS inserted"
+            f"{file_list(None, 'old')}{file_list('i', 'new')} FROM inserted i"
+        )
+        if key_column is None:
+            return f"WITH inserted AS ({inserted}) {select_inserted}"
+
+        key = quote(key_column)
+        assignments = ", ".join(
+            f"{quote(name)} = s.{quote(name)}" for name in validator.update_columns
+        )
+        # 所有 CTE 看到的是同一快照：previous 保存更新前的文件路径，
+        # inserted 依据 previous 排除已匹配到记录的行
+        return (
+            f"WITH previous AS ("
+            f"SELECT t.id, s.id AS staging_id{file_list('t')}"
+            f" FROM {target} t JOIN {staging} s ON t.{key} = s.{key}"
+            f"), updated AS ("
+            f"UPDATE {target} t SET {assignments}, updated_at = now()"
+            f" FROM {staging} s WHERE t.{key} = s.{key}"
+            f" RETURNING s.id AS staging_id, t.id{file_list('t')}"
+            f"), inserted AS ({inserted}) "
+            f"SELECT u.staging_id, u.id, false AS inserted{file_list('p', 'old')}{file_list('u', 'new')}"
+            f" FROM updated u JOIN previous p ON p.id = u.id"
+            f" UNION ALL {select_inserted}"
+        )
+
+
+# 创建全局实例
+bulk_import_service = BulkImportService()
@@ -1,10 +1,10 @@
 """Redis缓存服务"""
-import json
 from typing import Any, Optional
 from datetime import timedelta
 
 from app.db.redis import get_client
 from app.core.config import settings
+from app.core.serialization import dumps, loads
 
 
 class CacheService:
@@ -27,7 +27,7 @@ class CacheService:
             client = get_client()
             value = await client.get(key)
             if value:
-                return json.loads(value)
+                return loads(value)
             return None
         except Exception as e:
             print(f"Redis get error: {e}")
@@ -50,8 +50,7 @@ class CacheService:
             
         try:
             client = get_client()
-            json_value = json.dumps(value, ensure_ascii=False, default=str)
-            await client.setex(key, expire, json_value)
+            await client.setex(key, expire, dumps(value))
             return True
         except Exception as e:
             print(f"Redis set error: {e}")
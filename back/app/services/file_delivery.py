@@ -0,0 +1,316 @@
+"""文件下载服务
+
+为论文附件等大文件下载提供：
+
+- Range / If-Range 支持（断点续传、PDF 阅读器按需取页），多段 Range 返回
+  multipart/byteranges；
+- 零拷贝传输：ASGI 服务器支持 http.response.zerocopy 扩展时交给 sendfile，
+  支持 http.response.pathsend 时整文件交给服务器发送，否则在线程池中分块读取；
+- 可选的 X-Accel-Redirect（nginx）/ X-Sendfile（Apache、lighttpd）模式：
+  应用只做鉴权和查找，由前置服务器直接发送文件（Range 也由其处理）。
+"""
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.globals import system_config
+
+# back 目录，只解析一次
+BACK_DIR = Path(__file__).resolve().parent.parent.parent
+
+DOWNLOAD_MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# 单个请求允许的最大 Range 段数，防止大量小分段放大开销
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 请求无法满足（416）"""
+
+
+def parse_range_header(header: str, size: int) -> list[tuple[int, int]]:
+    """解析 Range 头，返回按起点排序并合并后的 [start, end) 区间列表
+
+    Raises:
+        RangeNotSatisfiable: 格式正确但没有任何可满足的区间
+        ValueError: 格式错误（按规范应忽略 Range 并返回完整内容）
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        raise ValueError("unsupported range unit")
+
+    ranges: list[tuple[int, int]] = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        start_str, sep, end_str = spec.partition("-")
+        if not sep:
+            raise ValueError("malformed range")
+        if not start_str:
+            # 后缀区间：最后 N 个字节
+            suffix = int(end_str)
+            if suffix <= 0:
+                continue
+            ranges.append((max(size - suffix, 0), size))
+            continue
+        start = int(start_str)
+        end = int(end_str) + 1 if end_str else size
+        if start > end - 1 and end_str:
+            raise ValueError("malformed range")
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    if len(ranges) > MAX_RANGES:
+        raise ValueError("too many ranges")
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(Response):
+    """支持 Range / If-Range / 条件请求的文件响应"""
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        stat_result: os.stat_result,
+        *,
+        media_type: str,
+        headers: Optional[dict] = None,
+    ) -> None:
+        self.path = path
+        self.stat_result = stat_result
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers.setdefault("content-type", media_type)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+        self.headers["etag"] = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+    def _validator_matches(self, if_range: str) -> bool:
+        """If-Range 只在强 ETag 或 Last-Modified 完全一致时生效"""
+        if_range = if_range.strip()
+        if if_range.startswith('"'):
+            return if_range == self.headers["etag"]
+        try:
+            return int(parsedate_to_datetime(if_range).timestamp()) == int(self.stat_result.st_mtime)
+        except (TypeError, ValueError):
+            return False
+
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            etag = self.headers["etag"]
+            return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        send_body = scope.get("method", "GET").upper() != "HEAD"
+        size = self.stat_result.st_size
+
+        if self._not_modified(request_headers):
+            for key in ("content-type", "content-disposition"):
+                if key in self.headers:
+                    del self.headers[key]
+            self.status_code = 304
+            await self._send_start(send, None)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        ranges: Optional[list[tuple[int, int]]] = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or self._validator_matches(if_range)):
+            try:
+                ranges = parse_range_header(range_header, size)
+            except RangeNotSatisfiable:
+                self.status_code = 416
+                self.headers["content-range"] = f"bytes */{size}"
+                await self._send_start(send, 0)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            except ValueError:
+                ranges = None
+
+        if ranges is None or ranges == [(0, size)]:
+            await self._send_start(send, size)
+            if send_body:
+                await self._send_file(scope, send, 0, size, whole_file=True)
+            else:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        self.status_code = 206
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+            await self._send_start(send, end - start)
+            if send_body:
+                await self._send_file(scope, send, start, end - start)
+            else:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        # 多段 Range：multipart/byteranges
+        boundary = os.urandom(12).hex()
+        part_type = self.headers["content-type"]
+        part_headers = [
+            (
+                f"--{boundary}\r\nContent-Type: {part_type}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        content_length = (
+            sum(len(part) for part in part_headers)
+            + sum(end - start for start, end in ranges)
+            + 2 * (len(ranges) - 1)  # 段之间的 \r\n
+            + len(closing)
+        )
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        await self._send_start(send, content_length)
+        if not send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        for idx, ((start, end), part_header) in enumerate(zip(ranges, part_headers)):
+            prefix = part_header if idx == 0 else b"\r\n" + part_header
+            await send({"type": "http.response.body", "body": prefix, "more_body": True})
+            await self._send_file(scope, send, start, end - start, more_body=True)
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
+    async def _send_start(self, send: Send, content_length: Optional[int]) -> None:
+        if content_length is not None:
+            self.headers["content-length"] = str(content_length)
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+    async def _send_file(
+        self,
+        scope: Scope,
+        send: Send,
+        offset: int,
+        count: int,
+        *,
+        whole_file: bool = False,
+        more_body: bool = False,
+    ) -> None:
+        extensions = scope.get("extensions") or {}
+
+        if "http.response.zerocopy" in extensions:
+            # 服务器通过 sendfile 直接从文件描述符发送
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": f,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": more_body,
+                })
+            return
+
+        if whole_file and not more_body and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(offset)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": more_body or remaining > 0,
+                })
+        if count == 0 and not more_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def resolve_download_path(stored_path: str) -> tuple[Path, os.stat_result]:
+    """解析存储路径并用一次 stat 完成存在性和类型检查"""
+    path = Path(stored_path.lstrip("/"))
+    if not path.is_absolute():
+        path = BACK_DIR / path
+    try:
+        st = path.stat()
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    return path, st
+
+
+def file_download_response(
+    stored_path: str,
+    *,
+    filename: Optional[str] = None,
+    media_type: Optional[str] = None,
+    headers: Optional[dict] = None,
+    inline: bool = False,
+) -> Response:
+    """构造文件下载响应
+
+    SystemConfig.DOWNLOAD_ACCEL_MODE 为 nginx / sendfile 时返回空响应体和
+    X-Accel-Redirect / X-Sendfile 头，由前置服务器发送文件。
+    """
+    path, st = resolve_download_path(stored_path)
+    filename = filename or path.name
+    media_type = media_type or DOWNLOAD_MEDIA_TYPES.get(path.suffix.lower(), "application/octet-stream")
+
+    # 对文件名进行URL编码以支持中文和特殊字符
+    disposition = "inline" if inline else "attachment"
+    response_headers = {"Content-Disposition": f"{disposition}; filename*=UTF-8''{quote(filename)}"}
+    response_headers.update(headers or {})
+
+    accel_mode = system_config.DOWNLOAD_ACCEL_MODE
+    if accel_mode:
+        try:
+            relative = path.resolve().relative_to(BACK_DIR)
+        except ValueError:
+            relative = None
+        if relative is not None:
+            if accel_mode == "nginx":
+                internal_uri = system_config.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative.as_posix())
+                response_headers["X-Accel-Redirect"] = internal_uri
+            else:
+                response_headers["X-Sendfile"] = str(path.resolve())
+            return Response(status_code=200, media_type=media_type, headers=response_headers)
+
+    return RangeFileResponse(path, st, media_type=media_type, headers=response_headers)
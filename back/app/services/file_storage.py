@@ -0,0 +1,235 @@
+"""内容寻址的上传文件存储服务
+
+- 上传内容在线程池中分块写入临时文件，同时计算 SHA-256，超过
+  SystemConfig.MAX_FILE_SIZE_MB 时立即中止；
+- 写完后移动到按哈希分片的路径 uploads/objects/ab/cd/<sha256><扩展名>，
+  内容相同的文件（无论来自论文、专利还是项目）只保存一份；
+- stored_files.ref_count 记录被成果记录 image_path/file_path 引用的次数，
+  由 CRUDBase 的写方法维护，未被引用的文件由 cleanup_uploads.py 定期清理。
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import delete, func, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.globals import system_config
+from app.models.tables import (
+    Competition,
+    Conference,
+    Cooperation,
+    Paper,
+    Patent,
+    Project,
+    Resource,
+    SoftwareCopyright,
+    StoredFile,
+)
+
+# back 目录，只解析一次
+BACK_DIR = Path(__file__).resolve().parent.parent.parent
+
+# 带 image_path/file_path 字段、可能引用上传文件的成果表
+FILE_REFERENCING_MODELS = (
+    Paper, Patent, SoftwareCopyright, Project, Competition, Conference, Cooperation, Resource,
+)
+FILE_FIELDS = ("image_path", "file_path")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".svg")
+DOCUMENT_EXTENSIONS = (".pdf", ".doc", ".docx")
+
+
+class FileTooLargeError(Exception):
+    """上传内容超过大小限制"""
+
+
+def _stream_to_temp(source: BinaryIO, tmp_dir: Path, max_bytes: int, chunk_size: int) -> tuple[str, str, int]:
+    """分块复制到临时文件并计算 SHA-256（在线程池中执行）
+
+    Returns:
+        (临时文件路径, sha256, 字节数)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise FileTooLargeError()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+
+def _commit_temp(tmp_path: str, target: Path) -> None:
+    """将临时文件移动到内容寻址路径；目标已存在时丢弃临时文件"""
+    if target.exists():
+        os.unlink(tmp_path)
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, target)
+
+
+class FileStorageService:
+    """内容寻址文件存储服务类"""
+
+    CHUNK_SIZE = 1024 * 1024  # 1MB
+
+    @property
+    def root(self) -> Path:
+        return BACK_DIR / system_config.UPLOAD_OBJECT_DIR
+
+    @staticmethod
+    def storage_path(digest: str, extension: str) -> str:
+        """相对 back 目录的存储路径（写入数据库的值）"""
+        return f"{system_config.UPLOAD_OBJECT_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    async def save_upload(
+        self,
+        db: AsyncSession,
+        upload: UploadFile,
+        *,
+        allowed_extensions: Iterable[str],
+    ) -> tuple[StoredFile, bool]:
+        """保存上传文件
+
+        Returns:
+            (StoredFile, 是否命中已有的相同内容)
+        """
+        extension = Path(upload.filename or "").suffix.lower()
+        allowed_extensions = list(allowed_extensions)
+        if extension not in allowed_extensions:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的文件格式。允许的格式：{', '.join(allowed_extensions)}",
+            )
+
+        max_bytes = system_config.MAX_FILE_SIZE_MB * 1024 * 1024
+        too_large = HTTPException(
+            status_code=413,
+            detail=f"文件大小超过限制（最大 {system_config.MAX_FILE_SIZE_MB}MB）",
+        )
+        # 已知大小时直接拒绝，不再复制
+        if upload.size is not None and upload.size > max_bytes:
+            raise too_large
+
+        tmp_dir = self.root / ".tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        await upload.seek(0)
+        try:
+            tmp_path, digest, size = await asyncio.to_thread(
+                _stream_to_temp, upload.file, tmp_dir, max_bytes, self.CHUNK_SIZE
+            )
+        except FileTooLargeError:
+            raise too_large
+
+        existing = await self.get_by_hash(db, digest)
+        if existing:
+            # 命中未被引用（ref_count=0）的文件时重新开始清理宽限期，
+            # 避免 cleanup_uploads.py 在成果记录保存之前把它删除
+            existing = (await db.scalars(
+                update(StoredFile)
+                .where(StoredFile.id == existing.id)
+                .values(updated_at=func.now())
+                .returning(StoredFile)
+            )).one_or_none()
+            await db.commit()
+        relative_path = existing.storage_path if existing else self.storage_path(digest, extension)
+        # 数据库中已有记录但文件丢失时，用本次上传的内容恢复
+        await asyncio.to_thread(_commit_temp, tmp_path, BACK_DIR / relative_path)
+        if existing:
+            return existing, True
+
+        stmt = insert(StoredFile).values(
+            sha256=digest,
+            storage_path=relative_path,
+            size=size,
+            content_type=upload.content_type,
+            original_filename=upload.filename,
+        ).on_conflict_do_nothing(index_elements=[StoredFile.sha256])
+        await db.execute(stmt)
+        await db.commit()
+        return await self.get_by_hash(db, digest), False
+
+    async def get_by_hash(self, db: AsyncSession, digest: str) -> Optional[StoredFile]:
+        result = await db.execute(select(StoredFile).where(StoredFile.sha256 == digest))
+        return result.scalar_one_or_none()
+
+    async def adjust_refs(self, db: AsyncSession, paths: Iterable[Optional[str]], delta: int) -> None:
+        """调整引用计数（不提交事务）；不在 stored_files 中的旧路径会被忽略"""
+        counts = Counter(path for path in paths if path)
+        if not counts:
+            return
+
+        # 同一路径可能同时出现在 image_path 和 file_path 中，按出现次数分组更新
+        by_count: dict[int, list[str]] = {}
+        for path, count in counts.items():
+            by_count.setdefault(count, []).append(path)
+
+        for count, group in by_count.items():
+            await db.execute(
+                update(StoredFile)
+                .where(StoredFile.storage_path.in_(group))
+                .values(
+                    ref_count=func.greatest(StoredFile.ref_count + delta * count, 0),
+                    updated_at=func.now(),
+                )
+            )
+
+    async def purge_unreferenced(self, db: AsyncSession, *, older_than: timedelta = timedelta(days=1)) -> int:
+        """删除超过宽限期仍未被引用的文件，返回删除数量
+
+        上传后尚未保存到成果记录的文件 ref_count 也为 0，宽限期用于避免误删；
+        删除前再直接检查各成果表，防止绕过 CRUD 写入的记录导致计数偏低。
+        """
+        cutoff = datetime.now(timezone.utc) - older_than
+        referenced = union_all(*[
+            select(getattr(model, field).label("path"))
+            .where(getattr(model, field).isnot(None))
+            for model in FILE_REFERENCING_MODELS
+            for field in FILE_FIELDS
+            if hasattr(model, field)
+        ]).subquery()
+
+        result = await db.execute(
+            select(StoredFile)
+            .where(StoredFile.ref_count == 0, StoredFile.updated_at < cutoff)
+            .where(StoredFile.storage_path.not_in(select(referenced.c.path)))
+        )
+        orphans = list(result.scalars().all())
+        if not orphans:
+            return 0
+
+        # 删除时再次检查条件：期间重新上传（刷新了 updated_at）或被引用的文件保留
+        deleted = await db.execute(
+            delete(StoredFile)
+            .where(StoredFile.id.in_([orphan.id for orphan in orphans]))
+            .where(StoredFile.ref_count == 0, StoredFile.updated_at < cutoff)
+            .returning(StoredFile.storage_path)
+        )
+        paths = list(deleted.scalars().all())
+        await db.commit()
+
+        for path in paths:
+            try:
+                (BACK_DIR / path).unlink(missing_ok=True)
+            except OSError as e:
+                print(f"删除文件失败 {path}: {e}")
+        return len(paths)
+
+
+# 创建全局实例
+file_storage_service = FileStorageService()
@@ -0,0 +1,173 @@
+"""知识图谱列式编码服务
+
+将 KnowledgeGraphResponse 的节点/边列表转换为紧凑的列式结构：
+- 节点类型、关系类型、属性键等重复字符串放入 strings 字符串表，只传索引；
+- 边使用节点下标数组 (source_idx, target_idx, type_idx) 表示；
+- 属性按键拆成与节点对齐的列，缺失值为 None。
+
+可选再经 gzip 压缩（请求的 Accept-Encoding 接受 gzip 时）或 MessagePack 编码后返回。
+"""
+import gzip
+from typing import Any, Iterable, Optional
+
+import msgpack
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from app.core.serialization import dumps
+from app.middleware.compression import accepts_encoding
+from app.schemas.knowledge_graph import GraphEdge, GraphNode, GraphStats
+
+COLUMNAR_VERSION = 1
+GRAPH_FORMATS = ("json", "columnar")
+GRAPH_ENCODINGS = ("json", "gzip", "msgpack")
+
+
+def check_graph_format(format: str) -> None:
+    """校验图谱接口的 format 参数，未知取值返回 400（避免拼写错误时静默退回 JSON）"""
+    if format not in GRAPH_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的格式：{format}，可选：{', '.join(GRAPH_FORMATS)}",
+        )
+
+
+class StringTable:
+    """字符串驻留表，相同字符串只保存一次"""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._index: dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._index[value] = idx
+            self.values.append(value)
+        return idx
+
+
+def build_columnar_graph(
+    nodes: Iterable[GraphNode],
+    edges: Iterable[GraphEdge],
+    stats: Optional[GraphStats] = None,
+    *,
+    include_properties: bool = True,
+) -> dict[str, Any]:
+    """构建列式图数据
+
+    两端节点不在 nodes 中的边会被丢弃，保证所有下标都有效。
+    """
+    strings = StringTable()
+
+    node_ids: list[str] = []
+    node_labels: list[str] = []
+    node_types: list[int] = []
+    node_index: dict[str, int] = {}
+    properties: dict[int, list[Any]] = {}
+
+    for position, node in enumerate(nodes):
+        node_index[node.id] = position
+        node_ids.append(node.id)
+        node_labels.append(node.label)
+        node_types.append(strings.intern(node.type))
+
+        if include_properties:
+            for key, value in node.properties.items():
+                key_idx = strings.intern(key)
+                column = properties.get(key_idx)
+                if column is None:
+                    column = [None] * position
+                    properties[key_idx] = column
+                column.append(value)
+            # 补齐本节点缺失的属性列
+            for column in properties.values():
+                if len(column) <= position:
+                    column.append(None)
+
+    edge_source: list[int] = []
+    edge_target: list[int] = []
+    edge_type: list[int] = []
+    edge_weight: list[float] = []
+
+    for edge in edges:
+        source_idx = node_index.get(edge.source)
+        target_idx = node_index.get(edge.target)
+        if source_idx is None or target_idx is None:
+            continue
+        edge_source.append(source_idx)
+        edge_target.append(target_idx)
+        edge_type.append(strings.intern(edge.relationship))
+        edge_weight.append(edge.weight)
+
+    # 权重全为 1.0 时省略该列
+    if all(weight == 1.0 for weight in edge_weight):
+        edge_weight = []
+
+    payload: dict[str, Any] = {
+        "format": "columnar",
+        "version": COLUMNAR_VERSION,
+        "strings": strings.values,
+        "nodes": {
+            "id": node_ids,
+            "label": node_labels,
+            "type": node_types,
+            # msgpack 要求 map 的键为字符串，属性键索引转为字符串
+            "properties": {str(key): column for key, column in properties.items()},
+        },
+        "edges": {
+            "source": edge_source,
+            "target": edge_target,
+            "type": edge_type,
+            "weight": edge_weight,
+        },
+    }
+    if stats is not None:
+        payload["stats"] = stats.model_dump()
+    return payload
+
+
+def encode_graph_payload(payload: dict[str, Any], encoding: str = "json") -> bytes:
+    """按指定编码序列化列式图数据"""
+    if encoding == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True, default=str)
+
+    body = dumps(payload)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def columnar_graph_response(
+    nodes: Iterable[GraphNode],
+    edges: Iterable[GraphEdge],
+    stats: Optional[GraphStats] = None,
+    *,
+    encoding: str = "json",
+    include_properties: bool = True,
+    accept_encoding: Optional[str] = None,
+) -> Response:
+    """构建列式图数据响应，绕过 response_model 的逐对象校验
+
+    encoding=gzip 但请求的 Accept-Encoding 不接受 gzip 时退回未压缩的 JSON。
+    """
+    if encoding not in GRAPH_ENCODINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的编码：{encoding}，可选：{', '.join(GRAPH_ENCODINGS)}",
+        )
+    gzip_requested = encoding == "gzip"
+    if gzip_requested and not accepts_encoding(accept_encoding, "gzip"):
+        encoding = "json"
+
+    payload = build_columnar_graph(nodes, edges, stats, include_properties=include_properties)
+    body = encode_graph_payload(payload, encoding)
+
+    if encoding == "msgpack":
+        return Response(content=body, media_type="application/msgpack")
+
+    headers = {"Vary": "Accept-Encoding"} if gzip_requested else None
+    if encoding == "gzip":
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
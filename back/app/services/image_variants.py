@@ -0,0 +1,255 @@
+"""图片变体服务
+
+列表卡片只需要缩略图，原图往往是数 MB 的照片。本服务按 ?w=&h=&fmt= 参数生成
+缩放/转码后的图片变体：
+
+- 缩放在有界进程池中执行，不阻塞事件循环；
+- 结果按「原图内容哈希 + 变体参数」缓存在磁盘上，原图不变则永久复用；
+- 响应带强 ETag（由内容哈希和变体参数决定），命中 If-None-Match 时返回 304；
+- /{id}/image 地址不随图片内容变化，默认 no-cache（每次用 ETag 重新验证）；
+  带 ?v=<内容哈希> 的地址内容不会变化，才允许长期缓存；
+- 上传图片后可预生成标准尺寸（见 SystemConfig.IMAGE_STANDARD_WIDTHS）。
+"""
+import asyncio
+import hashlib
+import os
+import stat
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from app.core.globals import system_config
+
+# back 目录，只解析一次
+BACK_DIR = Path(__file__).resolve().parent.parent.parent
+
+MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+}
+
+# 可输出的变体格式 -> (Pillow 格式名, 文件扩展名)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+    "png": ("PNG", ".png"),
+}
+
+# Pillow 无法处理的矢量格式，始终返回原图
+PASSTHROUGH_EXTENSIONS = {".svg"}
+
+
+def resolve_upload_path(stored_path: str) -> Path:
+    """将数据库中保存的相对路径解析为绝对路径"""
+    path = Path(stored_path.lstrip("/"))
+    if not path.is_absolute():
+        path = BACK_DIR / path
+    return path
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render_variant(
+    source: str,
+    target: str,
+    width: Optional[int],
+    height: Optional[int],
+    fmt: str,
+    quality: int,
+) -> None:
+    """生成单个变体（在子进程中执行，必须是模块级函数）"""
+    from PIL import Image, ImageOps
+
+    pil_format, _ = VARIANT_FORMATS[fmt]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if width or height:
+            # thumbnail 保持宽高比且不会放大
+            image.thumbnail((width or image.width, height or image.height), Image.LANCZOS)
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+
+        tmp_target = f"{target}.{os.getpid()}.tmp"
+        save_kwargs = {"optimize": True}
+        if pil_format in ("WEBP", "JPEG"):
+            save_kwargs["quality"] = quality
+        image.save(tmp_target, pil_format, **save_kwargs)
+    # 原子替换，并发请求不会读到写了一半的文件
+    os.replace(tmp_target, target)
+
+
+class ImageVariantService:
+    """图片变体服务类"""
+
+    HASH_CACHE_SIZE = 4096
+
+    def __init__(self) -> None:
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (路径, mtime_ns, 大小) -> sha256，避免每次请求都重新读取原图
+        self._hash_cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        # 正在生成的变体，同一变体的并发请求共享一次渲染
+        self._pending: dict[str, asyncio.Future] = {}
+
+    @property
+    def cache_dir(self) -> Path:
+        return BACK_DIR / system_config.IMAGE_VARIANT_CACHE_DIR
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=system_config.IMAGE_VARIANT_WORKERS)
+        return self._executor
+
+    def shutdown(self) -> None:
+        """关闭进程池（应用退出时调用）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def content_hash(self, path: Path, st: os.stat_result) -> str:
+        """原图内容哈希，按 mtime 和大小缓存"""
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        digest = self._hash_cache.get(key)
+        if digest is not None:
+            self._hash_cache.move_to_end(key)
+            return digest
+
+        digest = await asyncio.to_thread(_sha256_file, path)
+        self._hash_cache[key] = digest
+        if len(self._hash_cache) > self.HASH_CACHE_SIZE:
+            self._hash_cache.popitem(last=False)
+        return digest
+
+    def variant_path(self, digest: str, width: Optional[int], height: Optional[int], fmt: str) -> Path:
+        _, extension = VARIANT_FORMATS[fmt]
+        return self.cache_dir / digest[:2] / f"{digest}_{width or 0}x{height or 0}{extension}"
+
+    async def ensure_variant(
+        self, source: Path, digest: str, width: Optional[int], height: Optional[int], fmt: str
+    ) -> Path:
+        """返回变体文件路径，不存在时在进程池中生成"""
+        target = self.variant_path(digest, width, height, fmt)
+        if target.exists():
+            return target
+
+        key = str(target)
+        pending = self._pending.get(key)
+        if pending is None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(
+                self._get_executor(),
+                _render_variant,
+                str(source),
+                key,
+                width,
+                height,
+                fmt,
+                system_config.IMAGE_VARIANT_QUALITY,
+            )
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        try:
+            await asyncio.shield(pending)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"图片处理失败：{str(e)}")
+        return target
+
+    async def pregenerate(self, stored_path: str) -> None:
+        """预生成标准尺寸的 WebP 缩略图（上传后作为后台任务调用）"""
+        source = resolve_upload_path(stored_path)
+        if source.suffix.lower() in PASSTHROUGH_EXTENSIONS:
+            return
+        try:
+            st = source.stat()
+            digest = await self.content_hash(source, st)
+            for width in system_config.IMAGE_STANDARD_WIDTHS:
+                await self.ensure_variant(source, digest, width, None, "webp")
+        except Exception as e:
+            print(f"预生成图片变体失败 {stored_path}: {e}")
+
+    async def image_response(
+        self,
+        request: Request,
+        stored_path: str,
+        *,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        fmt: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> Response:
+        """返回原图或其变体，带强 ETag
+
+        version 与原图内容哈希（ETag 中的 32 位十六进制）一致时返回长期缓存头，
+        否则要求客户端每次重新验证，图片更换后立即生效。
+        """
+        if fmt is not None and fmt not in VARIANT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的图片格式。允许的格式：{', '.join(VARIANT_FORMATS)}",
+            )
+
+        source = resolve_upload_path(stored_path)
+        # 一次 stat 同时完成存在性和文件类型检查
+        try:
+            st = source.stat()
+        except OSError:
+            raise HTTPException(status_code=404, detail="Image not found")
+        if not stat.S_ISREG(st.st_mode):
+            raise HTTPException(status_code=400, detail="Invalid image path")
+
+        extension = source.suffix.lower()
+        wants_variant = (width or height or fmt) and extension not in PASSTHROUGH_EXTENSIONS
+        digest = await self.content_hash(source, st)
+
+        if wants_variant:
+            fmt = fmt or "webp"
+            etag = f'"{digest[:32]}-{width or 0}x{height or 0}.{fmt}"'
+        else:
+            etag = f'"{digest[:32]}"'
+
+        if version and version == digest[:32]:
+            cache_control = f"public, max-age={system_config.IMAGE_CACHE_MAX_AGE}, immutable"
+        else:
+            cache_control = "public, no-cache"
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        if not wants_variant:
+            return FileResponse(
+                path=str(source),
+                media_type=MEDIA_TYPES.get(extension, "image/jpeg"),
+                headers=headers,
+                stat_result=st,
+            )
+
+        target = await self.ensure_variant(source, digest, width, height, fmt)
+        _, variant_extension = VARIANT_FORMATS[fmt]
+        return FileResponse(
+            path=str(target),
+            media_type=MEDIA_TYPES[variant_extension],
+            headers=headers,
+        )
+
+
+# 创建全局实例
+image_variant_service = ImageVariantService()
@@ -0,0 +1,115 @@
+"""论文关键词分析服务
+
+通过 unnest(papers.keywords) + GROUP BY 在一条查询中统计关键词频次，
+并借助 keyword_fields 映射表得到真实的研究领域分布。
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tables import KeywordField, Paper
+
+# 研究领域图表配色（按数量排序依次使用）
+FIELD_COLORS = ["#3b82f6", "#22c55e", "#f97316", "#a855f7", "#ec4899", "#14b8a6", "#eab308", "#64748b"]
+
+
+def normalize_keyword(keyword: str) -> str:
+    """关键词规范化：去除首尾空白并转小写"""
+    return keyword.strip().lower()
+
+
+class KeywordAnalyticsService:
+    """关键词分析服务类"""
+
+    @staticmethod
+    def _keyword_rows(start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """每篇论文展开为 (paper_id, 规范化关键词) 行的子查询"""
+        query = select(
+            Paper.id.label("paper_id"),
+            func.lower(func.btrim(func.unnest(Paper.keywords))).label("keyword"),
+        ).where(Paper.keywords.isnot(None))
+        if start_date:
+            query = query.where(Paper.publish_date >= start_date)
+        if end_date:
+            query = query.where(Paper.publish_date <= end_date)
+        return query.subquery()
+
+    async def get_top_keywords(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 20,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> list[dict]:
+        """按涉及论文数统计热门关键词"""
+        rows = self._keyword_rows(start_date, end_date)
+        query = (
+            select(
+                rows.c.keyword,
+                func.count(func.distinct(rows.c.paper_id)).label("count"),
+                KeywordField.field,
+            )
+            .outerjoin(KeywordField, KeywordField.keyword == rows.c.keyword)
+            .where(rows.c.keyword != "")
+            .group_by(rows.c.keyword, KeywordField.field)
+            .order_by(func.count(func.distinct(rows.c.paper_id)).desc(), rows.c.keyword)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return [
+            {"keyword": row.keyword, "count": row.count, "field": row.field}
+            for row in result
+        ]
+
+    async def get_field_distribution(
+        self,
+        db: AsyncSession,
+        *,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> list[dict]:
+        """研究领域分布：每个领域下涉及的论文数（一篇论文可属于多个领域）"""
+        rows = self._keyword_rows(start_date, end_date)
+        query = (
+            select(
+                KeywordField.field,
+                func.count(func.distinct(rows.c.paper_id)).label("count"),
+            )
+            .join(KeywordField, KeywordField.keyword == rows.c.keyword)
+            .group_by(KeywordField.field)
+            .order_by(func.count(func.distinct(rows.c.paper_id)).desc(), KeywordField.field)
+        )
+        result = await db.execute(query)
+        return [
+            {"field": row.field, "count": row.count, "color": FIELD_COLORS[idx % len(FIELD_COLORS)]}
+            for idx, row in enumerate(result)
+        ]
+
+    async def upsert_mappings(self, db: AsyncSession, mappings: dict[str, str]) -> int:
+        """批量写入关键词-领域映射，返回写入条数"""
+        # 规范化后可能出现重复关键词，同一条 INSERT 中不能重复更新同一行
+        normalized = {
+            normalize_keyword(keyword): field.strip()
+            for keyword, field in mappings.items()
+            if keyword.strip() and field.strip()
+        }
+        values = [{"keyword": keyword, "field": field} for keyword, field in normalized.items()]
+        if not values:
+            return 0
+
+        stmt = insert(KeywordField).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[KeywordField.keyword],
+            set_={"field": stmt.excluded.field, "updated_at": func.now()},
+        )
+        await db.execute(stmt)
+        await db.commit()
+        return len(values)
+
+
+# 创建全局实例
+keyword_analytics_service = KeywordAnalyticsService()
@@ -2,7 +2,7 @@
 from typing import Optional, Tuple
 from datetime import datetime
 
-from app.db.redis import get_client
+from app.db.redis import get_client, redis_pipeline
 from app.core.config import settings
 
 
@@ -53,32 +53,22 @@ class RateLimiter:
             window_seconds = window_seconds or default_limit[1]
         
         try:
-            client = get_client()
-            
             # 生成Redis键
             key = f"{RateLimiter.RATE_LIMIT_PREFIX}:{limit_type}:{identifier}"
             
-            # 获取当前计数
-            current_count = await client.get(key)
-            
-            if current_count is None:
-                # 第一次请求，设置计数为1
-                await client.setex(key, window_seconds, "1")
-                return (True, max_requests - 1, window_seconds)
+            # 一次往返完成：窗口不存在时创建（带过期时间）、计数加一、读取剩余时间
+            async with redis_pipeline(transaction=True) as pipe:
+                pipe.set(key, 0, ex=window_seconds, nx=True)
+                pipe.incr(key)
+                pipe.ttl(key)
+                _, current_count, ttl = await pipe.execute()
             
-            current_count = int(current_count)
-            
-            if current_count >= max_requests:
+            reset_in = ttl if ttl > 0 else window_seconds
+            if current_count > max_requests:
                 # 超过限制
-                ttl = await client.ttl(key)
-                return (False, 0, ttl if ttl > 0 else window_seconds)
-            
-            # 增加计数
-            await client.incr(key)
-            remaining = max_requests - current_count - 1
-            ttl = await client.ttl(key)
+                return (False, 0, reset_in)
             
-            return (True, remaining, ttl if ttl > 0 else window_seconds)
+            return (True, max_requests - current_count, reset_in)
             
         except Exception as e:
             print(f"限流检查失败: {e}")
@@ -132,11 +122,12 @@ class RateLimiter:
             }
         
         try:
-            client = get_client()
             key = f"{RateLimiter.RATE_LIMIT_PREFIX}:{limit_type}:{identifier}"
             
-            current_count = await client.get(key)
-            ttl = await client.ttl(key)
+            async with redis_pipeline() as pipe:
+                pipe.get(key)
+                pipe.ttl(key)
+                current_count, ttl = await pipe.execute()
             
             # 获取限制值
             default_limit = RateLimiter.DEFAULT_LIMITS.get(
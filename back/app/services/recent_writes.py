@@ -0,0 +1,77 @@
+"""最近写入记录服务（读写分离的 read-your-writes）
+
+用户提交写操作后，在 POSTGRES_STICKY_PRIMARY_SECONDS 秒内该用户的只读请求都走主库，
+不会因为副本复制延迟读到自己刚修改之前的数据。
+
+按 Bearer Token 中的用户ID记录：前端跨域调用 API 时不携带 Cookie，
+只有 Authorization 头是每个请求都会带上的。记录写入 Redis（所有 worker 共享），
+同时在本进程内保留一份，同一 worker 上的后续读请求不需要访问 Redis。
+"""
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.redis import get_client
+
+
+def user_id_from_authorization(authorization: Optional[str]) -> Optional[str]:
+    """从 Authorization 头中解析用户ID（无 Token 或 Token 无效时返回 None）"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token.strip())
+    return payload.get("sub") if payload else None
+
+
+class RecentWritesService:
+    """最近写入记录服务类"""
+
+    # Redis键前缀：db:primary:user:<用户ID>，值为固定走主库的截止时间
+    KEY_PREFIX = "db:primary:user"
+    # 本进程记录数超过该值时清理已过期的记录
+    LOCAL_PRUNE_SIZE = 10000
+
+    def __init__(self) -> None:
+        # 用户ID -> 固定走主库的截止时间（Unix 时间戳）
+        self._local: Dict[str, float] = {}
+
+    async def mark(self, user_id: str, seconds: int) -> None:
+        """记录用户刚提交过写操作"""
+        until = time.time() + seconds
+        if len(self._local) >= self.LOCAL_PRUNE_SIZE:
+            now = time.time()
+            self._local = {key: value for key, value in self._local.items() if value > now}
+        self._local[user_id] = until
+
+        if not settings.redis_enabled:
+            return
+        try:
+            await get_client().set(f"{self.KEY_PREFIX}:{user_id}", int(until), ex=seconds)
+        except Exception as e:
+            print(f"Recent write mark error: {e}")
+
+    async def wrote_recently(self, user_id: str) -> bool:
+        """用户是否仍在写入后的主库窗口内
+
+        Redis 不可用时按「写过」处理：宁可多读主库，也不读到旧数据。
+        """
+        until = self._local.get(user_id)
+        if until is not None:
+            if until > time.time():
+                return True
+            self._local.pop(user_id, None)
+
+        if not settings.redis_enabled:
+            return False
+        try:
+            return bool(await get_client().exists(f"{self.KEY_PREFIX}:{user_id}"))
+        except Exception as e:
+            print(f"Recent write check error: {e}")
+            return True
+
+
+# 创建全局实例
+recent_writes_service = RecentWritesService()
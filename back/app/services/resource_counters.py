@@ -0,0 +1,200 @@
+"""资源下载计数与使用率服务（write-behind）
+
+下载时只在 Redis 中 HINCRBY 一次，不再为每次下载开启事务、锁定资源行；
+后台任务定期把累计增量用一条 UPDATE ... FROM (VALUES ...) 批量写回
+resources.download_count，并根据 resource_usage_logs 重新计算 usage_rate。
+
+每批增量带一个批次 ID，写回时在同一事务中记入 resource_download_flushes；
+提交后删除 Redis 键失败（或进程退出）时，下次重试发现批次已写回便只删除键，
+不会重复累加。
+
+Redis 不可用时退化为直接执行原子的 download_count = download_count + 1。
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Integer, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.globals import system_config
+from app.db.postgres import get_session
+from app.db.redis import get_client
+from app.models.tables import Resource, ResourceDownloadFlush, ResourceUsageLog
+from app.services.table_versions import table_version_service
+
+
+class ResourceCounterService:
+    """资源计数服务类"""
+
+    # Redis键：待写回的下载增量（hash: resource_id -> delta）
+    PENDING_KEY = "resource:downloads:pending"
+    # 正在写回的增量；写回失败时保留，下次优先处理
+    FLUSHING_KEY = "resource:downloads:flushing"
+    # 多个 worker 同时运行时只允许一个执行写回
+    LOCK_KEY = "resource:downloads:flush_lock"
+    # FLUSHING_KEY 中保存批次 ID 的字段
+    BATCH_FIELD = "__batch__"
+    # 已写回批次的保留时间（远大于写回失败后重试的间隔）
+    FLUSH_RECORD_RETENTION = timedelta(days=7)
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+
+    async def record_download(self, db: AsyncSession, resource_id: UUID) -> None:
+        """记录一次下载"""
+        if settings.redis_enabled:
+            try:
+                await get_client().hincrby(self.PENDING_KEY, str(resource_id), 1)
+                return
+            except Exception as e:
+                print(f"Resource download counter error: {e}")
+
+        await db.execute(
+            update(Resource)
+            .where(Resource.id == resource_id)
+            .values(download_count=Resource.download_count + 1)
+        )
+        await db.commit()
+        await table_version_service.bump(Resource.__tablename__)
+
+    async def flush_downloads(self, db: AsyncSession) -> int:
+        """把 Redis 中的下载增量批量写回数据库，返回更新的资源数"""
+        if not settings.redis_enabled:
+            return 0
+
+        client = get_client()
+        lock_token = uuid.uuid4().hex
+        if not await client.set(self.LOCK_KEY, lock_token, nx=True, ex=60):
+            return 0
+
+        try:
+            # 上次写回失败遗留的增量优先处理，否则把当前增量原子地转移出来
+            if not await client.exists(self.FLUSHING_KEY):
+                if not await client.exists(self.PENDING_KEY):
+                    return 0
+                await client.rename(self.PENDING_KEY, self.FLUSHING_KEY)
+            # 已有批次 ID 时保留（重试同一批增量）
+            await client.hsetnx(self.FLUSHING_KEY, self.BATCH_FIELD, uuid.uuid4().hex)
+
+            deltas = await client.hgetall(self.FLUSHING_KEY)
+            batch_id = UUID(deltas.pop(self.BATCH_FIELD))
+            rows = []
+            for resource_id, delta in deltas.items():
+                try:
+                    rows.append((UUID(resource_id), int(delta)))
+                except ValueError:
+                    continue
+
+            recorded = await db.execute(
+                insert(ResourceDownloadFlush)
+                .values(batch_id=batch_id)
+                .on_conflict_do_nothing()
+                .returning(ResourceDownloadFlush.batch_id)
+            )
+            # 批次已写回过（上次提交后没能删除 Redis 键），只需删除键
+            if recorded.first() is None:
+                rows = []
+            await db.execute(
+                delete(ResourceDownloadFlush)
+                .where(ResourceDownloadFlush.flushed_at < func.now() - self.FLUSH_RECORD_RETENTION)
+            )
+
+            if rows:
+                increments = values(
+                    column("id", PGUUID(as_uuid=True)),
+                    column("delta", Integer),
+                    name="increments",
+                ).data(rows)
+                await db.execute(
+                    update(Resource)
+                    .where(Resource.id == increments.c.id)
+                    .values(download_count=Resource.download_count + increments.c.delta)
+                )
+            await db.commit()
+            if rows:
+                await table_version_service.bump(Resource.__tablename__)
+
+            await client.delete(self.FLUSHING_KEY)
+            return len(rows)
+        finally:
+            # 只释放自己持有的锁
+            if await client.get(self.LOCK_KEY) == lock_token:
+                await client.delete(self.LOCK_KEY)
+
+    async def refresh_usage_rates(self, db: AsyncSession) -> int:
+        """根据使用记录重新计算 usage_rate，返回发生变化的资源数
+
+        usage_rate = 统计窗口内有使用记录的天数 / 窗口天数 × 100
+        """
+        window_days = system_config.RESOURCE_USAGE_WINDOW_DAYS
+        cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+
+        active_days = (
+            select(
+                ResourceUsageLog.resource_id,
+                func.count(func.distinct(func.date(ResourceUsageLog.usage_date))).label("days"),
+            )
+            .where(ResourceUsageLog.usage_date >= cutoff)
+            .group_by(ResourceUsageLog.resource_id)
+            .subquery()
+        )
+        rate = func.round(func.least(active_days.c.days * 100.0 / window_days, 100), 2)
+
+        used = await db.execute(
+            update(Resource)
+            .where(Resource.id == active_days.c.resource_id)
+            .where(Resource.usage_rate.is_distinct_from(rate))
+            .values(usage_rate=rate)
+        )
+        unused = await db.execute(
+            update(Resource)
+            .where(Resource.id.not_in(select(active_days.c.resource_id)))
+            .where(Resource.usage_rate.is_distinct_from(0))
+            .values(usage_rate=0)
+        )
+        await db.commit()
+
+        changed = used.rowcount + unused.rowcount
+        if changed:
+            await table_version_service.bump(Resource.__tablename__)
+        return changed
+
+    async def flush(self) -> None:
+        """执行一次写回和使用率计算"""
+        async for db in get_session():
+            try:
+                await self.flush_downloads(db)
+                await self.refresh_usage_rates(db)
+            except Exception as e:
+                print(f"资源计数写回失败: {e}")
+            break
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(system_config.RESOURCE_COUNTER_FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self) -> None:
+        """启动后台写回任务（应用启动时调用）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务并做最后一次写回（应用关闭时调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# 创建全局实例
+resource_counter_service = ResourceCounterService()
@@ -0,0 +1,120 @@
+"""预压缩响应缓存服务
+
+热点接口的响应体在写入缓存时一次性生成 identity / gzip / br 三种表示，
+命中时直接返回与 Accept-Encoding 匹配的压缩字节并带上 Content-Encoding，
+压缩中间件看到已编码的响应会原样透传，不再重复压缩。
+"""
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.core.globals import api_config
+from app.db.redis import get_binary_client
+from app.middleware.compression import SUPPORTED_ENCODINGS, compress_body, negotiate_encoding
+
+
+class ResponseCacheService:
+    """预压缩响应缓存服务类"""
+
+    KEY_PREFIX = "cache:response"
+
+    @classmethod
+    def _key(cls, key: str, encoding: str) -> str:
+        return f"{cls.KEY_PREFIX}:{encoding}:{key}"
+
+    @classmethod
+    async def get(cls, key: str, encoding: str) -> Optional[tuple[bytes, str]]:
+        """读取缓存，返回 (响应体, 实际编码)
+
+        响应体过小时只缓存 identity 版本，此时回退到未压缩数据。
+        """
+        if not settings.redis_enabled:
+            return None
+
+        try:
+            client = get_binary_client()
+            candidates = [encoding, "identity"] if encoding != "identity" else ["identity"]
+            values = await client.mget([cls._key(key, candidate) for candidate in candidates])
+            for candidate, value in zip(candidates, values):
+                if value is not None:
+                    return value, candidate
+            return None
+        except Exception as e:
+            print(f"Response cache get error: {e}")
+            return None
+
+    @classmethod
+    async def set(cls, key: str, body: bytes, expire: int = 300) -> dict[str, bytes]:
+        """压缩一次并缓存全部编码版本，返回 {编码: 响应体}"""
+        variants = {"identity": body}
+        if len(body) >= api_config.COMPRESSION_MINIMUM_SIZE:
+            for encoding in SUPPORTED_ENCODINGS:
+                variants[encoding] = compress_body(
+                    body,
+                    encoding,
+                    gzip_level=api_config.GZIP_LEVEL,
+                    brotli_quality=api_config.CACHED_BROTLI_QUALITY,
+                )
+
+        if not settings.redis_enabled:
+            return variants
+
+        try:
+            client = get_binary_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for encoding, value in variants.items():
+                    pipe.setex(cls._key(key, encoding), expire, value)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Response cache set error: {e}")
+        return variants
+
+    @classmethod
+    async def delete_pattern(cls, pattern: str) -> int:
+        """删除匹配的缓存键（pattern 不含前缀与编码部分）"""
+        if not settings.redis_enabled:
+            return 0
+
+        try:
+            client = get_binary_client()
+            keys = await client.keys(f"{cls.KEY_PREFIX}:*:{pattern}")
+            if keys:
+                return await client.delete(*keys)
+            return 0
+        except Exception as e:
+            print(f"Response cache delete pattern error: {e}")
+            return 0
+
+
+def _build_response(body: bytes, encoding: str, media_type: str) -> Response:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+async def cached_response(
+    request: Request,
+    key: str,
+    build: Callable[[], Awaitable[bytes]],
+    *,
+    media_type: str = "application/json",
+    expire: int = 300,
+) -> Response:
+    """返回预压缩缓存的响应，未命中时调用 build 生成响应体并写入缓存"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    cached = await response_cache_service.get(key, encoding)
+    if cached is not None:
+        body, actual_encoding = cached
+        return _build_response(body, actual_encoding, media_type)
+
+    variants = await response_cache_service.set(key, await build(), expire)
+    actual_encoding = encoding if encoding in variants else "identity"
+    return _build_response(variants[actual_encoding], actual_encoding, media_type)
+
+
+# 创建全局实例
+response_cache_service = ResponseCacheService()
@@ -0,0 +1,355 @@
+"""保存的搜索视图服务
+
+保存视图时把目标成果表、筛选条件和关键词编译成查询语句，并把匹配记录的 ID
+物化到 search_saved_view_results 快照表，同时记下 updated_at 水位线：
+
+- 再次打开时表版本号未变化则直接读快照；否则只重新评估 updated_at 晚于水位线的行
+  （走 updated_at 索引），删除它们的旧结果、插入仍匹配的行并推进水位线；
+- 编译出的查询语句变化（修改了筛选条件、关键词或 CRUD 的搜索列）时整体重建快照；
+- 增量刷新时用反连接清除已删除成果的结果行，result_count 不计入已删除的成果；
+- 结果按 (created_at, id) 倒序键集分页，翻页时顺带把已删除的成果清出快照。
+"""
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import Date, DateTime, Select, delete, exists, func, literal, select, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.globals import system_config
+from app.crud import (
+    CRUDBase,
+    crud_competition,
+    crud_conference,
+    crud_cooperation,
+    crud_paper,
+    crud_patent,
+    crud_project,
+    crud_resource,
+    crud_software_copyright,
+)
+from app.models.tables import SearchSavedView, SearchSavedViewResult
+from app.services.table_versions import table_version_service
+
+# 目标 -> (CRUD, 标题列名, 详情地址模板)
+SAVED_VIEW_TARGETS: dict[str, tuple[CRUDBase, str, str]] = {
+    "papers": (crud_paper, "title", "/papers/{id}"),
+    "patents": (crud_patent, "name", "/patents/{id}"),
+    "projects": (crud_project, "name", "/projects/{id}"),
+    "competitions": (crud_competition, "name", "/competitions/{id}"),
+    "conferences": (crud_conference, "name", "/conferences/{id}"),
+    "cooperations": (crud_cooperation, "organization", "/cooperations/{id}"),
+    "software_copyrights": (crud_software_copyright, "name", "/software-copyrights/{id}"),
+    "resources": (crud_resource, "name", "/resources/{id}"),
+}
+
+# 增量刷新的水位线回退，覆盖提交晚于 updated_at 取值的事务
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+def encode_cursor(sort_at: datetime, item_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{sort_at.isoformat()}|{item_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        sort_at, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(sort_at), UUID(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+class SavedViewService:
+    """保存的搜索视图服务类"""
+
+    @staticmethod
+    def get_target(target: str) -> tuple[CRUDBase, str, str]:
+        if target not in SAVED_VIEW_TARGETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的视图类型：{target}。可选：{', '.join(SAVED_VIEW_TARGETS)}",
+            )
+        return SAVED_VIEW_TARGETS[target]
+
+    def normalize_filters(self, target: str, filters: Optional[dict[str, Any]]) -> dict[str, Any]:
+        """校验筛选条件：只允许列表页分面中的非日期列，且值必须是该列类型的单个值"""
+        crud, _, _ = self.get_target(target)
+        columns = {
+            name: getattr(crud.model, name)
+            for name in crud.facet_fields.values()
+            if not isinstance(getattr(crud.model, name).type, (Date, DateTime))
+        }
+
+        normalized: dict[str, Any] = {}
+        for key, value in (filters or {}).items():
+            if key not in columns:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"不支持的筛选条件：{key}。可选：{', '.join(columns)}",
+                )
+            if value is None:
+                continue
+            python_type = columns[key].type.python_type
+            if python_type is str and isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            if not isinstance(value, python_type):
+                raise HTTPException(status_code=400, detail=f"筛选条件 {key} 的值类型不正确")
+            normalized[key] = value
+        return normalized
+
+    def matching_query(self, view: SearchSavedView, *columns) -> Select:
+        """视图匹配的记录；默认列为 (id, created_at)"""
+        crud, _, _ = self.get_target(view.target)
+        model = crud.model
+        return crud.apply_filters(select(*(columns or (model.id, model.created_at))), view.filters, view.keyword)
+
+    def compile_query(self, view: SearchSavedView) -> str:
+        return str(self.matching_query(view).compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        ))
+
+    async def _source_version(self, view: SearchSavedView) -> Optional[str]:
+        crud, _, _ = self.get_target(view.target)
+        result = await table_version_service.get_versions([crud.model.__tablename__])
+        return ":".join(result[0]) if result else None
+
+    async def list_views(self, db: AsyncSession, user_id: UUID) -> list[SearchSavedView]:
+        result = await db.execute(
+            select(SearchSavedView)
+            .where(SearchSavedView.user_id == user_id)
+            .order_by(SearchSavedView.updated_at.desc())
+        )
+        return list(result.scalars().all())
+
+    async def get_view(
+        self, db: AsyncSession, view_id: UUID, user_id: UUID, *, for_update: bool = False
+    ) -> SearchSavedView:
+        query = select(SearchSavedView).where(SearchSavedView.id == view_id, SearchSavedView.user_id == user_id)
+        if for_update:
+            # 同一视图的并发刷新排队执行，避免结果数和水位线被重复累加
+            query = query.with_for_update()
+        view = (await db.execute(query)).scalar_one_or_none()
+        if view is None:
+            raise HTTPException(status_code=404, detail="搜索视图不存在")
+        return view
+
+    async def _check_name(self, db: AsyncSession, user_id: UUID, name: str, exclude: Optional[UUID] = None) -> None:
+        query = select(SearchSavedView.id).where(SearchSavedView.user_id == user_id, SearchSavedView.name == name)
+        if exclude is not None:
+            query = query.where(SearchSavedView.id != exclude)
+        if (await db.execute(query)).first():
+            raise HTTPException(status_code=400, detail="同名的搜索视图已存在")
+
+    async def create_view(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        *,
+        name: str,
+        target: str,
+        keyword: Optional[str] = None,
+        filters: Optional[dict[str, Any]] = None,
+        description: Optional[str] = None,
+    ) -> SearchSavedView:
+        """创建视图并物化结果快照"""
+        filters = self.normalize_filters(target, filters)
+        count = (await db.execute(
+            select(func.count(SearchSavedView.id)).where(SearchSavedView.user_id == user_id)
+        )).scalar() or 0
+        if count >= system_config.SEARCH_SAVED_VIEW_MAX_PER_USER:
+            raise HTTPException(
+                status_code=400,
+                detail=f"最多保存 {system_config.SEARCH_SAVED_VIEW_MAX_PER_USER} 个搜索视图",
+            )
+        await self._check_name(db, user_id, name)
+
+        view = SearchSavedView(
+            user_id=user_id,
+            name=name,
+            description=description,
+            target=target,
+            keyword=keyword or None,
+            filters=filters,
+        )
+        db.add(view)
+        await db.flush()
+        await self.rebuild(db, view)
+        return view
+
+    async def update_view(self, db: AsyncSession, view: SearchSavedView, changes: dict[str, Any]) -> SearchSavedView:
+        """修改视图；筛选条件或关键词变化时重建快照"""
+        if "name" in changes and changes["name"] is not None:
+            await self._check_name(db, view.user_id, changes["name"], exclude=view.id)
+            view.name = changes["name"]
+        if "description" in changes:
+            view.description = changes["description"]
+        if "filters" in changes:
+            view.filters = self.normalize_filters(view.target, changes["filters"])
+        if "keyword" in changes:
+            view.keyword = changes["keyword"] or None
+
+        if view.compiled_query != self.compile_query(view):
+            await self.rebuild(db, view)
+        else:
+            await db.commit()
+            await db.refresh(view)
+        return view
+
+    async def delete_view(self, db: AsyncSession, view: SearchSavedView) -> None:
+        """删除视图（快照随外键级联删除）"""
+        await db.delete(view)
+        await db.commit()
+
+    async def rebuild(self, db: AsyncSession, view: SearchSavedView, version: Optional[str] = None) -> None:
+        """重新物化整个结果快照"""
+        crud, _, _ = self.get_target(view.target)
+        model = crud.model
+        if version is None:
+            version = await self._source_version(view)
+
+        # 先取水位线再物化，期间变化的行在下次刷新时重新评估
+        watermark = (await db.execute(select(func.max(model.updated_at)))).scalar()
+        await db.execute(delete(SearchSavedViewResult).where(SearchSavedViewResult.view_id == view.id))
+        inserted = await db.execute(
+            insert(SearchSavedViewResult).from_select(
+                ["view_id", "item_id", "sort_at"],
+                self.matching_query(view, literal(view.id, PGUUID(as_uuid=True)), model.id, model.created_at),
+            )
+        )
+
+        view.compiled_query = self.compile_query(view)
+        view.watermark = watermark or datetime.now(timezone.utc)
+        view.source_version = version
+        view.result_count = inserted.rowcount
+        view.refreshed_at = datetime.now(timezone.utc)
+        await db.commit()
+        # updated_at 由数据库生成
+        await db.refresh(view)
+
+    async def refresh(self, db: AsyncSession, view: SearchSavedView) -> int:
+        """增量刷新快照
+
+        Returns:
+            重新评估的行数；0 表示表未变化，-1 表示重建了整个快照
+        """
+        crud, _, _ = self.get_target(view.target)
+        model = crud.model
+        version = await self._source_version(view)
+
+        if view.watermark is None or view.compiled_query != self.compile_query(view):
+            await self.rebuild(db, view, version)
+            return -1
+        if version is not None and version == view.source_version:
+            return 0
+
+        since = view.watermark - WATERMARK_OVERLAP
+        changed = (await db.execute(
+            select(func.count(), func.max(model.updated_at)).where(model.updated_at > since)
+        )).one()
+        reevaluated, latest = changed
+        if reevaluated:
+            removed = await db.execute(
+                delete(SearchSavedViewResult)
+                .where(SearchSavedViewResult.view_id == view.id)
+                .where(SearchSavedViewResult.item_id.in_(select(model.id).where(model.updated_at > since)))
+            )
+            inserted = await db.execute(
+                insert(SearchSavedViewResult).from_select(
+                    ["view_id", "item_id", "sort_at"],
+                    self.matching_query(view, literal(view.id, PGUUID(as_uuid=True)), model.id, model.created_at)
+                    .where(model.updated_at > since),
+                )
+            )
+            view.result_count = max(view.result_count + inserted.rowcount - removed.rowcount, 0)
+            view.watermark = max(view.watermark, latest)
+
+        # 已删除的成果不会出现在 updated_at 水位线之后，用反连接清出快照
+        deleted = await db.execute(
+            delete(SearchSavedViewResult)
+            .where(SearchSavedViewResult.view_id == view.id)
+            .where(~exists().where(model.id == SearchSavedViewResult.item_id))
+        )
+        view.result_count = max(view.result_count - deleted.rowcount, 0)
+
+        view.source_version = version
+        view.refreshed_at = datetime.now(timezone.utc)
+        await db.commit()
+        return reevaluated
+
+    async def get_results(
+        self,
+        db: AsyncSession,
+        view: SearchSavedView,
+        *,
+        cursor: Optional[str] = None,
+        size: int = 20,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """按 (created_at, id) 倒序读取一页快照结果
+
+        Returns:
+            (结果列表, 下一页游标)
+        """
+        crud, title_field, url_template = self.get_target(view.target)
+        model = crud.model
+        status_field = crud.facet_fields.get("status")
+        after = decode_cursor(cursor) if cursor else None
+
+        items: list[dict[str, Any]] = []
+        while len(items) < size:
+            wanted = size - len(items)
+            query = (
+                select(
+                    SearchSavedViewResult.item_id,
+                    SearchSavedViewResult.sort_at,
+                    model.id.label("target_id"),
+                    getattr(model, title_field).label("title"),
+                    (getattr(model, status_field) if status_field else literal(None)).label("status"),
+                )
+                .outerjoin(model, model.id == SearchSavedViewResult.item_id)
+                .where(SearchSavedViewResult.view_id == view.id)
+                .order_by(SearchSavedViewResult.sort_at.desc(), SearchSavedViewResult.item_id.desc())
+                .limit(wanted)
+            )
+            if after is not None:
+                query = query.where(tuple_(SearchSavedViewResult.sort_at, SearchSavedViewResult.item_id) < after)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+
+            orphans = []
+            for row in rows:
+                if row.target_id is None:
+                    orphans.append(row.item_id)
+                    continue
+                items.append({
+                    "id": row.item_id,
+                    "type": view.target,
+                    "title": row.title,
+                    "status": None if row.status is None else str(row.status),
+                    "url": url_template.format(id=row.item_id),
+                    "created_at": row.sort_at,
+                })
+            after = (rows[-1].sort_at, rows[-1].item_id)
+
+            if orphans:
+                # 成果已被删除，顺带清出快照
+                removed = await db.execute(
+                    delete(SearchSavedViewResult)
+                    .where(SearchSavedViewResult.view_id == view.id)
+                    .where(SearchSavedViewResult.item_id.in_(orphans))
+                )
+                view.result_count = max(view.result_count - removed.rowcount, 0)
+                await db.commit()
+            if len(rows) < wanted:
+                break
+
+        next_cursor = encode_cursor(*after) if len(items) == size and after is not None else None
+        return items, next_cursor
+
+
+# 创建全局实例
+saved_view_service = SavedViewService()
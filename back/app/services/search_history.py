@@ -1,9 +1,63 @@
 """搜索历史和热词服务"""
-from typing import List, Optional, Tuple
-from datetime import datetime
+import asyncio
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
 
-from app.db.redis import get_client
+from app.db.redis import get_client, redis_pipeline
 from app.core.config import settings
+from app.core.globals import system_config
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # 未安装时中文关键词只能按汉字前缀匹配
+    lazy_pinyin = None
+
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# 前缀索引成员的分隔符：形式\x00原关键词（\x00 排序最靠前，不影响前缀范围）
+_FORM_SEPARATOR = "\x00"
+
+# 建议分数的衰减起点（前向衰减：新的搜索按 2^(距起点时间 / 半衰期) 加权）
+_SUGGEST_DECAY_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def normalize_keyword(keyword: str) -> str:
+    """前缀匹配使用的规范形式：全角转半角、小写、合并空白"""
+    return _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", keyword)).strip().lower()
+
+
+def pinyin_initials(text: str) -> Optional[str]:
+    """中文文本的拼音首字母（非中文字符原样保留）；未安装 pypinyin 或不含中文时返回 None"""
+    if lazy_pinyin is None or not _CJK_PATTERN.search(text):
+        return None
+    return "".join(lazy_pinyin(text, style=Style.FIRST_LETTER, errors="default")).replace(" ", "")
+
+
+def suggestion_weight(now: Optional[datetime] = None) -> float:
+    """此刻一次搜索在建议分数中的权重
+
+    等价于让所有已累计的分数按 SEARCH_SUGGEST_HALF_LIFE_DAYS 半衰，但不需要改写旧分数：
+    分数之间的大小关系与衰减后的次数一致。
+    """
+    now = now or datetime.now(timezone.utc)
+    half_life = system_config.SEARCH_SUGGEST_HALF_LIFE_DAYS * 86400
+    return 2 ** ((now - _SUGGEST_DECAY_EPOCH).total_seconds() / half_life)
+
+
+def suggestion_forms(keyword: str) -> Set[str]:
+    """关键词在前缀索引中的所有形式：规范形式，以及中文关键词的全拼和拼音首字母"""
+    normalized = normalize_keyword(keyword)
+    forms = {normalized}
+    if lazy_pinyin is not None and _CJK_PATTERN.search(normalized):
+        syllables = lazy_pinyin(normalized, errors="default")
+        forms.add("".join(syllables).replace(" ", ""))
+        forms.add(pinyin_initials(normalized))
+    forms.discard("")
+    return forms
 
 
 class SearchHistoryService:
@@ -12,16 +66,40 @@ class SearchHistoryService:
     # Redis键前缀
     USER_HISTORY_PREFIX = "search:history:user"
     GLOBAL_HOT_KEY = "search:hot:global"
+    # 按小时分桶的搜索次数（Sorted Set）：search:hot:h:<yyyymmddhh>（UTC）
+    HOURLY_HOT_PREFIX = "search:hot:h"
+    # 合并后的最近N小时热搜缓存
+    TRENDING_CACHE_PREFIX = "search:hot:trending"
     SUGGESTION_PREFIX = "search:suggest"
+    # 前缀索引（Sorted Set，分数均为 0，按字典序 ZRANGEBYLEX）：形式\x00关键词
+    SUGGESTION_INDEX_KEY = f"{SUGGESTION_PREFIX}:lex"
+    # 关键词按时间衰减的累计搜索次数（Sorted Set），用于建议排序和淘汰
+    SUGGESTION_SCORE_KEY = f"{SUGGESTION_PREFIX}:score"
     
     # 配置
     MAX_HISTORY_SIZE = 20  # 每个用户保存的最大搜索历史数
     HOT_KEYWORD_LIMIT = 50  # 热词排行榜最多保存的数量
     
+    def __init__(self) -> None:
+        # 进程内缓冲：用户ID -> 按时间顺序的关键词；(分类, 关键词) -> 次数（分类为 None 表示全局）
+        self._pending_history: Dict[str, List[str]] = {}
+        self._pending_counts: Counter = Counter()
+        self._pending_total = 0
+        self._task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+    
     @staticmethod
-    async def record_search(user_id: str, keyword: str, category: Optional[str] = None) -> bool:
+    def _hot_key(category: Optional[str]) -> str:
+        if category:
+            return f"{SearchHistoryService.GLOBAL_HOT_KEY}:{category}"
+        return SearchHistoryService.GLOBAL_HOT_KEY
+    
+    def record_search(self, user_id: str, keyword: str, category: Optional[str] = None) -> bool:
         """记录用户搜索
         
+        只写入进程内缓冲，不访问 Redis；后台任务每隔 SEARCH_HISTORY_FLUSH_SECONDS
+        把缓冲中的记录合并（相同关键词的次数累加）后用一个 MULTI 写回。
+        
         Args:
             user_id: 用户ID
             keyword: 搜索关键词
@@ -34,47 +112,151 @@ class SearchHistoryService:
             return False
         
         keyword = keyword.strip()
+        self._pending_history.setdefault(user_id, []).append(keyword)
+        self._pending_counts[(None, keyword)] += 1
+        if category:
+            self._pending_counts[(category, keyword)] += 1
+        self._pending_total += 1
+        
+        # 缓冲过大时提前写回，不等待下一个周期
+        if self._pending_total >= system_config.SEARCH_HISTORY_BUFFER_SIZE and (
+            self._early_flush is None or self._early_flush.done()
+        ):
+            self._early_flush = asyncio.create_task(self.flush())
+        return True
+    
+    async def flush(self) -> int:
+        """把缓冲中的搜索记录写回 Redis，返回写回的搜索次数
+        
+        搜索历史属于尽力而为的数据，写回失败时丢弃本批记录。
+        """
+        if not self._pending_total:
+            return 0
+        
+        # 交换缓冲区（中间没有 await，不会丢失并发写入的记录）
+        history, counts, total = self._pending_history, self._pending_counts, self._pending_total
+        self._pending_history, self._pending_counts, self._pending_total = {}, Counter(), 0
         
         try:
-            client = get_client()
-            
-            # 1. 记录到用户搜索历史（List结构，保持时间顺序）
-            user_key = f"{SearchHistoryService.USER_HISTORY_PREFIX}:{user_id}"
-            
-            # 添加到列表头部
-            await client.lpush(user_key, keyword)
-            
-            # 裁剪列表，只保留最近N条
-            await client.ltrim(user_key, 0, SearchHistoryService.MAX_HISTORY_SIZE - 1)
-            
-            # 设置过期时间（30天）
-            await client.expire(user_key, 30 * 24 * 3600)
+            async with redis_pipeline(transaction=True) as pipe:
+                # 1. 用户搜索历史（List结构，保持时间顺序）：按顺序压入头部，裁剪并设置过期时间（30天）
+                for user_id, keywords in history.items():
+                    user_key = f"{SearchHistoryService.USER_HISTORY_PREFIX}:{user_id}"
+                    pipe.lpush(user_key, *keywords)
+                    pipe.ltrim(user_key, 0, SearchHistoryService.MAX_HISTORY_SIZE - 1)
+                    pipe.expire(user_key, 30 * 24 * 3600)
+                
+                # 2. 全局和分类热词（Sorted Set结构，按搜索次数排序），相同关键词只执行一次 ZINCRBY
+                categories = set()
+                for (category, keyword), count in counts.items():
+                    pipe.zincrby(SearchHistoryService._hot_key(category), count, keyword)
+                    categories.add(category)
+                
+                # 3. 只保留前N个热词（分类保留前30）
+                for category in categories:
+                    limit = SearchHistoryService.HOT_KEYWORD_LIMIT if category is None else 30
+                    pipe.zremrangebyrank(SearchHistoryService._hot_key(category), 0, -(limit + 1))
+                
+                # 4. 当前小时的趋势分桶，保留 SEARCH_TRENDING_MAX_HOURS 小时
+                keyword_counts = {keyword: count for (category, keyword), count in counts.items() if category is None}
+                bucket_key = SearchHistoryService._hourly_key(datetime.now(timezone.utc))
+                for keyword, count in keyword_counts.items():
+                    pipe.zincrby(bucket_key, count, keyword)
+                pipe.zremrangebyrank(bucket_key, 0, -(system_config.SEARCH_TRENDING_BUCKET_SIZE + 1))
+                pipe.expire(bucket_key, (system_config.SEARCH_TRENDING_MAX_HOURS + 1) * 3600)
+                
+                # 5. 搜索建议的前缀索引和累计次数
+                SearchHistoryService._index_suggestions(pipe, keyword_counts)
+                pipe.zcard(SearchHistoryService.SUGGESTION_SCORE_KEY)
+                
+                results = await pipe.execute()
             
-            # 2. 更新全局热词统计（Sorted Set结构，按搜索次数排序）
-            await client.zincrby(
-                SearchHistoryService.GLOBAL_HOT_KEY,
-                1,  # 增加1次
-                keyword
-            )
-            
-            # 只保留前N个热词
-            await client.zremrangebyrank(
-                SearchHistoryService.GLOBAL_HOT_KEY,
-                0,
-                -(SearchHistoryService.HOT_KEYWORD_LIMIT + 1)
-            )
-            
-            # 3. 如果指定了分类，也记录分类热词
-            if category:
-                category_key = f"{SearchHistoryService.GLOBAL_HOT_KEY}:{category}"
-                await client.zincrby(category_key, 1, keyword)
-                await client.zremrangebyrank(category_key, 0, -31)  # 保留前30
-            
-            return True
+            await SearchHistoryService._evict_suggestions(results[-1])
+            return total
             
         except Exception as e:
             print(f"记录搜索历史失败: {e}")
-            return False
+            return 0
+    
+    @staticmethod
+    def _index_suggestions(pipe, keyword_counts: Dict[str, float]) -> None:
+        """在管道中写入关键词的前缀索引形式并按当前权重累加次数"""
+        entries = SearchHistoryService._index_entries(keyword_counts)
+        if entries:
+            pipe.zadd(SearchHistoryService.SUGGESTION_INDEX_KEY, dict.fromkeys(entries, 0))
+        weight = suggestion_weight()
+        for keyword, count in keyword_counts.items():
+            pipe.zincrby(SearchHistoryService.SUGGESTION_SCORE_KEY, count * weight, keyword)
+    
+    @staticmethod
+    def _index_entries(keywords: Iterable[str]) -> List[str]:
+        return [
+            f"{form}{_FORM_SEPARATOR}{keyword}"
+            for keyword in keywords
+            for form in suggestion_forms(keyword)
+        ]
+    
+    @staticmethod
+    async def _evict_suggestions(size: int) -> None:
+        """关键词数超过 SEARCH_SUGGEST_MAX_KEYWORDS 时淘汰衰减后分数最低的关键词
+
+        分数随时间衰减，长期没人搜索的旧关键词会排到刚出现的新关键词之后，
+        索引满了之后新关键词不会在下一次写回时立即被淘汰。
+        """
+        excess = size - system_config.SEARCH_SUGGEST_MAX_KEYWORDS
+        if excess <= 0:
+            return
+        
+        client = get_client()
+        evicted = await client.zrange(SearchHistoryService.SUGGESTION_SCORE_KEY, 0, excess - 1)
+        if not evicted:
+            return
+        async with redis_pipeline(transaction=True) as pipe:
+            pipe.zrem(SearchHistoryService.SUGGESTION_SCORE_KEY, *evicted)
+            pipe.zrem(SearchHistoryService.SUGGESTION_INDEX_KEY, *SearchHistoryService._index_entries(evicted))
+            await pipe.execute()
+    
+    @staticmethod
+    async def ensure_suggestion_index() -> None:
+        """前缀索引不存在时（首次部署或 Redis 数据被清空）用全局热词重建"""
+        if not settings.redis_enabled:
+            return
+        
+        try:
+            client = get_client()
+            if await client.exists(SearchHistoryService.SUGGESTION_INDEX_KEY):
+                return
+            hot = await client.zrevrange(SearchHistoryService.GLOBAL_HOT_KEY, 0, -1, withscores=True)
+            if not hot:
+                return
+            async with redis_pipeline(transaction=True) as pipe:
+                pipe.delete(SearchHistoryService.SUGGESTION_SCORE_KEY)
+                SearchHistoryService._index_suggestions(pipe, {keyword: score for keyword, score in hot})
+                await pipe.execute()
+        except Exception as e:
+            print(f"重建搜索建议索引失败: {e}")
+    
+    async def _run(self) -> None:
+        await self.ensure_suggestion_index()
+        while True:
+            await asyncio.sleep(system_config.SEARCH_HISTORY_FLUSH_SECONDS)
+            await self.flush()
+    
+    def start(self) -> None:
+        """启动后台写回任务（应用启动时调用）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """停止后台任务并写回剩余记录（应用关闭时调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
     
     @staticmethod
     async def get_user_history(user_id: str, limit: int = 10) -> List[str]:
@@ -150,6 +332,9 @@ class SearchHistoryService:
     async def get_search_suggestions(prefix: str, limit: int = 10) -> List[str]:
         """根据前缀获取搜索建议
         
+        在前缀索引上执行 ZRANGEBYLEX（O(log N + M)，与关键词总数无关），
+        中文关键词也可以用全拼或拼音首字母匹配；候选按衰减后的累计搜索次数排序。
+        
         Args:
             prefix: 搜索前缀
             limit: 返回数量限制
@@ -160,25 +345,39 @@ class SearchHistoryService:
         if not settings.redis_enabled or not prefix.strip():
             return []
         
-        prefix = prefix.strip().lower()
+        normalized = normalize_keyword(prefix)
+        # 输入拼音时常带空格（如 "ji qi"），索引中的拼音形式不含空格
+        prefixes = {normalized, normalized.replace(" ", "")}
         
         try:
-            client = get_client()
+            async with redis_pipeline() as pipe:
+                for item in prefixes:
+                    encoded = item.encode("utf-8")
+                    pipe.zrangebylex(
+                        SearchHistoryService.SUGGESTION_INDEX_KEY,
+                        b"[" + encoded,
+                        b"[" + encoded + b"\xff",
+                        start=0,
+                        num=system_config.SEARCH_SUGGEST_CANDIDATES,
+                    )
+                matches = await pipe.execute()
             
-            # 从全局热词中筛选匹配的关键词
-            all_hot = await client.zrevrange(
-                SearchHistoryService.GLOBAL_HOT_KEY,
-                0,
-                -1
-            )
+            # 同一关键词可能通过多种形式命中，去重并保持顺序
+            candidates = list(dict.fromkeys(
+                entry.split(_FORM_SEPARATOR, 1)[-1]
+                for entries in matches
+                for entry in entries
+            ))
+            if not candidates:
+                return []
             
-            # 筛选以prefix开头的关键词
-            suggestions = [
-                kw for kw in all_hot
-                if kw.lower().startswith(prefix)
-            ]
-            
-            return suggestions[:limit]
+            scores = await get_client().zmscore(SearchHistoryService.SUGGESTION_SCORE_KEY, candidates)
+            ranked = sorted(
+                zip(candidates, scores),
+                key=lambda item: item[1] or 0,
+                reverse=True,
+            )
+            return [keyword for keyword, _ in ranked[:limit]]
             
         except Exception as e:
             print(f"获取搜索建议失败: {e}")
@@ -207,11 +406,16 @@ class SearchHistoryService:
             print(f"清除搜索历史失败: {e}")
             return False
     
+    @staticmethod
+    def _hourly_key(moment: datetime) -> str:
+        return f"{SearchHistoryService.HOURLY_HOT_PREFIX}:{moment:%Y%m%d%H}"
+    
     @staticmethod
     async def get_trending_searches(hours: int = 24, limit: int = 10) -> List[Tuple[str, int]]:
         """获取最近N小时的热门搜索（趋势）
         
-        注意：这需要额外的时间序列数据，当前简化实现返回全局热词
+        用 ZUNIONSTORE 合并最近N个小时分桶，结果缓存 SEARCH_TRENDING_CACHE_SECONDS 秒。
+        SEARCH_TRENDING_HALF_LIFE_HOURS 大于 0 时按桶的时间做指数衰减加权。
         
         Args:
             hours: 最近多少小时
@@ -220,8 +424,35 @@ class SearchHistoryService:
         Returns:
             [(关键词, 搜索次数), ...]
         """
-        # 简化实现：返回全局热词
-        return await SearchHistoryService.get_hot_keywords(limit)
+        if not settings.redis_enabled:
+            return []
+        
+        hours = max(1, min(hours, system_config.SEARCH_TRENDING_MAX_HOURS))
+        now = datetime.now(timezone.utc)
+        # 缓存键带上当前小时，整点后窗口滑动时自然失效
+        cache_key = f"{SearchHistoryService.TRENDING_CACHE_PREFIX}:{hours}:{now:%Y%m%d%H}"
+        
+        try:
+            client = get_client()
+            results = await client.zrevrange(cache_key, 0, limit - 1, withscores=True)
+            if not results and not await client.exists(cache_key):
+                half_life = system_config.SEARCH_TRENDING_HALF_LIFE_HOURS
+                buckets = {
+                    SearchHistoryService._hourly_key(now - timedelta(hours=age)):
+                        0.5 ** (age / half_life) if half_life > 0 else 1
+                    for age in range(hours)
+                }
+                async with redis_pipeline(transaction=True) as pipe:
+                    pipe.zunionstore(cache_key, buckets)
+                    pipe.expire(cache_key, system_config.SEARCH_TRENDING_CACHE_SECONDS)
+                    pipe.zrevrange(cache_key, 0, limit - 1, withscores=True)
+                    _, _, results = await pipe.execute()
+            
+            return [(keyword, int(round(score))) for keyword, score in results]
+            
+        except Exception as e:
+            print(f"获取趋势搜索失败: {e}")
+            return []
 
 
 # 创建全局实例
@@ -0,0 +1,137 @@
+"""数据表版本号服务
+
+每张表在 Redis 中维护一个单调递增的版本号，由 CRUDBase 的写方法在提交后递增。
+读接口根据 (路由, 参数, 相关表版本号) 生成弱 ETag，客户端轮询时只需一次 MGET
+即可判断数据是否变化，未变化时直接返回 304，不再执行任何查询。
+
+同时记录每张表最近一次递增的时间，配置了只读副本时用于判断副本是否可能
+还没有回放到该版本（见 conditional_get）。
+
+版本号在数据库提交之后递增，递增失败时旧 ETag 会继续命中已经变化的数据，
+因此失败时轮换纪元（所有表的 ETag 一起失效）；Redis 暂时不可用导致轮换也失败时，
+由本进程在下次读取版本号前补做轮换。进程恰好在提交与递增之间退出的情况无法发现，
+该窗口内的写入要等相关表下一次写入（或纪元轮换）后客户端才会拿到新数据。
+
+删除的记录ID随版本号一起写入按表的删除日志（保留 DELETED_RETENTION 秒），
+进程内缓存（如标题联想索引）据此增量移除，不需要扫描整张表对账。
+"""
+import time
+import uuid
+from typing import Iterable, Mapping, Optional
+
+from app.core.config import settings
+from app.db.redis import get_client
+
+
+class TableVersionService:
+    """数据表版本号服务类"""
+
+    # Redis键前缀
+    VERSION_PREFIX = "table:version"
+    # 版本纪元：Redis 数据被清空后重新生成，避免版本号归零后与旧 ETag 冲突
+    EPOCH_KEY = "table:version:__epoch__"
+    # 各表最近一次递增的时间（hash: 表名 -> Unix 时间戳）
+    BUMPED_AT_KEY = "table:bumped_at"
+    # 删除日志（Sorted Set：记录ID -> 删除时间）：table:deleted:<表名>
+    DELETED_PREFIX = "table:deleted"
+    DELETED_RETENTION = 24 * 3600
+
+    def __init__(self) -> None:
+        # 递增和轮换纪元都失败后置为 True，下次读取版本号前先轮换纪元
+        self._epoch_stale = False
+
+    async def rotate_epoch(self) -> bool:
+        """生成新纪元，使所有已发出的 ETag 失效"""
+        try:
+            await get_client().set(self.EPOCH_KEY, uuid.uuid4().hex)
+            self._epoch_stale = False
+            return True
+        except Exception as e:
+            print(f"Table version epoch rotate error: {e}")
+            self._epoch_stale = True
+            return False
+
+    async def bump(self, *tables: str, deleted: Optional[Mapping[str, Iterable]] = None) -> None:
+        """递增一张或多张表的版本号（失败时轮换纪元，旧 ETag 不再命中）
+
+        Args:
+            deleted: 表名 -> 本次删除的记录ID，写入删除日志
+        """
+        if not settings.redis_enabled or not tables:
+            return
+        if self._epoch_stale:
+            await self.rotate_epoch()
+
+        try:
+            client = get_client()
+            now = time.time()
+            async with client.pipeline(transaction=False) as pipe:
+                for table in tables:
+                    pipe.incr(f"{self.VERSION_PREFIX}:{table}")
+                pipe.hset(self.BUMPED_AT_KEY, mapping={table: now for table in tables})
+                for table, ids in (deleted or {}).items():
+                    members = {str(record_id): now for record_id in ids}
+                    if not members:
+                        continue
+                    key = f"{self.DELETED_PREFIX}:{table}"
+                    pipe.zadd(key, members)
+                    pipe.zremrangebyscore(key, "-inf", now - self.DELETED_RETENTION)
+                    pipe.expire(key, self.DELETED_RETENTION)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Table version bump error: {e}")
+            await self.rotate_epoch()
+
+    async def get_versions(self, tables: Iterable[str]) -> Optional[tuple[list[str], float]]:
+        """一次往返读取纪元、各表版本号和最近递增时间
+
+        Returns:
+            ([纪元, 版本号...], 各表中最近一次递增的时间戳)；
+            Redis 不可用或纪元刚生成时返回 None（此时不应使用 ETag）
+        """
+        if not settings.redis_enabled:
+            return None
+
+        # 之前有递增没能写入 Redis，纪元轮换成功前不能使用 ETag
+        if self._epoch_stale and not await self.rotate_epoch():
+            return None
+
+        tables = list(tables)
+        try:
+            client = get_client()
+            keys = [self.EPOCH_KEY]
+            keys.extend(f"{self.VERSION_PREFIX}:{table}" for table in tables)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.mget(keys)
+                if tables:
+                    pipe.hmget(self.BUMPED_AT_KEY, tables)
+                results = await pipe.execute()
+            values = results[0]
+
+            if values[0] is None:
+                await client.set(self.EPOCH_KEY, uuid.uuid4().hex, nx=True)
+                return None
+
+            bumped_at = max((float(value) for value in results[1] if value), default=0.0) if tables else 0.0
+            return [value or "0" for value in values], bumped_at
+        except Exception as e:
+            print(f"Table version get error: {e}")
+            return None
+
+    async def get_deleted(self, table: str, since: float) -> Optional[list[str]]:
+        """读取 since（Unix 时间戳）之后删除的记录ID
+
+        Returns:
+            记录ID列表；Redis 不可用或 since 早于日志保留范围时返回 None（需要全量对账）
+        """
+        if not settings.redis_enabled or since < time.time() - self.DELETED_RETENTION:
+            return None
+        try:
+            return await get_client().zrangebyscore(f"{self.DELETED_PREFIX}:{table}", since, "+inf")
+        except Exception as e:
+            print(f"Table deleted ids get error: {e}")
+            return None
+
+
+# 创建全局实例
+table_version_service = TableVersionService()
@@ -5,7 +5,7 @@ import jwt
 import hashlib
 import json
 
-from app.db.redis import get_client
+from app.db.redis import get_client, redis_pipeline
 from app.core.config import settings
 
 
@@ -14,6 +14,8 @@ class TokenBlacklistService:
     
     # Redis键前缀
     BLACKLIST_PREFIX = "token:blacklist"
+    # 黑名单索引（Sorted Set: 键 -> 过期时间戳），用于统计数量而不必 KEYS 扫描
+    INDEX_KEY = "token:blacklist_index"
     
     # JWT配置（需要与你的实际配置匹配）
     JWT_SECRET_KEY = "your-secret-key-here"  # 实际使用时应从配置读取
@@ -67,19 +69,19 @@ class TokenBlacklistService:
                 key = f"{TokenBlacklistService.BLACKLIST_PREFIX}:{token_hash}"
                 ttl = 24 * 3600
             
-            client = get_client()
-            
             # 存储到Redis，值为加入黑名单的信息
             blacklist_info = {
                 "reason": reason,
                 "blacklisted_at": datetime.now().isoformat()
             }
             
-            await client.setex(
-                key,
-                ttl,
-                json.dumps(blacklist_info)
-            )
+            # 写入黑名单和索引，并顺带清理索引中已过期的条目（一次往返）
+            now = datetime.now().timestamp()
+            async with redis_pipeline() as pipe:
+                pipe.setex(key, ttl, json.dumps(blacklist_info))
+                pipe.zadd(TokenBlacklistService.INDEX_KEY, {key: now + ttl})
+                pipe.zremrangebyscore(TokenBlacklistService.INDEX_KEY, "-inf", now)
+                await pipe.execute()
             
             print(f"✅ Token已加入黑名单: {key[:50]}... (TTL: {ttl}秒)")
             return True
@@ -157,12 +159,14 @@ class TokenBlacklistService:
                     token_hash = hashlib.sha256(token.encode()).hexdigest()
                     key = f"{TokenBlacklistService.BLACKLIST_PREFIX}:{token_hash}"
                     
-            except (DecodeError, InvalidTokenError, Exception):
+            except Exception:
                 token_hash = hashlib.sha256(token.encode()).hexdigest()
                 key = f"{TokenBlacklistService.BLACKLIST_PREFIX}:{token_hash}"
             
-            client = get_client()
-            deleted = await client.delete(key)
+            async with redis_pipeline() as pipe:
+                pipe.delete(key)
+                pipe.zrem(TokenBlacklistService.INDEX_KEY, key)
+                deleted, _ = await pipe.execute()
             
             return deleted > 0
             
@@ -181,10 +185,12 @@ class TokenBlacklistService:
             return 0
         
         try:
-            client = get_client()
-            pattern = f"{TokenBlacklistService.BLACKLIST_PREFIX}:*"
-            keys = await client.keys(pattern)
-            return len(keys)
+            # 索引的分数是过期时间，先移除已过期的条目再计数
+            async with redis_pipeline() as pipe:
+                pipe.zremrangebyscore(TokenBlacklistService.INDEX_KEY, "-inf", datetime.now().timestamp())
+                pipe.zcard(TokenBlacklistService.INDEX_KEY)
+                _, count = await pipe.execute()
+            return count
             
         except Exception as e:
             print(f"获取黑名单数量失败: {e}")
@@ -0,0 +1,373 @@
+"""成果标题输入联想服务
+
+每个 worker 在内存中维护一份论文、专利、项目标题的前缀索引：
+
+- 索引键为规范化标题、标题中每个词的起始位置，以及中文标题的拼音首字母，
+  截断到 SEARCH_TYPEAHEAD_KEY_LENGTH 个字符后放入有序数组，查询时二分定位前缀区间；
+- 启动时用一条 UNION ALL 流式查询构建，之后按表版本号（写操作提交后递增）
+  检测变化，只拉取版本号变化的表中 updated_at 晚于水位线的行增量更新，
+  删除的行从表版本号服务的删除日志（由 CRUD 删除方法写入）读取；
+- 排序和数组构建在线程池中执行，构建期间继续使用旧索引，完成后整体替换。
+"""
+import asyncio
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import literal, select, union_all
+
+from app.core.config import settings
+from app.core.globals import system_config
+from app.db.postgres import get_session
+from app.models.tables import Paper, Patent, Project
+from app.services.search_history import normalize_keyword, pinyin_initials
+from app.services.table_versions import table_version_service
+
+# 类型 -> (模型, 标题列, 详情页地址)
+TYPEAHEAD_SOURCES = {
+    "paper": (Paper, Paper.title, "/papers/{id}"),
+    "patent": (Patent, Patent.name, "/patents/{id}"),
+    "project": (Project, Project.name, "/projects/{id}"),
+}
+TYPEAHEAD_TABLES = tuple(model.__tablename__ for model, _, _ in TYPEAHEAD_SOURCES.values())
+
+# 词的起始位置：前一个字符是空白或标点
+_WORD_START = re.compile(r"(?<=[\s\-_/:;,.()\[\]（）【】《》“”‘’、，。：；！？])\w")
+
+# 前缀区间上界
+_MAX_CHAR = chr(0x10FFFF)
+
+# 增量更新的水位线回退，覆盖提交晚于 updated_at 取值的事务
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+def typeahead_keys(title: str) -> tuple[str, ...]:
+    """标题的索引键（第一个为完整标题）"""
+    length = system_config.SEARCH_TYPEAHEAD_KEY_LENGTH
+    normalized = normalize_keyword(title)
+    if not normalized:
+        return ()
+
+    keys = [normalized[:length]]
+    for match in _WORD_START.finditer(normalized):
+        if len(keys) > system_config.SEARCH_TYPEAHEAD_WORD_KEYS:
+            break
+        keys.append(normalized[match.start():match.start() + length])
+    initials = pinyin_initials(normalized)
+    if initials:
+        keys.append(initials[:length])
+    return tuple(dict.fromkeys(keys))
+
+
+class TypeaheadIndex:
+    """有序前缀数组：_keys[i] 对应 _owners[i]
+
+    条目只保存原标题，索引键在删除时按标题重新计算，以节省内存。
+    """
+
+    def __init__(self, entries: Optional[dict] = None) -> None:
+        # (类型, ID) -> 标题
+        self.entries: dict[tuple[str, UUID], str] = entries or {}
+        self.type_counts = Counter(entity_type for entity_type, _ in self.entries)
+        pairs = sorted(
+            ((key, owner) for owner, title in self.entries.items() for key in typeahead_keys(title)),
+            key=itemgetter(0),
+        )
+        self._keys = [key for key, _ in pairs]
+        self._owners = [owner for _, owner in pairs]
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple[str, UUID, str]]) -> "TypeaheadIndex":
+        return cls({(entity_type, entity_id): title for entity_type, entity_id, title in rows if title})
+
+    @property
+    def key_count(self) -> int:
+        return len(self._keys)
+
+    def _remove_keys(self, owner: tuple[str, UUID], keys: tuple[str, ...]) -> None:
+        for key in keys:
+            idx = bisect_left(self._keys, key)
+            while idx < len(self._keys) and self._keys[idx] == key:
+                if self._owners[idx] == owner:
+                    del self._keys[idx]
+                    del self._owners[idx]
+                    break
+                idx += 1
+
+    def upsert(self, entity_type: str, entity_id: UUID, title: str) -> None:
+        owner = (entity_type, entity_id)
+        previous = self.entries.get(owner)
+        if previous == title:
+            return
+        if previous is not None:
+            self.remove(owner)
+
+        keys = typeahead_keys(title)
+        if not keys:
+            return
+        self.entries[owner] = title
+        self.type_counts[entity_type] += 1
+        for key in keys:
+            idx = bisect_right(self._keys, key)
+            self._keys.insert(idx, key)
+            self._owners.insert(idx, owner)
+
+    def remove(self, owner: tuple[str, UUID]) -> None:
+        previous = self.entries.pop(owner, None)
+        if previous is not None:
+            self.type_counts[owner[0]] -= 1
+            self._remove_keys(owner, typeahead_keys(previous))
+
+    def search(self, query: str, limit: int) -> list[tuple[str, UUID, str]]:
+        normalized = normalize_keyword(query)
+        if not normalized:
+            return []
+
+        prefix = normalized[:system_config.SEARCH_TYPEAHEAD_KEY_LENGTH]
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + _MAX_CHAR, lo=lo)
+        hi = min(hi, lo + system_config.SEARCH_TYPEAHEAD_CANDIDATES)
+
+        seen = set()
+        matches = []
+        for idx in range(lo, hi):
+            owner = self._owners[idx]
+            if owner in seen:
+                continue
+            seen.add(owner)
+            title = self.entries[owner]
+            normalized_title = normalize_keyword(title)
+            # 查询超过索引键长度时，用完整标题复核
+            if len(normalized) > len(prefix) and normalized not in normalized_title:
+                continue
+            # 标题开头匹配优先，其次标题较短的优先
+            matches.append((not normalized_title.startswith(normalized), len(title), owner, title))
+
+        matches.sort(key=lambda item: item[:2])
+        return [(owner[0], owner[1], title) for _, _, owner, title in matches[:limit]]
+
+    def memory_usage(self) -> int:
+        """索引占用的近似字节数（数组、键字符串、条目和标题）"""
+        total = sys.getsizeof(self._keys) + sys.getsizeof(self._owners) + sys.getsizeof(self.entries)
+        total += sum(sys.getsizeof(key) for key in self._keys)
+        for owner, title in self.entries.items():
+            total += sys.getsizeof(owner) + sys.getsizeof(owner[1]) + sys.getsizeof(owner[1].int) + sys.getsizeof(title)
+        return total
+
+
+class TypeaheadService:
+    """标题输入联想服务类"""
+
+    # 单次增量超过该数量时在线程池中整体重建，而不是逐条插入有序数组
+    INCREMENTAL_LIMIT = 1000
+
+    def __init__(self) -> None:
+        self._index = TypeaheadIndex()
+        self._ready = False
+        self._versions: Optional[list[str]] = None
+        self._watermark: Optional[datetime] = None
+        # 删除日志的读取起点（Unix 时间戳）
+        self._deleted_since = 0.0
+        self._built_at: Optional[float] = None
+        self._build_seconds: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @staticmethod
+    def _rows_query(since: Optional[datetime] = None, types: Optional[list[str]] = None):
+        selects = []
+        for entity_type, (model, title_column, _) in TYPEAHEAD_SOURCES.items():
+            if types is not None and entity_type not in types:
+                continue
+            stmt = select(
+                literal(entity_type).label("type"),
+                model.id,
+                title_column.label("title"),
+                model.updated_at,
+            )
+            if since is not None:
+                stmt = stmt.where(model.updated_at > since)
+            selects.append(stmt)
+        return union_all(*selects)
+
+    async def _load_rows(
+        self,
+        db,
+        since: Optional[datetime] = None,
+        types: Optional[list[str]] = None,
+    ) -> tuple[list[tuple[str, UUID, str]], Optional[datetime]]:
+        """流式读取标题（types 为空时读取全部类型），返回 (行, 最大 updated_at)"""
+        rows = []
+        watermark = None
+        if types is not None and not types:
+            return rows, watermark
+        result = await db.stream(
+            self._rows_query(since, types),
+            execution_options={"yield_per": system_config.SEARCH_TYPEAHEAD_FETCH_SIZE},
+        )
+        async for entity_type, entity_id, title, updated_at in result:
+            rows.append((entity_type, entity_id, title))
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        return rows, watermark
+
+    async def rebuild(self) -> None:
+        """用一条流式查询重建索引"""
+        started = time.perf_counter()
+        checked_at = time.time()
+        versions = await table_version_service.get_versions(TYPEAHEAD_TABLES)
+        async for db in get_session():
+            rows, watermark = await self._load_rows(db)
+            break
+
+        self._index = await asyncio.to_thread(TypeaheadIndex.from_rows, rows)
+        self._versions = versions[0] if versions else None
+        self._watermark = watermark
+        self._deleted_since = checked_at - WATERMARK_OVERLAP.total_seconds()
+        self._ready = True
+        self._built_at = time.time()
+        self._build_seconds = time.perf_counter() - started
+
+    async def refresh(self) -> None:
+        """相关表版本号变化时增量更新
+
+        新增和修改的行按 updated_at 水位线拉取，删除的行从表版本号服务的删除日志读取，
+        只处理版本号变化的表。版本号不可用（Redis 未启用或暂时不可用）时无法判断是否变化，
+        保持当前索引不做轮询；纪元变化或删除日志已超出保留范围时整体重建。
+        """
+        checked_at = time.time()
+        versions = await table_version_service.get_versions(TYPEAHEAD_TABLES)
+        if versions is None or versions[0] == self._versions:
+            return
+
+        async with self._lock:
+            changed = self._changed_types(versions[0])
+            if changed is None:
+                await self.rebuild()
+                return
+
+            removed: list[tuple[str, UUID]] = []
+            for entity_type in changed:
+                model = TYPEAHEAD_SOURCES[entity_type][0]
+                deleted = await table_version_service.get_deleted(model.__tablename__, self._deleted_since)
+                if deleted is None:
+                    await self.rebuild()
+                    return
+                removed.extend((entity_type, UUID(entity_id)) for entity_id in deleted)
+
+            since = self._watermark - WATERMARK_OVERLAP if self._watermark else None
+            async for db in get_session():
+                rows, watermark = await self._load_rows(db, since, types=changed)
+                break
+
+            if len(rows) + len(removed) > self.INCREMENTAL_LIMIT:
+                index = await asyncio.to_thread(self._merged_index, dict(self._index.entries), rows, removed)
+            else:
+                index = self._index
+                for row in rows:
+                    index.upsert(*row)
+                for owner in removed:
+                    index.remove(owner)
+
+            self._index = index
+            self._versions = versions[0]
+            # 日志按删除时间查询，回退一段时间覆盖各进程之间的时钟偏差（重复移除没有影响）
+            self._deleted_since = checked_at - WATERMARK_OVERLAP.total_seconds()
+            if watermark is not None and (self._watermark is None or watermark > self._watermark):
+                self._watermark = watermark
+
+    def _changed_types(self, versions: list[str]) -> Optional[list[str]]:
+        """版本号与上次不同的类型；上次没有版本号或纪元变化时返回 None（需要重建）"""
+        if self._versions is None or versions[0] != self._versions[0]:
+            return None
+        return [
+            entity_type
+            for entity_type, current, previous in zip(TYPEAHEAD_SOURCES, versions[1:], self._versions[1:])
+            if current != previous
+        ]
+
+    @staticmethod
+    def _merged_index(
+        entries: dict,
+        rows: list[tuple[str, UUID, str]],
+        removed: list[tuple[str, UUID]],
+    ) -> TypeaheadIndex:
+        for entity_type, entity_id, title in rows:
+            if title:
+                entries[(entity_type, entity_id)] = title
+            else:
+                entries.pop((entity_type, entity_id), None)
+        for owner in removed:
+            entries.pop(owner, None)
+        return TypeaheadIndex(entries)
+
+    def search(self, query: str, limit: int = 10) -> list[dict[str, Any]]:
+        """前缀匹配标题，返回 [{type, id, title, url}, ...]"""
+        return [
+            {
+                "type": entity_type,
+                "id": entity_id,
+                "title": title,
+                "url": TYPEAHEAD_SOURCES[entity_type][2].format(id=entity_id),
+            }
+            for entity_type, entity_id, title in self._index.search(query, limit)
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        """索引规模和内存占用（按每 10 万条标题折算）"""
+        titles = len(self._index.entries)
+        memory = self._index.memory_usage()
+        return {
+            "ready": self._ready,
+            "titles": titles,
+            "by_type": {entity_type: self._index.type_counts[entity_type] for entity_type in TYPEAHEAD_SOURCES},
+            "keys": self._index.key_count,
+            "memory_bytes": memory,
+            "memory_bytes_per_100k_titles": int(memory / titles * 100_000) if titles else 0,
+            "built_at": self._built_at,
+            "build_seconds": round(self._build_seconds, 3) if self._build_seconds is not None else None,
+        }
+
+    async def _run(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception as e:
+            print(f"构建标题联想索引失败: {e}")
+        while True:
+            await asyncio.sleep(system_config.SEARCH_TYPEAHEAD_REFRESH_SECONDS)
+            try:
+                if self._ready:
+                    await self.refresh()
+                else:
+                    await self.rebuild()
+            except Exception as e:
+                print(f"刷新标题联想索引失败: {e}")
+
+    def start(self) -> None:
+        """启动索引构建和后台刷新任务（应用启动时调用）"""
+        if settings.postgres_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务（应用关闭时调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 创建全局实例
+typeahead_service = TypeaheadService()
@@ -8,7 +8,7 @@ import json
 from datetime import datetime, timedelta
 from typing import Optional
 
-from app.db.redis import get_client
+from app.db.redis import get_client, redis_pipeline
 from app.core.config import settings
 
 # 验证码配置
@@ -44,20 +44,18 @@ async def create_verification_code(email: str) -> tuple[str, bool]:
         return code, True
     
     try:
-        client = get_client()
         key = f"{VERIFICATION_CODE_PREFIX}:{email}"
+        resend_key = f"{VERIFICATION_CODE_PREFIX}:resend:{email}"
+        
+        # 检查是否最近刚发送过：原子地设置重发间隔标记，同一往返中取回其剩余时间
+        async with redis_pipeline(transaction=True) as pipe:
+            pipe.set(resend_key, "1", ex=RESEND_INTERVAL_SECONDS, nx=True)
+            pipe.ttl(resend_key)
+            acquired, resend_ttl = await pipe.execute()
         
-        # 检查是否最近刚发送过
-        existing_data = await client.get(key)
-        if existing_data:
-            existing = json.loads(existing_data)
-            created_at = datetime.fromisoformat(existing["created_at"])
-            time_since_created = datetime.now() - created_at
-            
-            if time_since_created.total_seconds() < RESEND_INTERVAL_SECONDS:
-                remaining = RESEND_INTERVAL_SECONDS - int(time_since_created.total_seconds())
-                print(f"⚠️ 发送过于频繁，需等待 {remaining} 秒")
-                return "", False
+        if not acquired:
+            print(f"⚠️ 发送过于频繁，需等待 {max(resend_ttl, 1)} 秒")
+            return "", False
         
         # 生成新验证码
         code = generate_code()
@@ -69,7 +67,7 @@ async def create_verification_code(email: str) -> tuple[str, bool]:
         }
         
         # 存储到Redis，设置过期时间
-        await client.setex(
+        await get_client().setex(
             key,
             CODE_EXPIRY_MINUTES * 60,
             json.dumps(code_data)
@@ -126,12 +124,8 @@ async def verify_code(email: str, code: str) -> tuple[bool, str]:
         # 验证码错误
         if stored["code"] != code:
             stored["attempts"] += 1
-            # 更新尝试次数
-            await client.setex(
-                key,
-                CODE_EXPIRY_MINUTES * 60,
-                json.dumps(stored)
-            )
+            # 更新尝试次数，保留原有过期时间（不因输错而延长有效期）
+            await client.set(key, json.dumps(stored), keepttl=True)
             return False, f"验证码错误，还可尝试 {MAX_ATTEMPTS - stored['attempts']} 次"
         
         # 验证成功，删除验证码
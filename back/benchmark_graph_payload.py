@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""知识图谱响应格式基准测试：默认 JSON vs 列式编码
+
+在 10k 节点 / 20k 边的合成图上比较：
+- 当前格式：KnowledgeGraphResponse 经 FastAPI 校验 + jsonable_encoder + json 序列化
+- format=columnar：列式结构，分别使用 json / gzip / msgpack 编码
+
+用法: python benchmark_graph_payload.py [节点数] [每节点边数]
+"""
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.knowledge_graph import GraphEdge, GraphNode, GraphStats, KnowledgeGraphResponse
+from app.services.graph_codec import build_columnar_graph, encode_graph_payload
+
+NODE_TYPES = ["paper", "project", "patent", "author"]
+RELATIONSHIPS = ["AUTHORED", "PRODUCES", "CITES", "BELONGS_TO"]
+
+
+def build_graph(node_count: int, edges_per_node: int) -> tuple[list[GraphNode], list[GraphEdge], GraphStats]:
+    """生成合成图数据，ID 格式模拟 Neo4j element_id"""
+    rng = random.Random(42)
+    nodes = []
+    for i in range(node_count):
+        node_type = NODE_TYPES[i % len(NODE_TYPES)]
+        nodes.append(GraphNode(
+            id=f"4:8f6c2a7e-3b1d-4c5e-9a0f-1d2e3f4a5b6c:{i}",
+            label=f"{node_type} 节点 {i}",
+            type=node_type,
+            properties={
+                "name": f"{node_type} 节点 {i}",
+                "year": 2015 + i % 10,
+                "citations": rng.randint(0, 500),
+                "status": rng.choice(["draft", "published", "active"]),
+            },
+        ))
+
+    edges = []
+    for i in range(node_count):
+        for _ in range(edges_per_node):
+            j = rng.randrange(node_count)
+            edges.append(GraphEdge(
+                source=nodes[i].id,
+                target=nodes[j].id,
+                relationship=rng.choice(RELATIONSHIPS),
+                weight=1.0,
+            ))
+
+    node_types: dict[str, int] = {}
+    for node in nodes:
+        node_types[node.type] = node_types.get(node.type, 0) + 1
+    stats = GraphStats(total_nodes=len(nodes), total_edges=len(edges), node_types=node_types)
+    return nodes, edges, stats
+
+
+def timed(func, repeat: int = 5) -> tuple[float, bytes]:
+    """返回最快一次的耗时（毫秒）和结果"""
+    best = float("inf")
+    result = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main() -> None:
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    edges_per_node = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    print("=" * 70)
+    print(f"📊 知识图谱响应格式基准测试 ({node_count} 节点, {node_count * edges_per_node} 边)")
+    print("=" * 70)
+
+    nodes, edges, stats = build_graph(node_count, edges_per_node)
+
+    def current_json() -> bytes:
+        # 与 response_model=KnowledgeGraphResponse 的处理路径一致：校验 + 编码 + 序列化
+        response = KnowledgeGraphResponse.model_validate(
+            {"nodes": nodes, "edges": edges, "stats": stats}, from_attributes=True
+        )
+        return json.dumps(
+            jsonable_encoder(response), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def columnar(encoding: str) -> bytes:
+        return encode_graph_payload(build_columnar_graph(nodes, edges, stats), encoding)
+
+    cases = [
+        ("当前 JSON", current_json),
+        ("columnar + json", lambda: columnar("json")),
+        ("columnar + gzip", lambda: columnar("gzip")),
+        ("columnar + msgpack", lambda: columnar("msgpack")),
+    ]
+
+    baseline_ms, baseline_body = timed(current_json)
+    print(f"\n{'格式':<22}{'耗时(ms)':>12}{'大小(KB)':>12}{'大小比例':>10}")
+    for name, func in cases:
+        elapsed_ms, body = (baseline_ms, baseline_body) if func is current_json else timed(func)
+        print(
+            f"{name:<22}{elapsed_ms:>12.1f}{len(body) / 1024:>12.1f}"
+            f"{len(body) / len(baseline_body):>10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""JSON 序列化基准测试：标准库 json vs orjson
+
+比较两类典型负载：
+- /analytics/overview 响应（AnalyticsOverviewResponse）
+- /knowledge-graph/nodes 响应（KnowledgeGraphResponse）
+
+分别测量：
+- response_model 路由：FastAPI 默认的 Pydantic model_dump_json 快速路径
+  vs 自定义 ORJSONResponse（会关闭快速路径，改为 model_dump + orjson）
+- 直接返回 dict 的路由：jsonable_encoder + json.dumps（JSONResponse）
+  vs jsonable_encoder + orjson（ORJSONResponse）
+- 缓存编解码：CacheService 原 json.dumps/json.loads vs orjson dumps/loads
+
+用法: python benchmark_serialization.py [图谱节点数]
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.serialization import ORJSONResponse, dumps, loads
+from app.schemas.analytics import AnalyticsOverviewResponse, Summary, TopAuthor, Trend
+from app.schemas.knowledge_graph import GraphEdge, GraphNode, GraphStats, KnowledgeGraphResponse
+
+
+def build_overview() -> AnalyticsOverviewResponse:
+    return AnalyticsOverviewResponse(
+        summary=Summary(
+            total_papers=1200, total_projects=300, total_patents=150, total_resources=80,
+            total_software_copyrights=60, total_competitions=40, total_conferences=30, total_cooperations=20,
+        ),
+        trends=[
+            Trend(period=f"2025-{month:02d}", papers=month * 10, projects=month * 3, patents=month * 2)
+            for month in range(1, 7)
+        ],
+        top_authors=[
+            TopAuthor(name=f"作者{i}", papers=50 - i, projects=i, h_index=20 - i)
+            for i in range(10)
+        ],
+    )
+
+
+def build_graph(node_count: int) -> KnowledgeGraphResponse:
+    nodes = []
+    edges = []
+    for i in range(node_count):
+        node_id = f"paper_{uuid.uuid4()}"
+        nodes.append(GraphNode(
+            id=node_id,
+            label=f"论文标题 {i}",
+            type="paper",
+            properties={
+                "author": "张三",
+                "year": 2024,
+                "citations": i % 50,
+                "status": "published",
+                "budget": Decimal("12345.67"),
+                "publish_date": date(2024, 1, 1),
+                "created_at": datetime.now(timezone.utc),
+                "project_id": uuid.uuid4(),
+            },
+        ))
+        if i:
+            edges.append(GraphEdge(source=nodes[i - 1].id, target=node_id, relationship="authored", weight=1.0))
+    stats = GraphStats(total_nodes=len(nodes), total_edges=len(edges), node_types={"papers": len(nodes)})
+    return KnowledgeGraphResponse(nodes=nodes, edges=edges, stats=stats)
+
+
+def timed(func, repeat: int = 20) -> float:
+    """返回最快一次的耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def stdlib_response(content) -> bytes:
+    # JSONResponse 的渲染方式
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def model_fast_path(model) -> bytes:
+    # 设置 response_model 且使用默认 response_class 时 FastAPI 的渲染方式
+    return type(model).__pydantic_serializer__.to_json(model)
+
+
+def orjson_model_response(model) -> bytes:
+    # 自定义 response_class 时：先 model_dump 成 dict，再由 ORJSONResponse 渲染
+    return ORJSONResponse(model.model_dump(mode="json")).body
+
+
+def report(name: str, model) -> None:
+    cached = model.model_dump()
+    # 直接返回 dict 的路由仍会先经过 jsonable_encoder
+    encoded = jsonable_encoder(cached)
+    stdlib_cache = json.dumps(cached, ensure_ascii=False, default=str)
+    orjson_cache = dumps(cached)
+
+    rows = [
+        ("response_model", timed(lambda: model_fast_path(model)), timed(lambda: orjson_model_response(model))),
+        ("dict 响应", timed(lambda: stdlib_response(jsonable_encoder(cached))),
+         timed(lambda: ORJSONResponse(jsonable_encoder(cached)).body)),
+        ("缓存写入", timed(lambda: json.dumps(cached, ensure_ascii=False, default=str)), timed(lambda: dumps(cached))),
+        ("缓存读取", timed(lambda: json.loads(stdlib_cache)), timed(lambda: loads(orjson_cache))),
+    ]
+
+    print(f"\n📦 {name}（{len(stdlib_response(encoded)) / 1024:.1f} KB）")
+    print(f"{'步骤':<16}{'默认(ms)':>12}{'orjson(ms)':>12}{'加速':>8}")
+    for step, before, after in rows:
+        print(f"{step:<16}{before:>12.3f}{after:>12.3f}{before / after:>7.1f}x")
+
+
+def main() -> None:
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("=" * 70)
+    print("⚡ JSON 序列化基准测试：json vs orjson")
+    print("=" * 70)
+
+    report("/analytics/overview", build_overview())
+    report("/knowledge-graph/nodes (100 节点)", build_graph(100))
+    report(f"/knowledge-graph/nodes ({node_count} 节点)", build_graph(node_count))
+
+
+if __name__ == "__main__":
+    main()
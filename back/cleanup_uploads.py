@@ -0,0 +1,28 @@
+"""清理未被任何成果记录引用的上传文件
+
+建议通过定时任务（如 cron）每天执行一次:
+    python cleanup_uploads.py [宽限小时数，默认24]
+"""
+import asyncio
+import sys
+from datetime import timedelta
+
+from app.db.postgres import close_postgres, get_session, init_postgres
+from app.services.file_storage import file_storage_service
+
+
+async def cleanup_uploads(grace_hours: int):
+    """删除 ref_count 为 0 且超过宽限期的 stored_files 及其文件"""
+    await init_postgres()
+    try:
+        async for db in get_session():
+            removed = await file_storage_service.purge_unreferenced(
+                db, older_than=timedelta(hours=grace_hours)
+            )
+            print(f"✅ 上传文件清理完成，共删除 {removed} 个未引用文件")
+    finally:
+        await close_postgres()
+
+
+if __name__ == "__main__":
+    asyncio.run(cleanup_uploads(int(sys.argv[1]) if len(sys.argv) > 1 else 24))
@@ -0,0 +1,24 @@
+"""离线计算作者指标（h指数、合著中心性、产出效率）
+
+建议通过定时任务（如 cron）每天执行一次:
+    python compute_author_metrics.py
+"""
+import asyncio
+
+from app.db.postgres import close_postgres, get_session, init_postgres
+from app.services.author_metrics import author_metrics_service
+
+
+async def compute_author_metrics():
+    """刷新 author_metrics 表"""
+    await init_postgres()
+    try:
+        async for db in get_session():
+            author_count = await author_metrics_service.refresh(db)
+            print(f"✅ 作者指标计算完成，共 {author_count} 位作者")
+    finally:
+        await close_postgres()
+
+
+if __name__ == "__main__":
+    asyncio.run(compute_author_metrics())
@@ -0,0 +1,26 @@
+-- 作者指标表：由离线任务计算真实 h 指数、合著中心性与产出效率
+-- 执行时间：2025-12-02
+
+CREATE TABLE IF NOT EXISTS author_metrics (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    author_name VARCHAR(100) NOT NULL UNIQUE,
+    author_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    paper_count INTEGER NOT NULL DEFAULT 0,
+    first_author_count INTEGER NOT NULL DEFAULT 0,
+    total_citations INTEGER NOT NULL DEFAULT 0,
+    h_index INTEGER NOT NULL DEFAULT 0,
+    coauthor_count INTEGER NOT NULL DEFAULT 0,
+    degree_centrality DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pagerank DOUBLE PRECISION NOT NULL DEFAULT 0,
+    active_years INTEGER NOT NULL DEFAULT 0,
+    papers_per_year DOUBLE PRECISION NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE author_metrics IS '作者指标表（离线计算）';
+COMMENT ON COLUMN author_metrics.coauthor_count IS '合作者数量（合著网络度数）';
+
+CREATE INDEX IF NOT EXISTS ix_author_metrics_paper_count ON author_metrics(paper_count);
+CREATE INDEX IF NOT EXISTS ix_author_metrics_h_index ON author_metrics(h_index);
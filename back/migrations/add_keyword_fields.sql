@@ -0,0 +1,52 @@
+-- 关键词分析：关键词-研究领域映射表
+-- 执行时间：2025-12-02
+
+-- 1. 关键词统计通过 unnest(keywords) + GROUP BY 扫描论文，不使用数组索引；
+--    keywords 中保存原始大小写，也无法用 && 对规范化后的映射关键词过滤。
+--    删除早期版本创建的 GIN 索引，避免每次写论文时的额外维护开销。
+DROP INDEX IF EXISTS idx_papers_keywords_gin;
+
+-- 2. 关键词-领域映射表（keyword 为小写、去空格后的规范形式）
+CREATE TABLE IF NOT EXISTS keyword_fields (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    keyword VARCHAR(100) NOT NULL UNIQUE,
+    field VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE keyword_fields IS '关键词-研究领域映射表';
+
+CREATE INDEX IF NOT EXISTS ix_keyword_fields_field ON keyword_fields(field);
+
+-- 3. 初始映射（可通过 PUT /api/analytics/keywords/fields 维护）
+INSERT INTO keyword_fields (keyword, field) VALUES
+    ('人工智能', '人工智能'),
+    ('神经网络', '人工智能'),
+    ('知识图谱', '人工智能'),
+    ('artificial intelligence', '人工智能'),
+    ('机器学习', '机器学习'),
+    ('深度学习', '机器学习'),
+    ('强化学习', '机器学习'),
+    ('machine learning', '机器学习'),
+    ('deep learning', '机器学习'),
+    ('计算机视觉', '计算机视觉'),
+    ('图像识别', '计算机视觉'),
+    ('卷积神经网络', '计算机视觉'),
+    ('目标检测', '计算机视觉'),
+    ('computer vision', '计算机视觉'),
+    ('自然语言处理', '自然语言处理'),
+    ('文本分类', '自然语言处理'),
+    ('机器翻译', '自然语言处理'),
+    ('大语言模型', '自然语言处理'),
+    ('nlp', '自然语言处理'),
+    ('数据挖掘', '数据挖掘'),
+    ('大数据', '数据挖掘'),
+    ('推荐系统', '数据挖掘'),
+    ('网络安全', '网络安全'),
+    ('入侵检测', '网络安全'),
+    ('密码学', '网络安全'),
+    ('区块链', '区块链'),
+    ('智能合约', '区块链'),
+    ('供应链', '区块链')
+ON CONFLICT (keyword) DO NOTHING;
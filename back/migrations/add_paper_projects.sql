@@ -0,0 +1,37 @@
+-- 论文-项目关联表：将 papers.related_projects (JSONB) 规范化为可索引的连接表
+-- 执行时间：2025-12-01
+
+-- 1. 创建关联表
+CREATE TABLE IF NOT EXISTS paper_projects (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    paper_id UUID NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_paper_projects UNIQUE (paper_id, project_id)
+);
+
+COMMENT ON TABLE paper_projects IS '论文-项目关联表';
+
+-- uq_paper_projects 已覆盖 paper_id 前缀查询，这里补充反向索引
+CREATE INDEX IF NOT EXISTS idx_paper_projects_project_id ON paper_projects(project_id);
+
+-- 知识图谱按论文ID连接作者
+CREATE INDEX IF NOT EXISTS ix_paper_authors_paper_id ON paper_authors(paper_id);
+
+-- 2. 回填历史数据
+-- 兼容 {"projects": [{"project_id": ...}]}、{"project_ids": [...]} 以及直接数组三种格式
+INSERT INTO paper_projects (paper_id, project_id)
+SELECT DISTINCT p.id, pr.id
+FROM papers p
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE
+        WHEN jsonb_typeof(p.related_projects) = 'array' THEN p.related_projects
+        WHEN jsonb_typeof(p.related_projects -> 'projects') = 'array' THEN p.related_projects -> 'projects'
+        WHEN jsonb_typeof(p.related_projects -> 'project_ids') = 'array' THEN p.related_projects -> 'project_ids'
+        ELSE '[]'::jsonb
+    END
+) AS item
+JOIN projects pr ON pr.id::text = COALESCE(item ->> 'project_id', item ->> 'id', item #>> '{}')
+WHERE p.related_projects IS NOT NULL
+ON CONFLICT ON CONSTRAINT uq_paper_projects DO NOTHING;
@@ -0,0 +1,4 @@
+-- 项目里程碑按项目加载（selectinload）时走索引
+-- 执行时间：2025-12-07
+
+CREATE INDEX IF NOT EXISTS idx_project_milestones_project_id ON project_milestones(project_id);
@@ -0,0 +1,8 @@
+-- 资源下载计数写回：记录已写回的批次，写回后删除 Redis 键失败时不会重复累加
+-- 执行时间：2025-12-08
+
+CREATE TABLE IF NOT EXISTS resource_download_flushes (
+    batch_id UUID PRIMARY KEY,
+    flushed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_resource_download_flushes_flushed_at ON resource_download_flushes(flushed_at);
@@ -0,0 +1,9 @@
+-- 资源使用率计算：resource_usage_logs 复合索引
+-- 执行时间：2025-12-04
+
+-- usage_rate 由后台任务按 (resource_id, usage_date) 窗口统计得到
+CREATE INDEX IF NOT EXISTS idx_resource_usage_logs_resource_date
+    ON resource_usage_logs(resource_id, usage_date);
+
+COMMENT ON COLUMN resources.download_count IS '下载次数（Redis 累计后批量写回）';
+COMMENT ON COLUMN resources.usage_rate IS '近 30 天有使用记录的天数占比（%），由使用记录计算';
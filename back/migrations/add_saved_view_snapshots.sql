@@ -0,0 +1,26 @@
+-- 保存的搜索视图：结果快照与按 updated_at 水位线增量刷新
+-- 执行时间：2025-12-06
+
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS target VARCHAR(50) NOT NULL DEFAULT 'papers';
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS keyword VARCHAR(200);
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS compiled_query TEXT;
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS watermark TIMESTAMPTZ;
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS source_version VARCHAR(100);
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS result_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE search_saved_views ADD COLUMN IF NOT EXISTS refreshed_at TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS search_saved_view_results (
+    view_id UUID NOT NULL REFERENCES search_saved_views(id) ON DELETE CASCADE,
+    item_id UUID NOT NULL,
+    sort_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (view_id, item_id)
+);
+CREATE INDEX IF NOT EXISTS idx_search_saved_view_results_keyset
+    ON search_saved_view_results(view_id, sort_at, item_id);
+
+-- 增量刷新按 updated_at 查找变化的行
+CREATE INDEX IF NOT EXISTS idx_software_copyrights_updated_at ON software_copyrights(updated_at);
+CREATE INDEX IF NOT EXISTS idx_competitions_updated_at ON competitions(updated_at);
+CREATE INDEX IF NOT EXISTS idx_conferences_updated_at ON conferences(updated_at);
+CREATE INDEX IF NOT EXISTS idx_cooperations_updated_at ON cooperations(updated_at);
+CREATE INDEX IF NOT EXISTS idx_resources_updated_at ON resources(updated_at);
@@ -0,0 +1,21 @@
+-- 内容寻址上传存储：stored_files 表
+-- 执行时间：2025-12-04
+
+CREATE TABLE IF NOT EXISTS stored_files (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    sha256 VARCHAR(64) NOT NULL UNIQUE,
+    storage_path VARCHAR(500) NOT NULL UNIQUE,
+    size BIGINT NOT NULL,
+    content_type VARCHAR(100),
+    original_filename VARCHAR(255),
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE stored_files IS '内容寻址的上传文件（按 SHA-256 去重）';
+COMMENT ON COLUMN stored_files.storage_path IS '相对 back 目录的存储路径：uploads/objects/ab/cd/<sha256><扩展名>';
+COMMENT ON COLUMN stored_files.ref_count IS '被成果记录 image_path/file_path 引用的次数';
+
+-- 清理任务按 ref_count = 0 查找未被引用的文件
+CREATE INDEX IF NOT EXISTS idx_stored_files_unreferenced ON stored_files(updated_at) WHERE ref_count = 0;
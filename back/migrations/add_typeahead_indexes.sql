@@ -0,0 +1,6 @@
+-- 标题输入联想：按 updated_at 增量刷新进程内索引
+-- 执行时间：2025-12-05
+
+CREATE INDEX IF NOT EXISTS idx_papers_updated_at ON papers(updated_at);
+CREATE INDEX IF NOT EXISTS idx_patents_updated_at ON patents(updated_at);
+CREATE INDEX IF NOT EXISTS idx_projects_updated_at ON projects(updated_at);
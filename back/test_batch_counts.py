@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""测试批量计数辅助函数 count_by：多个键合并为一条查询（不需要数据库）"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy.dialects import postgresql
+
+from app.db.batch import count_by
+from app.models.tables import Project
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple]) -> None:
+        self._rows = rows
+
+    def all(self) -> list[tuple]:
+        return self._rows
+
+
+class FakeSession:
+    """按语句中的键数组返回预设计数，并记录执行次数"""
+
+    def __init__(self, counts: dict[str, int]) -> None:
+        self.counts = counts
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        keys = statement.compile(dialect=postgresql.dialect()).params["keys"]
+        return FakeResult([(key, self.counts[key]) for key in keys if key in self.counts])
+
+
+def test_single_query():
+    """任意数量的键只执行一条 = ANY(:keys) 查询，结果与输入顺序一一对应"""
+    db = FakeSession({"张三": 3, "李四": 1})
+    names = ["李四", "王五", "张三", None, "李四"]
+    assert asyncio.run(count_by(db, Project.principal, names)) == [1, 0, 3, 0, 1]
+    assert len(db.statements) == 1
+
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "projects.principal = ANY (%(keys)s::VARCHAR(100)[])" in sql and "GROUP BY projects.principal" in sql
+    # 重复键和 None 不会进入参数
+    assert sorted(compiled.params["keys"]) == ["张三", "李四", "王五"]
+    print("   ✅ 单条查询批量计数正确")
+
+
+def test_without_keys():
+    """没有有效键时不查询数据库"""
+    db = FakeSession({})
+    assert asyncio.run(count_by(db, Project.principal, [])) == []
+    assert asyncio.run(count_by(db, Project.principal, [None, None])) == [0, 0]
+    # 接受任意可迭代对象
+    assert asyncio.run(count_by(db, Project.principal, (name for name in [None]))) == [0]
+    assert db.statements == []
+    print("   ✅ 空键处理正确")
+
+
+def main() -> bool:
+    print("=" * 70)
+    print("🔢 测试批量计数 count_by")
+    print("=" * 70)
+
+    print("\n1️⃣ 批量查询...")
+    test_single_query()
+
+    print("\n2️⃣ 空键...")
+    test_without_keys()
+
+    print("\n✅ 批量计数测试全部通过")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 测试被中断")
+    except Exception as e:
+        print(f"\n\n💥 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
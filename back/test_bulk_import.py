@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""测试成果批量导入的行校验和合并语句生成（不需要数据库）"""
+import io
+import json
+import os
+import sys
+import uuid
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import HTTPException
+
+from app.services.bulk_import import RowValidator, _coerce, _open_rows, bulk_import_service
+
+PAPER_COLUMNS = bulk_import_service.importable_columns("papers")
+CREATOR = uuid.uuid4()
+
+
+def make_validator(entity: str, header: list[str], max_errors: int = 100) -> RowValidator:
+    return RowValidator(
+        entity=entity,
+        header=header,
+        columns=bulk_import_service.importable_columns(entity),
+        key_column="doi" if entity == "papers" else None,
+        created_by=CREATOR,
+        max_errors=max_errors,
+    )
+
+
+def test_coerce():
+    """按列类型转换单元格"""
+    columns = PAPER_COLUMNS
+    assert _coerce(columns["title"], "  标题  ") == "标题"
+    assert _coerce(columns["title"], "   ") is None
+    assert _coerce(columns["citation_count"], "12") == 12
+    assert _coerce(columns["citation_count"], 12.0) == 12
+    assert _coerce(columns["impact_factor"], "3.25") == Decimal("3.25")
+    assert _coerce(columns["publish_date"], "2024/03/05") == date(2024, 3, 5)
+    assert _coerce(columns["keywords"], "图谱，检索; NLP") == ["图谱", "检索", "NLP"]
+    assert _coerce(columns["keywords"], '["a", " ", "b"]') == ["a", "b"]
+    assert json.loads(_coerce(columns["authors"], '[{"name": "张三"}]')) == [{"name": "张三"}]
+    # xlsx 中被识别为数字的编号
+    assert _coerce(columns["doi"], 1234.0) == "1234"
+
+    invalid = [
+        ("citation_count", "1.5", "不是有效的整数"),
+        ("citation_count", str(2**31), "整数超出范围"),
+        ("impact_factor", "1000", "数值超出范围"),
+        ("impact_factor", "NaN", "不是有效的数字"),
+        ("publish_date", "2024-13-01", "不是有效的日期（格式：YYYY-MM-DD）"),
+        ("authors", "{bad", "不是有效的JSON"),
+        ("keywords", '["a"', "不是有效的列表"),
+        ("title", "x" * 501, "长度超过 500 个字符"),
+    ]
+    for name, value, message in invalid:
+        try:
+            _coerce(columns[name], value)
+        except ValueError as e:
+            assert str(e) == message, f"{name}={value!r}: {e}"
+        else:
+            raise AssertionError(f"{name}={value!r} 应校验失败")
+    print("   ✅ 单元格类型转换正确")
+
+
+def test_validator_columns():
+    """表头映射：忽略未知列和受保护列，缺少必填列时报错"""
+    validator = make_validator("papers", ["title", "doi", "status", "id", "unknown", ""])
+    assert [column.name for column, _ in validator.file_columns] == ["title", "doi", "status"]
+    assert validator.ignored_columns == ["id", "unknown"]
+    assert validator.key_column == "doi"
+    # 缺少的有默认值的列使用模型默认值
+    assert validator.record_columns[:5] == ["id", "created_by", "title", "doi", "status"]
+    assert {"citation_count", "writing_progress"} <= set(validator.record_columns[5:])
+
+    # 文件中没有业务编号列时只做插入
+    assert make_validator("papers", ["title"]).key_column is None
+
+    try:
+        make_validator("competitions", ["name"])
+    except HTTPException as e:
+        assert e.status_code == 400 and "level" in e.detail
+    else:
+        raise AssertionError("缺少必填列应返回 400")
+    print("   ✅ 表头映射正确")
+
+
+def test_validator_rows():
+    """行级错误、重复业务编号、空行和分批"""
+    validator = make_validator("papers", ["title", "doi", "citation_count", "related_projects"], max_errors=2)
+    project_id = uuid.uuid4()
+    rows = iter([
+        ("论文一", "10.1/a", "3", json.dumps({"projects": [{"project_id": str(project_id)}]})),
+        ("", "", "", ""),  # 空行
+        ("", "10.1/b", "", ""),  # 标题为空
+        ("论文三", "10.1/a", "", ""),  # DOI 与第 2 行重复
+        ("论文四", "10.1/d", "abc", ""),  # 引用数无效
+        ("论文五", "", "", ""),
+        ("论文六", "10.1/f", "", ""),
+    ])
+
+    first = validator.next_batch(rows, 2)
+    second = validator.next_batch(rows, 2)
+    assert validator.next_batch(rows, 2) == []
+    records = first + second
+    assert [len(batch) for batch in (first, second)] == [2, 1]
+    assert [record[2] for record in records] == ["论文一", "论文五", "论文六"]
+    assert all(record[1] == CREATOR for record in records)
+    # 未填写的非空列使用默认值，可空列保持 None
+    assert records[1][3:5] == (None, 0)
+
+    assert validator.total_rows == 7
+    assert validator.invalid_rows == 3
+    assert validator.error_count == 3
+    # 只返回前 max_errors 条错误，行号从第 2 行（表头之后）开始
+    assert validator.errors == [
+        {"row": 4, "column": "title", "message": "必填字段为空"},
+        {"row": 5, "column": "doi", "message": "与第 2 行重复"},
+    ]
+    assert validator.project_links[records[0][0]] == {project_id}
+    assert validator.project_links[records[1][0]] == set()
+    print("   ✅ 行级校验正确")
+
+
+def test_open_rows():
+    """CSV 读取：UTF-8 BOM 和 GBK 编码"""
+    content = "title,doi\n知识图谱,10.1/a\n"
+    for raw in (content.encode("utf-8-sig"), content.encode("gbk")):
+        header, rows = _open_rows(io.BytesIO(raw), ".csv")
+        assert header == ["title", "doi"]
+        assert list(rows) == [("知识图谱", "10.1/a")]
+
+    try:
+        _open_rows(io.BytesIO(b""), ".csv")
+    except HTTPException as e:
+        assert e.status_code == 400
+    else:
+        raise AssertionError("空文件应返回 400")
+    print("   ✅ CSV 读取正确")
+
+
+def test_merge_sql():
+    """合并语句：按业务编号更新+插入，或仅插入"""
+    file_fields = ["image_path", "file_path"]
+    validator = make_validator("papers", ["title", "doi", "file_path"])
+    sql = bulk_import_service._merge_sql("papers", "_import_papers", validator, file_fields)
+    assert sql.startswith("WITH previous AS (")
+    assert "JOIN _import_papers s ON t.doi = s.doi" in sql
+    # 只覆盖文件中出现的列，不覆盖 id / created_by
+    assert "SET title = s.title, doi = s.doi, file_path = s.file_path, updated_at = now()" in sql
+    assert "WHERE NOT EXISTS (SELECT 1 FROM previous p WHERE p.staging_id = s.id)" in sql
+    assert "p.image_path AS old_image_path" in sql and "u.file_path AS new_file_path" in sql
+    assert "NULL AS old_file_path" in sql and "i.file_path AS new_file_path" in sql
+    assert sql.count("UNION ALL") == 1
+
+    validator = make_validator("competitions", ["name", "level"])
+    sql = bulk_import_service._merge_sql("competitions", "_import_competitions", validator, [])
+    assert sql.startswith("WITH inserted AS (INSERT INTO competitions")
+    assert "UPDATE" not in sql and "NOT EXISTS" not in sql
+    assert sql.endswith("SELECT i.id AS staging_id, i.id, true AS inserted FROM inserted i")
+    print("   ✅ 合并语句生成正确")
+
+
+def main() -> bool:
+    print("=" * 70)
+    print("📥 测试成果批量导入")
+    print("=" * 70)
+
+    print("\n1️⃣ 类型转换...")
+    test_coerce()
+
+    print("\n2️⃣ 行校验...")
+    test_validator_columns()
+    test_validator_rows()
+    test_open_rows()
+
+    print("\n3️⃣ 合并语句...")
+    test_merge_sql()
+
+    print("\n✅ 批量导入测试全部通过")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 测试被中断")
+    except Exception as e:
+        print(f"\n\n💥 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""测试列表页分面统计：GROUPING SETS 查询和结果分组（不需要数据库）"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.deps import parse_facets
+from app.crud.papers import crud_paper
+
+
+class FakeResult:
+    def __init__(self, rows: list[dict]) -> None:
+        self._rows = rows
+
+    def mappings(self) -> list[dict]:
+        return self._rows
+
+
+class FakeSession:
+    """记录执行的语句，并返回预设的 GROUPING SETS 结果行"""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.rows)
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def row(count: int, *values, grouped: Optional[int] = None, width: int = 2) -> dict:
+    """构造一行结果：grouped 为分组所在分面下标，None 表示空分组集（总数）"""
+    result = {"count": count}
+    for idx in range(width):
+        result[f"facet_{idx}"] = values[0] if idx == grouped else None
+        result[f"grouping_{idx}"] = 0 if idx == grouped else 1
+    return result
+
+
+def test_grouping():
+    """总数取自空分组集，各分面按数量降序，NULL 取值不返回"""
+    db = FakeSession([
+        row(2, "published", grouped=0),
+        row(5, "draft", grouped=0),
+        row(1, None, grouped=0),  # status 为空的记录
+        row(3, 2023, grouped=1),
+        row(4, 2024, grouped=1),
+        row(1, None, grouped=1),  # 没有发表日期的记录
+        row(8),
+    ])
+    total, counts = asyncio.run(crud_paper.get_facets(db, facets=["status", "year"], filters={"status": None}))
+    assert total == 8
+    assert counts == {
+        "status": [{"value": "draft", "count": 5}, {"value": "published", "count": 2}],
+        "year": [{"value": 2024, "count": 4}, {"value": 2023, "count": 3}],
+    }
+    assert len(db.statements) == 1, "分面和总数应由同一条查询给出"
+    print("   ✅ 结果分组正确")
+
+
+def test_query():
+    """生成的 SQL：每个分面一个分组集外加 ()，日期列按年份分组，标签分面按主键去重"""
+    db = FakeSession([row(0, width=2)])
+    total, counts = asyncio.run(crud_paper.get_facets(db, facets=["status", "year"], search="图谱"))
+    assert total == 0 and counts == {"status": [], "year": []}
+    sql = compile_sql(db.statements[0])
+    assert "GROUPING SETS((papers.status), (CAST(EXTRACT(year FROM papers.publish_date) AS INTEGER)), ())" in sql
+    assert "grouping(papers.status)" in sql
+    assert "count(*)" in sql and "JOIN" not in sql
+    assert "ILIKE" in sql.upper()
+
+    db = FakeSession([row(0, width=1)])
+    asyncio.run(crud_paper.get_facets(db, facets=["tag"]))
+    sql = compile_sql(db.statements[0])
+    assert "count(DISTINCT papers.id)" in sql
+    assert "LEFT OUTER JOIN achievement_tags" in sql and "LEFT OUTER JOIN tags" in sql
+    assert "GROUPING SETS((tags.name), ())" in sql
+    print("   ✅ 分面查询生成正确")
+
+
+def test_parse_facets():
+    """facets 参数解析：去重、去空白，未知分面返回 400"""
+    allowed = crud_paper.available_facets
+    assert "tag" in allowed
+    assert parse_facets(None, allowed) == []
+    assert parse_facets(" status, year,status,, ", allowed) == ["status", "year"]
+    try:
+        parse_facets("status,color", allowed)
+    except HTTPException as e:
+        assert e.status_code == 400 and "color" in e.detail
+    else:
+        raise AssertionError("未知分面应返回 400")
+    print("   ✅ facets 参数解析正确")
+
+
+def main() -> bool:
+    print("=" * 70)
+    print("📊 测试列表页分面统计")
+    print("=" * 70)
+
+    print("\n1️⃣ 结果分组...")
+    test_grouping()
+
+    print("\n2️⃣ 查询生成...")
+    test_query()
+
+    print("\n3️⃣ 参数解析...")
+    test_parse_facets()
+
+    print("\n✅ 分面统计测试全部通过")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 测试被中断")
+    except Exception as e:
+        print(f"\n\n💥 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""测试知识图谱列式编码的往返一致性（不需要数据库）"""
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+import msgpack
+from fastapi import HTTPException
+
+from app.schemas.knowledge_graph import GraphEdge, GraphNode, GraphStats
+from app.services.graph_codec import (
+    build_columnar_graph,
+    check_graph_format,
+    columnar_graph_response,
+    encode_graph_payload,
+)
+
+NODES = [
+    GraphNode(id="p1", label="论文一", type="paper", properties={"year": 2023, "venue": "ACL"}),
+    GraphNode(id="a1", label="张三", type="author", properties={"h_index": 12}),
+    GraphNode(id="p2", label="论文二", type="paper", properties={"year": 2024}),
+    GraphNode(id="k1", label="知识图谱", type="keyword", properties={}),
+]
+EDGES = [
+    GraphEdge(source="a1", target="p1", relationship="authored"),
+    GraphEdge(source="a1", target="p2", relationship="authored", weight=0.5),
+    GraphEdge(source="p2", target="p1", relationship="cites"),
+    GraphEdge(source="p1", target="k1", relationship="has_keyword"),
+    # 端点不存在的边应被丢弃
+    GraphEdge(source="p1", target="missing", relationship="cites"),
+]
+STATS = GraphStats(total_nodes=4, total_edges=4, node_types={"paper": 2, "author": 1, "keyword": 1})
+
+
+def decode_columnar_graph(payload: dict) -> tuple[list[dict], list[dict]]:
+    """把列式结构还原为节点/边字典列表（与 GraphNode / GraphEdge 字段一致）"""
+    strings = payload["strings"]
+    columns = payload["nodes"]
+    nodes = []
+    for i, node_id in enumerate(columns["id"]):
+        properties = {
+            strings[int(key)]: column[i]
+            for key, column in columns["properties"].items()
+            if column[i] is not None
+        }
+        nodes.append({
+            "id": node_id,
+            "label": columns["label"][i],
+            "type": strings[columns["type"][i]],
+            "properties": properties,
+        })
+
+    edge_columns = payload["edges"]
+    weights = edge_columns["weight"] or [1.0] * len(edge_columns["source"])
+    edges = [
+        {
+            "source": columns["id"][source],
+            "target": columns["id"][target],
+            "relationship": strings[type_idx],
+            "weight": weight,
+        }
+        for source, target, type_idx, weight in zip(
+            edge_columns["source"], edge_columns["target"], edge_columns["type"], weights
+        )
+    ]
+    return nodes, edges
+
+
+def decode_body(body: bytes, encoding: str) -> dict:
+    if encoding == "msgpack":
+        return msgpack.unpackb(body, raw=False)
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def test_round_trip():
+    """json / gzip / msgpack 三种编码解码后都能还原原始节点和边"""
+    expected_nodes = [node.model_dump() for node in NODES]
+    expected_edges = [edge.model_dump() for edge in EDGES[:-1]]
+
+    payload = build_columnar_graph(NODES, EDGES, STATS)
+    assert payload["format"] == "columnar"
+    # 重复的类型字符串只出现一次
+    assert len(payload["strings"]) == len(set(payload["strings"]))
+    assert payload["strings"].count("paper") == 1 and payload["strings"].count("authored") == 1
+
+    for encoding in ("json", "gzip", "msgpack"):
+        decoded = decode_body(encode_graph_payload(payload, encoding), encoding)
+        nodes, edges = decode_columnar_graph(decoded)
+        assert nodes == expected_nodes, f"{encoding}: 节点不一致"
+        assert edges == expected_edges, f"{encoding}: 边不一致"
+        assert decoded["stats"] == STATS.model_dump(), f"{encoding}: 统计不一致"
+        print(f"   ✅ {encoding} 往返一致")
+
+
+def test_columns():
+    """权重全为 1.0 时省略权重列；不带属性时属性列为空"""
+    payload = build_columnar_graph(NODES, [EDGES[0], EDGES[2]], include_properties=False)
+    assert payload["edges"]["weight"] == []
+    assert payload["nodes"]["properties"] == {}
+    assert "stats" not in payload
+    nodes, edges = decode_columnar_graph(payload)
+    assert all(node["properties"] == {} for node in nodes)
+    assert [edge["weight"] for edge in edges] == [1.0, 1.0]
+
+    empty = build_columnar_graph([], [])
+    assert decode_columnar_graph(empty) == ([], [])
+    print("   ✅ 可省略列处理正确")
+
+
+def test_accept_encoding_fallback():
+    """请求 gzip 但客户端不接受时退回未压缩 JSON，并带 Vary"""
+    response = columnar_graph_response(NODES, EDGES, STATS, encoding="gzip", accept_encoding="gzip, br")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert decode_columnar_graph(decode_body(response.body, "gzip"))[0][0]["id"] == "p1"
+
+    for accept_encoding in (None, "identity", "br", "gzip;q=0"):
+        response = columnar_graph_response(NODES, EDGES, STATS, encoding="gzip", accept_encoding=accept_encoding)
+        assert "content-encoding" not in response.headers, accept_encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert decode_body(response.body, "json")["strings"] == build_columnar_graph(NODES, EDGES)["strings"]
+
+    response = columnar_graph_response(NODES, EDGES, STATS, encoding="msgpack")
+    assert response.media_type == "application/msgpack"
+    print("   ✅ Accept-Encoding 协商正确")
+
+
+def test_unknown_format_and_encoding():
+    """未知的 format / encoding 返回 400，而不是静默退回 JSON"""
+    check_graph_format("json")
+    check_graph_format("columnar")
+    for call in (
+        lambda: check_graph_format("colunmar"),
+        lambda: columnar_graph_response(NODES, EDGES, encoding="zip"),
+    ):
+        try:
+            call()
+        except HTTPException as e:
+            assert e.status_code == 400
+        else:
+            raise AssertionError("未知参数应返回 400")
+    print("   ✅ 未知参数返回 400")
+
+
+def main() -> bool:
+    print("=" * 70)
+    print("🕸️ 测试知识图谱列式编码")
+    print("=" * 70)
+
+    print("\n1️⃣ 编码往返...")
+    test_round_trip()
+
+    print("\n2️⃣ 可省略列...")
+    test_columns()
+
+    print("\n3️⃣ gzip 协商...")
+    test_accept_encoding_fallback()
+    test_unknown_format_and_encoding()
+
+    print("\n✅ 知识图谱列式编码测试全部通过")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 测试被中断")
+    except Exception as e:
+        print(f"\n\n💥 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
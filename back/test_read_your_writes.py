@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""测试读写分离的 read-your-writes：用户写入后的读请求走主库（不需要数据库和 Redis）"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+# 切换到back目录
+os.chdir(Path(__file__).parent)
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db import postgres
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.services.recent_writes import recent_writes_service
+
+
+class FakeSession:
+    """只记录来自哪个连接池的只读会话"""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+
+    async def close(self) -> None:
+        pass
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    # 用 SQLite 内存库提交一次真实的写事务，触发 postgres 模块中的 Session 事件
+    engine = create_engine("sqlite://")
+
+    @app.post("/items")
+    async def write():
+        with Session(engine) as session:
+            session.execute(text("CREATE TABLE IF NOT EXISTS items (id INTEGER)"))
+            session.execute(text("INSERT INTO items VALUES (1)"))
+            session.commit()
+        return {"ok": True}
+
+    @app.get("/items")
+    async def read(db: FakeSession = Depends(postgres.get_read_session)):
+        return {"source": db.source}
+
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=60)
+    return app
+
+
+def auth(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+def setup_replica():
+    """模拟已配置且延迟正常的只读副本，返回需要恢复的原值"""
+    original = (
+        settings.postgres_enabled,
+        settings.redis_enabled,
+        postgres.session_factory,
+        postgres.replica_session_factory,
+        postgres.replica_monitor.is_available,
+    )
+    settings.postgres_enabled = True
+    settings.redis_enabled = False  # 使用进程内记录
+    postgres.session_factory = lambda: FakeSession("primary")
+    postgres.replica_session_factory = lambda: FakeSession("replica")
+
+    async def is_available() -> bool:
+        return True
+
+    postgres.replica_monitor.is_available = is_available
+    return original
+
+
+def restore_replica(original) -> None:
+    (
+        settings.postgres_enabled,
+        settings.redis_enabled,
+        postgres.session_factory,
+        postgres.replica_session_factory,
+        postgres.replica_monitor.is_available,
+    ) = original
+
+
+def test_write_then_read_uses_primary():
+    """同一用户写入后读主库；其他用户和匿名请求仍读副本；不依赖 Cookie"""
+    original = setup_replica()
+    try:
+        client = TestClient(build_app())
+        writer, other = str(uuid.uuid4()), str(uuid.uuid4())
+
+        assert client.get("/items", headers=auth(writer)).json() == {"source": "replica"}
+
+        response = client.post("/items", headers=auth(writer))
+        assert response.status_code == 200
+        assert "set-cookie" not in response.headers
+        client.cookies.clear()
+
+        assert client.get("/items", headers=auth(writer)).json() == {"source": "primary"}
+        assert client.get("/items", headers=auth(other)).json() == {"source": "replica"}
+        assert client.get("/items").json() == {"source": "replica"}
+        # 无效 Token 不能借用他人的记录
+        assert client.get("/items", headers={"Authorization": "Bearer invalid"}).json() == {"source": "replica"}
+        print("   ✅ 写入后同一用户的读请求走主库")
+
+        # 窗口过期后恢复读副本
+        recent_writes_service._local[writer] = 0
+        assert client.get("/items", headers=auth(writer)).json() == {"source": "replica"}
+        print("   ✅ 窗口过期后恢复读副本")
+    finally:
+        restore_replica(original)
+
+
+def test_anonymous_write_not_recorded():
+    """匿名写入不产生记录"""
+    original = setup_replica()
+    try:
+        client = TestClient(build_app())
+        before = dict(recent_writes_service._local)
+        assert client.post("/items").status_code == 200
+        assert recent_writes_service._local == before
+        print("   ✅ 匿名写入不记录")
+    finally:
+        restore_replica(original)
+
+
+def main() -> bool:
+    print("=" * 70)
+    print("🔁 测试 read-your-writes")
+    print("=" * 70)
+
+    print("\n1️⃣ 写入后读取...")
+    test_write_then_read_uses_primary()
+
+    print("\n2️⃣ 匿名请求...")
+    test_anonymous_write_not_recorded()
+
+    print("\n✅ read-your-writes 测试全部通过")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 测试被中断")
+    except Exception as e:
+        print(f"\n\n💥 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
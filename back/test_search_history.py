@@ -3,6 +3,7 @@
 import asyncio
 import sys
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # 切换到back目录
@@ -10,7 +11,32 @@ os.chdir(Path(__file__).parent)
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.db.redis import init_redis, get_client, close_redis
-from app.services.search_history import search_history_service
+from app.services import search_history
+from app.services.search_history import SearchHistoryService, search_history_service
+
+
+@asynccontextmanager
+async def count_zincrby(calls: list):
+    """在写回期间记录管道中的 ZINCRBY 命令 (键, 增量, 关键词)"""
+    original_pipeline = search_history.redis_pipeline
+
+    @asynccontextmanager
+    async def recording_pipeline(transaction: bool = False):
+        async with original_pipeline(transaction=transaction) as pipe:
+            zincrby = pipe.zincrby
+
+            def recording_zincrby(name, amount, value):
+                calls.append((name, amount, value))
+                return zincrby(name, amount, value)
+
+            pipe.zincrby = recording_zincrby
+            yield pipe
+
+    search_history.redis_pipeline = recording_pipeline
+    try:
+        yield
+    finally:
+        search_history.redis_pipeline = original_pipeline
 
 
 async def test_search_history():
@@ -54,7 +80,7 @@ async def test_search_history():
     ]
     
     for keyword, category in test_keywords:
-        success = await search_history_service.record_search(
+        success = search_history_service.record_search(
             user_id=test_user_id,
             keyword=keyword,
             category=category
@@ -64,6 +90,33 @@ async def test_search_history():
         else:
             print(f"   ❌ 记录失败: {keyword}")
     
+    # record_search 只写入进程内缓冲，读取前先写回 Redis（正常运行时由后台任务定期写回）
+    print("\n   📤 写回缓冲...")
+    zincrby_calls = []
+    async with count_zincrby(zincrby_calls):
+        flushed = await search_history_service.flush()
+    print(f"   ✅ 写回 {flushed} 次搜索")
+    if flushed != len(test_keywords):
+        print(f"   ❌ 写回次数应为 {len(test_keywords)}")
+        return False
+    
+    # 同一次写回中相同关键词只执行一次 ZINCRBY，增量为累计次数
+    hot_calls = [
+        (amount, keyword) for key, amount, keyword in zincrby_calls
+        if key == SearchHistoryService.GLOBAL_HOT_KEY
+    ]
+    papers_calls = [
+        (amount, keyword) for key, amount, keyword in zincrby_calls
+        if key == f"{SearchHistoryService.GLOBAL_HOT_KEY}:papers"
+    ]
+    if hot_calls.count((3, "深度学习")) != 1 or [kw for _, kw in hot_calls].count("深度学习") != 1:
+        print(f"   ❌ 全局热词未合并: {hot_calls}")
+        return False
+    if [call for call in papers_calls if call[1] == "深度学习"] != [(2, "深度学习")]:
+        print(f"   ❌ 分类热词未合并: {papers_calls}")
+        return False
+    print(f"   ✅ 相同关键词已合并：全局热词 {len(hot_calls)} 次 ZINCRBY（{len(test_keywords)} 次搜索）")
+    
     # 测试获取用户历史
     print("\n4️⃣ 测试获取用户搜索历史...")
     history = await search_history_service.get_user_history(test_user_id, limit=10)